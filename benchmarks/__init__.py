@@ -0,0 +1 @@
+# Benchmark harness: pipeline stages + migration runner throughput
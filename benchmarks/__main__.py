@@ -0,0 +1,117 @@
+"""
+CLI entry-point for the benchmark harness.
+
+Usage:
+    python -m benchmarks pipeline [--scales 10000,100000] [--out results.json]
+    python -m benchmarks migrate  [--changesets 10,100,1000,10000] [--out results.json]
+    python -m benchmarks all      [--scales ...] [--changesets ...] [--out results.json]
+    python -m benchmarks compare  baseline.json current.json [--threshold 10]
+
+Needs a MySQL server reachable through DB_HOST / DB_PORT / DB_USER /
+DB_PASSWORD.  The harness creates and drops its own database
+(BENCH_DB_NAME, default ``migration_bench``) and never touches DB_NAME.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from .harness import bench_migrate, bench_pipeline, compare_results, environment_info
+
+
+def _setup_logging() -> None:
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    lgr = logging.getLogger("bench")
+    lgr.addHandler(handler)
+    lgr.setLevel(logging.INFO)
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v.replace("_", "")) for v in value.split(",") if v.strip()]
+
+
+def _default_out() -> Path:
+    return Path("benchmarks/results") / f"bench_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+
+
+def main() -> None:
+    # Load .env file if it exists
+    env_file = Path("env.local")
+    if env_file.exists():
+        load_dotenv(env_file)
+
+    _setup_logging()
+
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="Throughput benchmarks for the pipeline and migration runner",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("pipeline", "Time each pipeline stage at several scales"),
+                            ("migrate", "Time update over synthetic changelogs"),
+                            ("all", "Run both pipeline and migrate benchmarks")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--out", default=None, help="Results JSON path")
+        if name in ("pipeline", "all"):
+            p.add_argument("--scales", type=_int_list, default=[10_000, 100_000],
+                           help="Comma-separated order row counts (e.g. 10000,1000000,50000000)")
+            p.add_argument("--customer-ratio", type=float, default=0.2,
+                           help="Customers generated per order row")
+            p.add_argument("--seed", type=int, default=42)
+            p.add_argument("--data-root", default="benchmarks/data",
+                           help="Cache directory for generated CSVs")
+            p.add_argument("--sql-dir", default="sql")
+        if name in ("migrate", "all"):
+            p.add_argument("--changesets", type=_int_list, default=[10, 100, 1000],
+                           help="Comma-separated changelog sizes (e.g. 10,100,1000,10000)")
+
+    p_cmp = sub.add_parser("compare", help="Compare two results files")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=10.0,
+                       help="Throughput drop (percent) that counts as a regression")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "compare":
+            baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+            current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+            rows = compare_results(baseline, current, args.threshold)
+            for row in rows:
+                flag = "REGRESSION" if row["regression"] else "ok"
+                print(f"{row['metric']:<45} {row['baseline']:>14.1f} -> "
+                      f"{row['current']:>14.1f}  {row['change_pct']:+6.1f}%  {flag}")
+            if any(row["regression"] for row in rows):
+                sys.exit(1)
+            return
+
+        results = {"environment": environment_info(), "pipeline": [], "migrate": []}
+        if args.command in ("pipeline", "all"):
+            for scale in args.scales:
+                results["pipeline"].append(bench_pipeline(
+                    scale, Path(args.data_root), args.sql_dir, args.customer_ratio, args.seed,
+                ))
+        if args.command in ("migrate", "all"):
+            for count in args.changesets:
+                results["migrate"].append(bench_migrate(count))
+
+        out = Path(args.out) if args.out else _default_out()
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(results, indent=2, default=str), encoding="utf-8")
+        print(f"Benchmark results written to {out}")
+
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
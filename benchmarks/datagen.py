@@ -0,0 +1,107 @@
+"""
+Synthetic data generator for the benchmark harness.
+
+Writes ``customers.csv`` and ``orders.csv`` with the same headers as
+``data/raw``.  Output is fully determined by ``(orders, customers, seed)`` so
+runs on different commits ingest byte-identical inputs.
+"""
+
+import csv
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+COUNTRIES = ("US", "GB", "DE", "FR", "IN", "JP", "BR", "CA", "AU", "NL")
+CURRENCIES = ("USD", "USD", "USD", "EUR", "GBP")
+STATUSES = ("completed", "completed", "completed", "pending", "shipped", "cancelled")
+FIRST_NAMES = ("Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Margaret", "Linus")
+LAST_NAMES = ("Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Hamilton", "Torvalds")
+
+BASE_TIME = datetime(2026, 1, 1)
+
+
+def generate_customers(path: Path, rows: int, seed: int = 42) -> int:
+    """Write *rows* customers to *path*.  Returns bytes written."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["customer_id", "full_name", "email", "country", "updated_at"])
+        for cid in range(1, rows + 1):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            updated = BASE_TIME + timedelta(seconds=cid)
+            writer.writerow([
+                cid,
+                f"{first} {last}",
+                f"{first.lower()}.{last.lower()}.{cid}@example.com",
+                rng.choice(COUNTRIES),
+                updated.strftime("%Y-%m-%d %H:%M:%S"),
+            ])
+    return path.stat().st_size
+
+
+def generate_orders(path: Path, rows: int, customers: int, seed: int = 42) -> int:
+    """Write *rows* orders referencing customers ``1..customers``.  Returns bytes written."""
+    rng = random.Random(seed + 1)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow([
+            "order_id", "customer_id", "order_date", "amount",
+            "currency", "status", "updated_at",
+        ])
+        for oid in range(1, rows + 1):
+            updated = BASE_TIME + timedelta(seconds=oid)
+            writer.writerow([
+                oid,
+                rng.randint(1, customers),
+                updated.strftime("%Y-%m-%d"),
+                f"{rng.uniform(1, 2000):.2f}",
+                rng.choice(CURRENCIES),
+                rng.choice(STATUSES),
+                updated.strftime("%Y-%m-%d %H:%M:%S"),
+            ])
+    return path.stat().st_size
+
+
+def generate_dataset(data_dir: Path, orders: int, customer_ratio: float = 0.2,
+                     seed: int = 42) -> dict:
+    """Generate both CSVs under *data_dir* and return their sizes and row counts."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    customers = max(1, int(orders * customer_ratio))
+    return {
+        "customers": customers,
+        "orders": orders,
+        "customers_bytes": generate_customers(data_dir / "customers.csv", customers, seed),
+        "orders_bytes": generate_orders(data_dir / "orders.csv", orders, customers, seed),
+    }
+
+
+def generate_changelog(base_dir: Path, changesets: int) -> Path:
+    """
+    Write a YAML changelog of *changesets* small migrations under *base_dir*.
+
+    Every 100th changeset creates a table; the rest insert a row into the
+    latest one, so the run measures runner overhead rather than DDL cost.
+    Returns the changelog path.
+    """
+    mig_dir = base_dir / "migrations"
+    mig_dir.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for i in range(1, changesets + 1):
+        table = f"bench_probe_{(i - 1) // 100:04d}"
+        if (i - 1) % 100 == 0:
+            sql = f"CREATE TABLE {table} (id INT PRIMARY KEY, note VARCHAR(64));\n"
+        else:
+            sql = f"INSERT INTO {table} (id, note) VALUES ({i}, 'changeset {i}');\n"
+        name = f"{i:05d}_bench.up.sql"
+        (mig_dir / name).write_text(sql, encoding="utf-8")
+        entries.append(
+            f'  - changeSet:\n'
+            f'      id: "{i:05d}"\n'
+            f'      author: "bench"\n'
+            f'      sqlFile: "migrations/{name}"\n'
+            f'      risk: "low"\n'
+        )
+    changelog = base_dir / "changelog.yml"
+    changelog.write_text("databaseChangeLog:\n" + "".join(entries), encoding="utf-8")
+    return changelog
@@ -0,0 +1,296 @@
+"""
+Benchmark harness for the data pipeline and the migration runner.
+
+Each benchmark runs against a throw-away database on the configured MySQL
+server (``DB_HOST`` / ``DB_PORT`` / ``DB_USER`` / ``DB_PASSWORD``) named by
+``BENCH_DB_NAME`` (default ``migration_bench``).  The database is dropped and
+recreated before every scale so results do not depend on earlier runs.
+
+Results are plain dicts (serialised to JSON by the CLI) with wall time, CPU
+time, rows/sec, latency and peak RSS per stage.
+"""
+
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import mysql.connector
+
+from src.db import get_conn, fetch_one, execute_script
+from src.migrate.runner import update_cmd
+from src.pipeline.ingest import ingest_customers, ingest_orders
+from src.pipeline.transform import build_dimensions, build_facts
+from src.pipeline.validate import run_validations
+
+from .datagen import generate_changelog, generate_dataset
+
+logger = logging.getLogger("bench")
+
+SCHEMA_FILE = Path(__file__).with_name("schema.sql")
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+# ---------------------------------------------------------------------------
+# Environment helpers
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_sha() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def reset_database() -> str:
+    """Drop and recreate the benchmark database and point ``DB_NAME`` at it."""
+    name = os.getenv("BENCH_DB_NAME", "migration_bench")
+    if not name.startswith("bench") and not name.endswith("_bench"):
+        raise RuntimeError(
+            f"Refusing to drop '{name}': BENCH_DB_NAME must start with 'bench' "
+            f"or end with '_bench'."
+        )
+    conn = mysql.connector.connect(
+        host=os.environ["DB_HOST"],
+        port=int(os.getenv("DB_PORT", "3306")),
+        user=os.environ["DB_USER"],
+        password=os.environ["DB_PASSWORD"],
+    )
+    try:
+        cur = conn.cursor()
+        cur.execute(f"DROP DATABASE IF EXISTS `{name}`")
+        cur.execute(f"CREATE DATABASE `{name}`")
+        cur.close()
+    finally:
+        conn.close()
+    os.environ["DB_NAME"] = name
+    return name
+
+
+def environment_info() -> dict:
+    info = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_sha": _git_sha(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "db_host": os.getenv("DB_HOST"),
+    }
+    try:
+        conn = get_conn()
+        try:
+            info["mysql_version"] = fetch_one(conn, "SELECT VERSION()")[0]
+        finally:
+            conn.close()
+    except Exception:
+        info["mysql_version"] = None
+    return info
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _measure(fn, *args, rows: int | None = None) -> tuple:
+    """Run ``fn(*args)`` and return ``(result, metrics)``."""
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    result = fn(*args)
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    if rows is None and isinstance(result, int) and not isinstance(result, bool):
+        rows = result
+    metrics = {
+        "seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4),
+        "rows": rows,
+        "rows_per_sec": round(rows / wall, 1) if rows and wall > 0 else None,
+        "latency_us_per_row": round(wall * 1e6 / rows, 2) if rows else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return result, metrics
+
+
+def _latency_summary(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Pipeline benchmark
+# ---------------------------------------------------------------------------
+
+def bench_pipeline(scale: int, data_root: Path, sql_dir: str = "sql",
+                   customer_ratio: float = 0.2, seed: int = 42) -> dict:
+    """Time every stage of the pipeline for *scale* order rows."""
+    data_dir = data_root / f"orders_{scale}_seed_{seed}"
+    if not (data_dir / "orders.csv").exists():
+        logger.info(json.dumps({"event": "bench_generate", "scale": scale, "dir": str(data_dir)}))
+        dataset = generate_dataset(data_dir, scale, customer_ratio, seed)
+    else:
+        with open(data_dir / "customers.csv", encoding="utf-8") as fh:
+            customers = sum(1 for _ in fh) - 1
+        dataset = {
+            "customers": customers,
+            "orders": scale,
+            "customers_bytes": (data_dir / "customers.csv").stat().st_size,
+            "orders_bytes": (data_dir / "orders.csv").stat().st_size,
+        }
+
+    reset_database()
+    conn = get_conn()
+    try:
+        execute_script(conn, SCHEMA_FILE.read_text(encoding="utf-8"))
+        run_id = str(uuid.uuid4())
+        stages = {}
+        logger.info(json.dumps({"event": "bench_pipeline_start", "scale": scale}))
+
+        _, stages["ingest_customers"] = _measure(
+            ingest_customers, str(data_dir / "customers.csv"), conn)
+        _, stages["ingest_orders"] = _measure(
+            ingest_orders, str(data_dir / "orders.csv"), conn)
+        _, stages["build_dimensions"] = _measure(
+            build_dimensions, conn, sql_dir, rows=dataset["customers"])
+        _, stages["build_facts"] = _measure(
+            build_facts, conn, run_id, sql_dir, rows=dataset["orders"])
+        passed, stages["run_validations"] = _measure(
+            run_validations, conn, run_id, rows=dataset["orders"])
+    finally:
+        conn.close()
+
+    for name, bytes_key in (("ingest_customers", "customers_bytes"), ("ingest_orders", "orders_bytes")):
+        seconds = stages[name]["seconds"]
+        stages[name]["mb_per_sec"] = round(dataset[bytes_key] / 1e6 / seconds, 2) if seconds else None
+
+    total = round(sum(s["seconds"] for s in stages.values()), 4)
+    result = {
+        "scale": scale,
+        "dataset": dataset,
+        "stages": stages,
+        "total_seconds": total,
+        "dq_passed": passed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    logger.info(json.dumps({"event": "bench_pipeline_done", "scale": scale, "total_seconds": total}))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Migration runner benchmark
+# ---------------------------------------------------------------------------
+
+class _ChangesetLatency(logging.Handler):
+    """Turn the runner's applying/applied log events into per-changeset latencies."""
+
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.samples: list[float] = []
+        self._started: float | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            event = json.loads(record.getMessage()).get("event")
+        except (TypeError, ValueError, AttributeError):
+            return
+        now = time.perf_counter()
+        if event == "applying_changeset":
+            self._started = now
+        elif event in ("changeset_applied", "changeset_marked_ran") and self._started is not None:
+            self.samples.append(now - self._started)
+            self._started = None
+
+
+def bench_migrate(changesets: int) -> dict:
+    """Time ``update_cmd`` over a synthetic changelog of *changesets* entries."""
+    reset_database()
+    migrate_logger = logging.getLogger("migrate")
+    handler = _ChangesetLatency()
+    migrate_logger.addHandler(handler)
+    previous_level = migrate_logger.level
+    migrate_logger.setLevel(logging.INFO)
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_changelog_") as tmp:
+            changelog = generate_changelog(Path(tmp), changesets)
+            logger.info(json.dumps({"event": "bench_migrate_start", "changesets": changesets}))
+            applied, metrics = _measure(
+                update_cmd, str(changelog), tmp, None, False, False)
+    finally:
+        migrate_logger.removeHandler(handler)
+        migrate_logger.setLevel(previous_level)
+
+    result = {
+        "changesets": changesets,
+        "applied": applied,
+        "seconds": metrics["seconds"],
+        "cpu_seconds": metrics["cpu_seconds"],
+        "changesets_per_sec": metrics["rows_per_sec"],
+        "latency": _latency_summary(handler.samples),
+        "peak_rss_mb": metrics["peak_rss_mb"],
+    }
+    logger.info(json.dumps({"event": "bench_migrate_done", "changesets": changesets,
+                            "seconds": metrics["seconds"]}))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+
+def _throughputs(results: dict) -> dict:
+    """Flatten a results document to ``{metric_name: rows_or_changesets_per_sec}``."""
+    flat = {}
+    for run in results.get("pipeline", []):
+        for stage, m in run["stages"].items():
+            if m.get("rows_per_sec"):
+                flat[f"pipeline[{run['scale']}].{stage}"] = m["rows_per_sec"]
+    for run in results.get("migrate", []):
+        if run.get("changesets_per_sec"):
+            flat[f"migrate[{run['changesets']}]"] = run["changesets_per_sec"]
+    return flat
+
+
+def compare_results(baseline: dict, current: dict, threshold_pct: float = 10.0) -> list[dict]:
+    """
+    Compare throughput between two result documents.
+
+    Returns one row per metric present in both; ``regression`` is True when
+    throughput dropped by more than *threshold_pct* percent.
+    """
+    base, cur = _throughputs(baseline), _throughputs(current)
+    rows = []
+    for name in sorted(base.keys() & cur.keys()):
+        change = (cur[name] - base[name]) / base[name] * 100
+        rows.append({
+            "metric": name,
+            "baseline": base[name],
+            "current": cur[name],
+            "change_pct": round(change, 1),
+            "regression": change < -threshold_pct,
+        })
+    return rows
@@ -0,0 +1,113 @@
+-- =============================================================================
+-- Benchmark schema — the pipeline's staging, curated and ops tables.
+--
+-- Mirrors the tables the pipeline expects (originally created by the
+-- 001_initial_schema migration) so the harness can build a throw-away
+-- database from scratch.  The migration runner bootstraps its own tables
+-- (DATABASECHANGELOG, ops_migration_runs, ...) on first use.
+--
+-- Partitioned tables follow migration 14 with the months the generated
+-- data covers.
+-- =============================================================================
+
+CREATE TABLE stg_customers (
+    customer_id BIGINT       NOT NULL PRIMARY KEY,
+    full_name   VARCHAR(255) NOT NULL,
+    email       VARCHAR(255) NOT NULL,
+    country     CHAR(2)      NOT NULL,
+    created_at  DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at  DATETIME     NOT NULL,
+    KEY idx_stg_customers_updated (updated_at)
+) ENGINE=InnoDB;
+
+CREATE TABLE stg_orders (
+    order_id    BIGINT        NOT NULL,
+    customer_id BIGINT        NOT NULL,
+    order_date  DATE          NOT NULL,
+    amount      DECIMAL(12,2) NOT NULL,
+    currency    CHAR(3)       NOT NULL DEFAULT 'USD',
+    status      VARCHAR(20)   NOT NULL DEFAULT 'pending',
+    created_at  DATETIME      NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at  DATETIME      NOT NULL,
+    PRIMARY KEY (order_id, order_date),
+    KEY idx_stg_orders_customer (customer_id),
+    KEY idx_stg_orders_date (order_date),
+    KEY idx_stg_orders_updated (updated_at)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (order_date) (
+    PARTITION p_start  VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601  VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602  VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603  VALUES LESS THAN ('2026-04-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE dim_customer (
+    customer_sk    BIGINT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    customer_id    BIGINT       NOT NULL,
+    full_name      VARCHAR(255) NOT NULL,
+    email_masked   CHAR(64)     NOT NULL,
+    country        CHAR(2)      NOT NULL,
+    effective_from DATETIME     NOT NULL,
+    effective_to   DATETIME     NULL,
+    is_current     TINYINT(1)   NOT NULL DEFAULT 1,
+    KEY idx_dim_cust_bk (customer_id),
+    KEY idx_dim_cust_current (is_current, customer_id)
+) ENGINE=InnoDB;
+
+CREATE TABLE fact_order (
+    order_id    BIGINT        NOT NULL,
+    customer_sk BIGINT        NOT NULL,
+    order_date  DATE          NOT NULL,
+    amount      DECIMAL(12,2) NOT NULL,
+    currency    CHAR(3)       NOT NULL,
+    status      VARCHAR(20)   NOT NULL,
+    load_run_id CHAR(36)      NOT NULL,
+    PRIMARY KEY (order_id, order_date),
+    KEY idx_fact_order_date (order_date),
+    KEY idx_fact_order_cust (customer_sk),
+    KEY idx_fact_order_run (load_run_id)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (order_date) (
+    PARTITION p_start  VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601  VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602  VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603  VALUES LESS THAN ('2026-04-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE ops_checkpoints (
+    dataset_name   VARCHAR(128) NOT NULL PRIMARY KEY,
+    last_watermark VARCHAR(64)  NOT NULL,
+    updated_at     TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+CREATE TABLE ops_pipeline_runs (
+    run_id      CHAR(36)    NOT NULL PRIMARY KEY,
+    env_name    VARCHAR(32) NOT NULL,
+    started_at  TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP   NULL,
+    status      ENUM('running','succeeded','failed') NOT NULL,
+    git_sha     CHAR(40)     NULL,
+    actor       VARCHAR(128) NULL,
+    details     JSON         NULL
+) ENGINE=InnoDB;
+
+CREATE TABLE ops_dq_results (
+    run_id       CHAR(36)      NOT NULL,
+    check_name   VARCHAR(128)  NOT NULL,
+    run_date     DATE          NOT NULL DEFAULT (CURRENT_DATE),
+    status       ENUM('pass','fail') NOT NULL,
+    metric_value DECIMAL(20,4) NULL,
+    threshold    DECIMAL(20,4) NULL,
+    details      JSON          NULL,
+    created_at   TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, check_name, run_date)
+) ENGINE=InnoDB
+PARTITION BY RANGE COLUMNS (run_date) (
+    PARTITION p_start  VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601  VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602  VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603  VALUES LESS THAN ('2026-04-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
@@ -0,0 +1,86 @@
+-- =============================================================================
+-- Migration 14: Range-partition fact_order, stg_orders and ops_dq_results
+--
+-- fact_order / stg_orders are partitioned by month of order_date and
+-- ops_dq_results by month of run_date, so transform and DQ queries that
+-- filter on the dates a run touched are pruned to those partitions, and
+-- retention is DROP PARTITION instead of large DELETEs.
+--
+-- MySQL requires the partitioning column in every unique key, so the
+-- primary keys gain order_date / run_date.  Partition names are pYYYYMM
+-- (holding that month); p_start holds older rows and p_future is the
+-- MAXVALUE catch-all that `python -m src.pipeline partitions` splits
+-- ahead of time and that expired months are dropped or archived from.
+-- =============================================================================
+-- id: 14
+-- author: data-team
+-- risk: high
+-- allowDestructive: false
+-- labels: performance,partitioning
+-- contexts: dev,prod
+
+ALTER TABLE fact_order
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (order_id, order_date)
+PARTITION BY RANGE COLUMNS (order_date) (
+    PARTITION p_start  VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601  VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602  VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603  VALUES LESS THAN ('2026-04-01'),
+    PARTITION p202604  VALUES LESS THAN ('2026-05-01'),
+    PARTITION p202605  VALUES LESS THAN ('2026-06-01'),
+    PARTITION p202606  VALUES LESS THAN ('2026-07-01'),
+    PARTITION p202607  VALUES LESS THAN ('2026-08-01'),
+    PARTITION p202608  VALUES LESS THAN ('2026-09-01'),
+    PARTITION p202609  VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610  VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611  VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612  VALUES LESS THAN ('2027-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+ALTER TABLE stg_orders
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (order_id, order_date)
+PARTITION BY RANGE COLUMNS (order_date) (
+    PARTITION p_start  VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601  VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602  VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603  VALUES LESS THAN ('2026-04-01'),
+    PARTITION p202604  VALUES LESS THAN ('2026-05-01'),
+    PARTITION p202605  VALUES LESS THAN ('2026-06-01'),
+    PARTITION p202606  VALUES LESS THAN ('2026-07-01'),
+    PARTITION p202607  VALUES LESS THAN ('2026-08-01'),
+    PARTITION p202608  VALUES LESS THAN ('2026-09-01'),
+    PARTITION p202609  VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610  VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611  VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612  VALUES LESS THAN ('2027-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- run_date is the date the pipeline run started (set by validate.py)
+ALTER TABLE ops_dq_results
+    ADD COLUMN run_date DATE NOT NULL DEFAULT (CURRENT_DATE) AFTER check_name;
+
+UPDATE ops_dq_results SET run_date = DATE(created_at);
+
+ALTER TABLE ops_dq_results
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (run_id, check_name, run_date)
+PARTITION BY RANGE COLUMNS (run_date) (
+    PARTITION p_start  VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601  VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602  VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603  VALUES LESS THAN ('2026-04-01'),
+    PARTITION p202604  VALUES LESS THAN ('2026-05-01'),
+    PARTITION p202605  VALUES LESS THAN ('2026-06-01'),
+    PARTITION p202606  VALUES LESS THAN ('2026-07-01'),
+    PARTITION p202607  VALUES LESS THAN ('2026-08-01'),
+    PARTITION p202608  VALUES LESS THAN ('2026-09-01'),
+    PARTITION p202609  VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610  VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611  VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612  VALUES LESS THAN ('2027-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
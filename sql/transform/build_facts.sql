@@ -7,9 +7,29 @@
 -- Uses INSERT ... ON DUPLICATE KEY UPDATE so the load is idempotent:
 -- re-running with the same data updates existing rows rather than failing.
 --
+-- fact_order is partitioned by order_date: only orders in the range the run
+-- ingested (@touched_from .. @touched_to, NULL = unbounded) are rebuilt, so
+-- MySQL prunes both tables to the touched partitions.  The range includes
+-- the staged orders of every customer the run upserted, so an order whose
+-- customer arrives in a later run is built by that run.  Orders whose
+-- order_date changed are removed from their old partition first.
+--
+-- Facts are rebuilt from stg_orders only: once an order has aged out of
+-- staging (shorter retention than fact_order), its fact keeps the
+-- customer_sk it was built with when the customer changes.  This is
+-- intended; history past staging retention is not re-resolved.
+--
 -- Requires: MySQL session variable @run_id to be set before execution.
 -- =============================================================================
 
+DELETE f
+FROM fact_order f
+INNER JOIN stg_orders o
+    ON  o.order_id = f.order_id
+    AND o.order_date <> f.order_date
+WHERE o.order_date BETWEEN COALESCE(@touched_from, '1000-01-01')
+                       AND COALESCE(@touched_to, '9999-12-31');
+
 INSERT INTO fact_order
     (order_id, customer_sk, order_date, amount, currency, status, load_run_id)
 SELECT
@@ -24,6 +44,8 @@ FROM stg_orders o
 INNER JOIN dim_customer d
     ON  d.customer_id = o.customer_id
     AND d.is_current  = 1
+WHERE o.order_date BETWEEN COALESCE(@touched_from, '1000-01-01')
+                       AND COALESCE(@touched_to, '9999-12-31')
 ON DUPLICATE KEY UPDATE
     customer_sk  = VALUES(customer_sk),
     order_date   = VALUES(order_date),
@@ -1,20 +1,30 @@
 -- =============================================================================
 -- Data Quality Checks  (reference SQL — executed programmatically by
 -- src/pipeline/validate.py, which records results in ops_dq_results)
+--
+-- The pipeline binds :from / :to to the order_date range the run ingested,
+-- so checks on the partitioned stg_orders / fact_order read only the
+-- partitions the run touched.
 -- =============================================================================
 
 -- DQ-1: Orphan orders (customer FK not found in staging)
 SELECT COUNT(*) AS orphan_count
 FROM stg_orders o
 LEFT JOIN stg_customers c ON c.customer_id = o.customer_id
-WHERE c.customer_id IS NULL;
+WHERE c.customer_id IS NULL
+  AND o.order_date BETWEEN :from AND :to;
 
--- DQ-2: Duplicate order IDs in staging
+-- DQ-2: Duplicate order IDs in staging (order_date is part of the key, so
+-- duplicates of a touched id are counted across all partitions)
 SELECT COUNT(*) AS dup_count
 FROM (
-    SELECT order_id
-    FROM stg_orders
-    GROUP BY order_id
+    SELECT s.order_id
+    FROM stg_orders s
+    INNER JOIN (
+        SELECT DISTINCT order_id FROM stg_orders
+        WHERE order_date BETWEEN :from AND :to
+    ) t ON t.order_id = s.order_id
+    GROUP BY s.order_id
     HAVING COUNT(*) > 1
 ) x;
 
@@ -22,8 +32,10 @@ FROM (
 SELECT
     (SELECT COUNT(*)
      FROM stg_orders o
-     INNER JOIN stg_customers c ON c.customer_id = o.customer_id) AS stg_joinable,
-    (SELECT COUNT(*) FROM fact_order)                               AS fact_count;
+     INNER JOIN stg_customers c ON c.customer_id = o.customer_id
+     WHERE o.order_date BETWEEN :from AND :to)                      AS stg_joinable,
+    (SELECT COUNT(*) FROM fact_order
+     WHERE order_date BETWEEN :from AND :to)                        AS fact_count;
 
 -- DQ-4: Null / empty required fields in stg_customers
 SELECT COUNT(*) AS null_count
@@ -35,4 +47,5 @@ WHERE full_name IS NULL OR full_name = ''
 -- DQ-5: Negative or zero order amounts
 SELECT COUNT(*) AS bad_amount_count
 FROM stg_orders
-WHERE amount <= 0;
+WHERE amount <= 0
+  AND order_date BETWEEN :from AND :to;
@@ -4,65 +4,176 @@ Shared database utilities used by both the migration runner and the data pipelin
 
 import os
 import logging
+import time
+import contextvars
+from contextlib import contextmanager
 
 import mysql.connector
 
+from .metrics import record_statement
+
 logger = logging.getLogger("db")
 
+# Callbacks invoked as ``callback(conn, sql, params)`` before each statement.
+_observers: contextvars.ContextVar[tuple] = contextvars.ContextVar("statement_observers", default=())
+
+
+@contextmanager
+def observe_statements(callback):
+    """Call *callback(conn, sql, params)* before every statement issued here."""
+    token = _observers.set(_observers.get() + (callback,))
+    try:
+        yield
+    finally:
+        _observers.reset(token)
+
+
+def _notify(conn, sql, params) -> None:
+    for callback in _observers.get():
+        callback(conn, sql, params)
+
+
+# Connection settings that override the DB_* environment (see use_database)
+_overrides: contextvars.ContextVar[dict] = contextvars.ContextVar("connection_overrides", default={})
+
+
+@contextmanager
+def use_database(**settings):
+    """
+    Point get_conn() at another server or schema within the block, e.g. a
+    scratch copy: ``with use_database(host=..., database=...):``.
+    """
+    token = _overrides.set({**_overrides.get(), **settings})
+    try:
+        yield
+    finally:
+        _overrides.reset(token)
+
+
+# Sets that collect the id of every connection opened (see track_connections)
+_trackers: contextvars.ContextVar[tuple] = contextvars.ContextVar("connection_trackers", default=())
+
+
+@contextmanager
+def track_connections(ids: set):
+    """
+    Add the server thread id of every connection get_conn() opens within
+    the block — including in threads started with a copy of this context —
+    to *ids*, so they can all be killed (e.g. on a timeout).
+    """
+    token = _trackers.set(_trackers.get() + (ids,))
+    try:
+        yield ids
+    finally:
+        _trackers.reset(token)
+
 
 def get_conn():
     """Return a MySQL connection configured from environment variables."""
-    return mysql.connector.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.getenv("DB_PORT", "3306")),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
+    o = _overrides.get()
+    conn = mysql.connector.connect(
+        host=o.get("host") or os.environ["DB_HOST"],
+        port=int(o.get("port") or os.getenv("DB_PORT", "3306")),
+        user=o.get("user") or os.environ["DB_USER"],
+        password=o["password"] if "password" in o else os.environ["DB_PASSWORD"],
+        database=o.get("database") or os.environ["DB_NAME"],
         autocommit=False,  # Use transactions for better control
         consume_results=True,  # Automatically consume unread results
     )
+    for ids in _trackers.get():
+        ids.add(conn.connection_id)
+    return conn
 
 
 def fetch_one(conn, sql, params=None):
     """Execute a query and return a single row (or None)."""
+    _notify(conn, sql, params)
     cur = conn.cursor()
+    start = time.perf_counter()
     cur.execute(sql, params or ())
     row = cur.fetchone()
+    record_statement(sql, time.perf_counter() - start)
     cur.close()
     return row
 
 
 def fetch_all(conn, sql, params=None):
     """Execute a query and return all rows."""
+    _notify(conn, sql, params)
     cur = conn.cursor()
+    start = time.perf_counter()
     cur.execute(sql, params or ())
     rows = cur.fetchall()
+    record_statement(sql, time.perf_counter() - start, len(rows))
     cur.close()
     return rows
 
 
 def execute(conn, sql, params=None):
-    """Execute a single statement (INSERT/UPDATE/DDL)."""
+    """Execute a single statement (INSERT/UPDATE/DDL); returns the affected row count."""
+    _notify(conn, sql, params)
     cur = conn.cursor()
+    start = time.perf_counter()
     try:
         cur.execute(sql, params or ())
         conn.commit()  # Commit each statement
+        record_statement(sql, time.perf_counter() - start, cur.rowcount)
+        return cur.rowcount
     finally:
         cur.close()
 
 
-def execute_script(conn, script_text: str):
-    """Execute a multi-statement SQL script by splitting on semicolons."""
+def ensure_index(conn, table: str, index: str, columns: str) -> None:
+    """Add *index* on *table* if it is missing (tables created before it existed)."""
+    row = fetch_one(conn, """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    if row[0] == 0:
+        execute(conn, f"ALTER TABLE {table} ADD INDEX {index} ({columns})")
+
+
+def ensure_column(conn, table: str, column: str, definition: str) -> None:
+    """Add *column* to *table* if it is missing (tables created before it existed)."""
+    row = fetch_one(conn, """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    if row[0] == 0:
+        execute(conn, f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def execute_many(conn, sql, rows):
+    """Execute *sql* once per parameter tuple in *rows* and commit once."""
+    if not rows:
+        return
+    _notify(conn, sql, rows[0])
+    cur = conn.cursor()
+    start = time.perf_counter()
+    try:
+        cur.executemany(sql, rows)
+        conn.commit()
+        record_statement(sql, time.perf_counter() - start, cur.rowcount)
+    finally:
+        cur.close()
+
+
+def split_statements(script_text: str) -> list[str]:
+    """Split a multi-statement SQL script on semicolons, dropping ``--`` comment lines."""
     # Clean up the script - remove comments and split on semicolons
     lines = []
     for line in script_text.split('\n'):
         line = line.strip()
         if line and not line.startswith('--'):
             lines.append(line)
-    
+
     clean_script = ' '.join(lines)
-    statements = [stmt.strip() for stmt in clean_script.split(';') if stmt.strip()]
-    
-    for stmt in statements:
-        if stmt.strip():
-            execute(conn, stmt)
+    return [stmt.strip() for stmt in clean_script.split(';') if stmt.strip()]
+
+
+def execute_script(conn, script_text: str):
+    """Execute a multi-statement SQL script by splitting on semicolons."""
+    for stmt in split_statements(script_text):
+        execute(conn, stmt)
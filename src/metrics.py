@@ -0,0 +1,255 @@
+"""
+Lightweight run instrumentation shared by the pipeline and the db helpers.
+
+A :class:`RunProfiler` collects a tree of timed stages.  While a profiler is
+active (``with profiler.activate():``) every statement issued through
+``src.db`` is attributed to the innermost open stage, so each stage reports
+wall time, CPU time, peak RSS, DB round-trips and per-statement timings
+without the stage code having to count anything itself.
+
+The collected data is exported as a JSON-serialisable document
+(:meth:`RunProfiler.to_dict`) and as OpenMetrics / Prometheus text
+(:meth:`RunProfiler.to_openmetrics`).
+"""
+
+import contextvars
+import re
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_active: contextvars.ContextVar["RunProfiler | None"] = contextvars.ContextVar(
+    "active_profiler", default=None,
+)
+
+# Statements are grouped by their leading text so per-row upserts collapse
+# into a single entry instead of one entry per row.
+_STATEMENT_KEY_LEN = 120
+_WS_RE = re.compile(r"\s+")
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _statement_key(sql: str) -> str:
+    return _WS_RE.sub(" ", sql).strip()[:_STATEMENT_KEY_LEN]
+
+
+class Stage:
+    """One timed step; children are sub-steps opened while it was running."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.db_round_trips = 0
+        self.db_seconds = 0.0
+        self.counters: dict[str, int] = {}
+        self.statements: dict[str, dict] = {}
+        self.children: list["Stage"] = []
+        self.status = "running"
+
+    def to_dict(self) -> dict:
+        rows = self.counters.get("rows")
+        doc = {
+            "name": self.name,
+            "status": self.status,
+            "seconds": round(self.seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "peak_rss_mb": self.peak_rss_mb,
+            "db_round_trips": self.db_round_trips,
+            "db_seconds": round(self.db_seconds, 4),
+            **self.counters,
+        }
+        if rows and self.seconds > 0:
+            doc["rows_per_sec"] = round(rows / self.seconds, 1)
+        if self.statements:
+            doc["statements"] = [
+                {"sql": key, **{k: round(v, 4) if isinstance(v, float) else v
+                                for k, v in stats.items()}}
+                for key, stats in sorted(self.statements.items(),
+                                         key=lambda kv: kv[1]["seconds"], reverse=True)
+            ]
+        if self.children:
+            doc["steps"] = [child.to_dict() for child in self.children]
+        return doc
+
+
+class RunProfiler:
+    """Collects nested stage timings for one pipeline run."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.stages: list[Stage] = []
+        # The open-stage stack is context-local: worker threads started with
+        # contextvars.copy_context() nest under the stage that spawned them,
+        # and concurrently running stages do not see each other.
+        self._stack_var: contextvars.ContextVar[tuple] = contextvars.ContextVar(
+            f"profiler_stack_{id(self)}", default=(),
+        )
+        self._lock = threading.Lock()
+        self.wall_seconds: float | None = None
+
+    @property
+    def _stack(self) -> tuple:
+        return self._stack_var.get()
+
+    @contextmanager
+    def activate(self):
+        """Route ``src.db`` statement timings to this profiler."""
+        token = _active.set(self)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            # stages may overlap, so the run total is wall time, not their sum
+            self.wall_seconds = (self.wall_seconds or 0.0) + time.perf_counter() - start
+            _active.reset(token)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as a stage nested under the current one."""
+        st = Stage(name)
+        stack = self._stack
+        parent = stack[-1] if stack else None
+        with self._lock:
+            (parent.children if parent else self.stages).append(st)
+        token = self._stack_var.set(stack + (st,))
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield st
+            st.status = "succeeded"
+        except BaseException:
+            st.status = "failed"
+            raise
+        finally:
+            st.seconds = time.perf_counter() - wall0
+            st.cpu_seconds = time.process_time() - cpu0
+            st.peak_rss_mb = _peak_rss_mb()
+            self._stack_var.reset(token)
+            if parent is not None:
+                with self._lock:
+                    parent.db_round_trips += st.db_round_trips
+                    parent.db_seconds += st.db_seconds
+                    for key, value in st.counters.items():
+                        parent.counters[key] = parent.counters.get(key, 0) + value
+
+    def _record_statement(self, sql: str, seconds: float, rowcount: int | None) -> None:
+        stack = self._stack
+        if not stack:
+            return
+        with self._lock:
+            self._record_locked(stack[-1], sql, seconds, rowcount)
+
+    @staticmethod
+    def _record_locked(st: Stage, sql: str, seconds: float, rowcount: int | None) -> None:
+        st.db_round_trips += 1
+        st.db_seconds += seconds
+        stats = st.statements.setdefault(
+            _statement_key(sql), {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0},
+        )
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        if rowcount and rowcount > 0:
+            stats["rows"] += rowcount
+
+    def _add(self, counters: dict) -> None:
+        stack = self._stack
+        if stack:
+            st = stack[-1]
+            with self._lock:
+                for key, value in counters.items():
+                    st.counters[key] = st.counters.get(key, 0) + value
+
+    # -- export ---------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "total_seconds": round(
+                self.wall_seconds if self.wall_seconds is not None
+                else sum(st.seconds for st in self.stages), 4),
+            "peak_rss_mb": _peak_rss_mb(),
+            "steps": [st.to_dict() for st in self.stages],
+        }
+
+    def _flatten(self) -> list[tuple[str, Stage]]:
+        out = []
+
+        def walk(stages, prefix):
+            for st in stages:
+                path = f"{prefix}.{st.name}" if prefix else st.name
+                out.append((path, st))
+                walk(st.children, path)
+
+        walk(self.stages, "")
+        return out
+
+    def to_openmetrics(self, prefix: str = "pipeline") -> str:
+        """Render the stage tree as OpenMetrics text (one series per stage)."""
+        families = (
+            ("stage_duration_seconds", "gauge", "Wall-clock time per stage", lambda s: s.seconds),
+            ("stage_cpu_seconds", "gauge", "Process CPU time per stage", lambda s: s.cpu_seconds),
+            ("stage_peak_rss_bytes", "gauge", "Peak RSS observed at stage end",
+             lambda s: int(s.peak_rss_mb * 1024 * 1024)),
+            ("stage_db_round_trips", "gauge", "DB statements issued per stage",
+             lambda s: s.db_round_trips),
+            ("stage_db_seconds", "gauge", "Time spent in DB calls per stage", lambda s: s.db_seconds),
+            ("stage_rows", "gauge", "Rows processed per stage", lambda s: s.counters.get("rows")),
+            ("stage_bytes_read", "gauge", "Input bytes read per stage",
+             lambda s: s.counters.get("bytes_read")),
+        )
+        flat = self._flatten()
+        # Remaining counters (rows_skipped, rows_purged, ...) get a family each
+        extra = sorted({key for _, st in flat for key in st.counters} - {"rows", "bytes_read"})
+        families += tuple(
+            (f"stage_{key}", "gauge", f"Counter '{key}' per stage",
+             lambda s, key=key: s.counters.get(key))
+            for key in extra
+        )
+        lines = []
+        for name, mtype, help_text, getter in families:
+            metric = f"{prefix}_{name}"
+            samples = [(path, getter(st)) for path, st in flat]
+            samples = [(path, v) for path, v in samples if v is not None]
+            if not samples:
+                continue
+            lines.append(f"# TYPE {metric} {mtype}")
+            lines.append(f"# HELP {metric} {help_text}.")
+            for path, value in samples:
+                if isinstance(value, float):
+                    value = round(value, 6)
+                lines.append(f'{metric}{{run_id="{self.run_id}",stage="{path}"}} {value}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str, prefix: str = "pipeline") -> None:
+        """Write :meth:`to_openmetrics` output to *path* (atomically replaced)."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(self.to_openmetrics(prefix), encoding="utf-8")
+        tmp.replace(target)
+
+
+def record_statement(sql: str, seconds: float, rowcount: int | None = None) -> None:
+    """Attribute one DB round-trip to the active profiler's current stage."""
+    profiler = _active.get()
+    if profiler is not None:
+        profiler._record_statement(sql, seconds, rowcount)
+
+
+def add_counters(**counters: int) -> None:
+    """Add to counters (``rows``, ``bytes_read``, ...) on the current stage."""
+    profiler = _active.get()
+    if profiler is not None:
+        profiler._add(counters)
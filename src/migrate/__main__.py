@@ -4,19 +4,30 @@ CLI entry-point for the migration runner.
 Usage:
     python -m src.migrate validate
     python -m src.migrate status  [--context dev]
-    python -m src.migrate update  [--context dev]
-    python -m src.migrate update_sql [--context dev]
+    python -m src.migrate update  [--context dev] [--coalesce-alters]
+    python -m src.migrate update_sql [--context dev] [--plan [--json]]
     python -m src.migrate verify
+    python -m src.migrate rollback TARGET [--backup-file FILE]
+    python -m src.migrate drift [--accept] [--json]
+    python -m src.migrate diff  [--schema-dir schema] [--write --description NAME --author NAME]
+    python -m src.migrate rehearse [--context dev] [--sample-rows 1000] [--keep] [--json]
+    python -m src.migrate profile [--limit 20] [--run-id RUN] [--changeset ID]
 """
 
 import argparse
+import json
 import logging
 import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from .runner import validate_cmd, status_cmd, update_cmd, verify_cmd, rollback_cmd
+from .runner import (
+    validate_cmd, status_cmd, update_cmd, verify_cmd, rollback_cmd, profile_cmd, plan_cmd,
+    drift_cmd,
+)
+from .declarative import diff_schema
+from .rehearsal import rehearse
 
 
 def _setup_logging() -> None:
@@ -57,20 +68,68 @@ def main() -> None:
     p_up.add_argument("--changelog", default="changelog/changelog.yml")
     p_up.add_argument("--context", default=None)
     p_up.add_argument("--no-backup", action="store_true", help="Skip automatic backup creation")
+    p_up.add_argument("--coalesce-alters", action="store_true",
+                      help="Merge consecutive changesets that only alter the same table "
+                           "into one ALTER TABLE for this run")
 
     # update_sql --------------------------------------------------------------
     p_us = sub.add_parser("update_sql", help="Dry-run: print SQL that would run")
     p_us.add_argument("--changelog", default="changelog/changelog.yml")
     p_us.add_argument("--context", default=None)
+    p_us.add_argument("--plan", action="store_true",
+                      help="Execute nothing; report algorithm, lock, table size and "
+                           "predicted duration per statement")
+    p_us.add_argument("--json", action="store_true", help="Print the plan as JSON")
 
     # verify ------------------------------------------------------------------
     p_ve = sub.add_parser("verify", help="Verify applied checksums match on-disk SQL")
     p_ve.add_argument("--changelog", default="changelog/changelog.yml")
 
+    # drift -------------------------------------------------------------------
+    p_dr = sub.add_parser("drift", help="Compare the live schema with the recorded fingerprint")
+    p_dr.add_argument("--accept", action="store_true",
+                      help="Record the live schema as the new baseline")
+    p_dr.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    # diff --------------------------------------------------------------------
+    p_df = sub.add_parser("diff", help="Generate the statements that take the live schema to "
+                                       "the declared one")
+    p_df.add_argument("--changelog", default="changelog/changelog.yml")
+    p_df.add_argument("--schema-dir", default="schema",
+                      help="Directory of *.sql files declaring the target schema")
+    p_df.add_argument("--write", action="store_true",
+                      help="Save the statements as the next migration file")
+    p_df.add_argument("--description", default="declarative_schema_sync")
+    p_df.add_argument("--author", default="declarative")
+    p_df.add_argument("--drop-undeclared", action="store_true",
+                      help="Also drop live tables the declared schema does not contain")
+    p_df.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    # rehearse ----------------------------------------------------------------
+    p_re = sub.add_parser("rehearse",
+                          help="Apply pending changesets to a sampled scratch copy and report "
+                               "scaled timings and schema differences")
+    p_re.add_argument("--changelog", default="changelog/changelog.yml")
+    p_re.add_argument("--context", default=None)
+    p_re.add_argument("--sample-rows", type=int, default=1000,
+                      help="Rows copied per table (0 = schema only)")
+    p_re.add_argument("--keep", action="store_true", help="Keep the scratch databases")
+    p_re.add_argument("--json", action="store_true", help="Print the report as JSON")
+
     # rollback ----------------------------------------------------------------
     p_rb = sub.add_parser("rollback", help="Rollback to a specific migration version")
     p_rb.add_argument("target_version", help="Target migration ID to rollback to")
-    p_rb.add_argument("--backup-file", required=True, help="Backup file to restore from")
+    p_rb.add_argument("--changelog", default="changelog/changelog.yml")
+    p_rb.add_argument("--backup-file", default=None,
+                      help="Backup file to restore from when a changeset has no down-script "
+                           "or inverse")
+
+    # profile -----------------------------------------------------------------
+    p_pr = sub.add_parser("profile", help="Summarise the slowest migration statements")
+    p_pr.add_argument("--limit", type=int, default=20)
+    p_pr.add_argument("--run-id", default=None, help="Only statements from this run")
+    p_pr.add_argument("--changeset", default=None, help="Only statements from this changeset ID")
+    p_pr.add_argument("--json", action="store_true", help="Print the summary as JSON")
 
     args = parser.parse_args()
 
@@ -84,9 +143,33 @@ def main() -> None:
             print(f"{len(pending)} changeset(s) pending.")
 
         elif args.command == "update":
-            count = update_cmd(args.changelog, context=args.context, auto_backup=not args.no_backup)
+            count = update_cmd(args.changelog, context=args.context, auto_backup=not args.no_backup,
+                               coalesce_alters=args.coalesce_alters)
             print(f"Applied {count} changeset(s) successfully.")
 
+        elif args.command == "update_sql" and args.plan:
+            plans = plan_cmd(args.changelog, context=args.context)
+            if args.json:
+                print(json.dumps(plans, indent=2))
+            else:
+                for p in plans:
+                    est = f"{p['est_ms'] / 1000:.1f}s"
+                    if p["unknown_estimates"]:
+                        est += f" + {p['unknown_estimates']} unknown"
+                    print(f"-- Changeset {p['id']} by {p['author']} [{p['outcome']}] "
+                          f"risk={p['risk']} est={est} locks={','.join(p['locks']) or 'none'}")
+                    for s in p["statements"]:
+                        rows = "-" if s["table_rows"] is None else f"{s['table_rows']:,}"
+                        ms = "?" if s["est_ms"] is None else f"{s['est_ms']:.0f}ms"
+                        print(f"   {s['index']:>3}  {s['algorithm']:<8} {s['lock']:<9} "
+                              f"{s['table'] or '-':<24} {rows:>13} rows  {ms:>10} "
+                              f"({s['estimate_source']})  {s['operation']}")
+                total = sum(p["est_ms"] for p in plans)
+                unknown = sum(p["unknown_estimates"] for p in plans)
+                print(f"{len(plans)} changeset(s) pending; predicted {total / 1000:.1f}s"
+                      + (f" plus {unknown} statement(s) without history" if unknown else "")
+                      + ".")
+
         elif args.command == "update_sql":
             update_cmd(args.changelog, context=args.context, dry_run=True)
 
@@ -94,10 +177,86 @@ def main() -> None:
             verify_cmd(args.changelog)
             print("All checksums verified.")
 
+        elif args.command == "drift":
+            result = drift_cmd(accept=args.accept)
+            if args.json:
+                print(json.dumps(result, indent=2, default=str))
+            else:
+                for d in result["differences"]:
+                    print(f"{d['change']:<8} {d['table']}.{d['kind']}: {d['name']}")
+                    if d["change"] == "changed":
+                        print(f"    expected {json.dumps(d['expected'], default=str)}")
+                        print(f"    actual   {json.dumps(d['actual'], default=str)}")
+                print(f"Schema {result['status']} (live {result['fingerprint'][:12]}, baseline "
+                      f"{(result['baseline'] or '-')[:12]} after "
+                      f"{result['baseline_changeset'] or result['baseline_source'] or '-'}).")
+                if result.get("accepted"):
+                    print("Accepted live schema as the new baseline.")
+            if result["status"] == "drift" and not result.get("accepted"):
+                sys.exit(2)
+
+        elif args.command == "diff":
+            result = diff_schema(args.schema_dir, args.changelog, write=args.write,
+                                 description=args.description, author=args.author,
+                                 drop_undeclared=args.drop_undeclared)
+            if args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                for stmt in result["statements"]:
+                    print(stmt)
+                    print()
+                for note in result["unsupported"]:
+                    print(f"-- needs a hand-written changeset: {note}")
+                if result["undeclared"] and not args.drop_undeclared:
+                    print(f"-- not declared (left alone): {', '.join(result['undeclared'])}")
+                print(f"{len(result['statements'])} statement(s)"
+                      + (f" written to {result['file']}." if result["file"] else "."))
+
+        elif args.command == "rehearse":
+            report = rehearse(args.changelog, context=args.context,
+                              sample_rows=args.sample_rows, keep=args.keep)
+            if args.json:
+                print(json.dumps(report, indent=2, default=str))
+            else:
+                for s in report["statements"]:
+                    sample = "-" if s["sample_rows"] is None else f"{s['sample_rows']:,}"
+                    prod = "-" if s["prod_rows"] is None else f"{s['prod_rows']:,}"
+                    scaled = "?" if s["scaled_ms"] is None else f"{s['scaled_ms']:.0f}ms"
+                    print(f"{s['changeset_id']:<9} {s['index']:>3}  {s['status']:<6} "
+                          f"{s['algorithm']:<8} {s['table'] or '-':<24} {sample:>9} / {prod:>13} "
+                          f"rows  {s['duration_ms']:>9.1f}ms -> {scaled:>10}")
+                for d in report["schema_diff"]:
+                    print(f"schema {d['change']}: {d['table']}")
+                    for line in d["diff"]:
+                        print(f"    {line}")
+                if report["expected_error"]:
+                    print(f"Expected schema not built: {report['expected_error']}")
+                print(f"{len(report['pending'])} changeset(s) rehearsed; "
+                      f"{report['sample_ms'] / 1000:.1f}s on the sample, "
+                      f"~{report['scaled_ms'] / 1000:.1f}s scaled"
+                      + (f" plus {report['unscaled']} unscaled statement(s)"
+                         if report["unscaled"] else "")
+                      + f"; {len(report['schema_diff'])} schema difference(s).")
+            if report["error"]:
+                raise RuntimeError(f"Rehearsal failed: {report['error']}")
+            if report["schema_diff"]:
+                sys.exit(2)
+
         elif args.command == "rollback":
-            rollback_cmd(args.target_version, args.backup_file)
+            rollback_cmd(args.target_version, args.backup_file, args.changelog)
             print(f"Rolled back to migration {args.target_version}.")
 
+        elif args.command == "profile":
+            rows = profile_cmd(args.limit, run_id=args.run_id, changeset_id=args.changeset)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+            else:
+                print(f"{'max ms':>12} {'avg ms':>12} {'execs':>6} {'runs':>5}  changeset  sql")
+                for r in rows:
+                    sql = " ".join(r["sql"].split())
+                    print(f"{r['max_ms']:>12.1f} {r['avg_ms']:>12.1f} {r['executions']:>6} "
+                          f"{r['runs']:>5}  {r['changeset_id']:<9}  {sql[:80]}")
+
     except Exception as exc:
         print(f"ERROR: {exc}", file=sys.stderr)
         sys.exit(1)
@@ -1,6 +1,9 @@
 """
 Parse and validate the Liquibase-like YAML changelog.
 Supports both manual YAML changelog and auto-generated from migration files.
+
+Every changeset may have a down-script that reverts it: ``downFile`` in the
+YAML, or by default the ``NNN_*.down.sql`` next to its ``NNN_*.up.sql``.
 """
 
 import hashlib
@@ -45,10 +48,11 @@ def auto_generate_changelog(migrations_dir: str = "migrations") -> list[dict]:
             "author": metadata.get("author", "unknown"),
             "sqlFile": str(sql_file.relative_to(".")),
             "risk": metadata.get("risk", "medium"),
-            "allowDestructive": metadata.get("allowDestructive", "false").lower() == "true",
+            "allowDestructive": metadata.get("allowdestructive", "false").lower() == "true",
             "labels": [l.strip() for l in metadata.get("labels", "").split(",") if l.strip()],
             "contexts": [c.strip() for c in metadata.get("contexts", "dev,prod").split(",") if c.strip()],
             "preconditions": [],  # Could be extended to parse preconditions from SQL comments
+            "downFile": default_down_file(str(sql_file.relative_to("."))),
         }
         changesets.append(changeset)
     
@@ -121,6 +125,7 @@ def load_changelog(changelog_path: str = "changelog/changelog.yml") -> list[dict
             "labels":           [l.strip() for l in str(raw_labels).split(",") if l.strip()],
             "contexts":         [c.strip() for c in str(raw_contexts).split(",") if c.strip()],
             "preconditions":    cs.get("preconditions", []),
+            "downFile":         cs.get("downFile") or default_down_file(cs["sqlFile"]),
         })
 
     return changesets
@@ -134,6 +139,24 @@ def resolve_sql(changeset: dict, base_dir: str = ".") -> str:
     return sql_path.read_text(encoding="utf-8")
 
 
+def default_down_file(sql_file: str) -> str | None:
+    """``NNN_name.down.sql`` for ``NNN_name.up.sql``; None for other file names."""
+    if not sql_file.endswith(".up.sql"):
+        return None
+    return sql_file[: -len(".up.sql")] + ".down.sql"
+
+
+def resolve_down_sql(changeset: dict, base_dir: str = ".") -> str | None:
+    """The changeset's down-script, or None when it has none."""
+    down_file = changeset.get("downFile")
+    if not down_file:
+        return None
+    down_path = Path(base_dir) / down_file
+    if not down_path.exists():
+        return None
+    return down_path.read_text(encoding="utf-8")
+
+
 def checksum(sql_text: str) -> str:
     """Return a SHA-256 hex digest for the given SQL text."""
     return hashlib.sha256(sql_text.encode("utf-8")).hexdigest()
@@ -0,0 +1,146 @@
+"""
+ALTER TABLE coalescing across pending changesets (``update --coalesce-alters``).
+
+MySQL rebuilds (or at least re-scans) a table for every ALTER TABLE, so
+three pending changesets that each add a column to the same big table cost
+three rebuilds.  With coalescing enabled for a run, consecutive pending
+changesets that only alter the same table are merged into one
+multi-clause ALTER TABLE and executed once; every changeset is still
+recorded in DATABASECHANGELOG on its own, with its own checksum.
+
+A changeset can join a group only if:
+
+  - every statement is a plain ``ALTER TABLE`` on the group's table, made of
+    column / index / key / constraint clauses (no table options, RENAME,
+    ORDER BY, partitioning, ALGORITHM= / LOCK=),
+  - it has no preconditions (they would have to see the earlier members'
+    effects),
+  - it does not depend on an earlier member: it neither reads nor changes a
+    column, index or constraint an earlier member adds, changes or drops,
+    and changes nothing an earlier member reads.  This is deliberately
+    conservative: ``ADD COLUMN x`` followed by ``ADD INDEX (x)`` in the next
+    changeset stays separate even though MySQL could take both at once.
+
+If the merged ALTER fails, nothing was changed (DDL is atomic), and the
+runner falls back to applying the group's changesets one by one.
+"""
+
+import re
+
+from ..db import split_statements
+from .online_ddl import split_clauses
+
+_ALTER_RE = re.compile(r"^\s*ALTER\s+TABLE\s+`?([\w$]+)`?(?:\s*\.\s*`?([\w$]+)`?)?\s+(.*)$",
+                       re.IGNORECASE | re.DOTALL)
+_PARTITION_RE = re.compile(r"\bPARTITION(?:S|ING)?\b", re.IGNORECASE)
+_NAME = r"`?([\w$]+)`?"
+_INDEX_KIND = r"(?:UNIQUE(?:\s+(?:INDEX|KEY))?|FULLTEXT(?:\s+(?:INDEX|KEY))?|" \
+              r"SPATIAL(?:\s+(?:INDEX|KEY))?|INDEX|KEY)"
+
+# (pattern, groups naming what the clause writes, groups naming what it reads,
+#  implicit writes); column lists count as reads
+_CLAUSES = [
+    (re.compile(rf"^ADD\s+(?:CONSTRAINT\s+{_NAME}\s+)?FOREIGN\s+KEY\s*(?:{_NAME}\s*)?\((.*?)\)",
+                re.IGNORECASE | re.DOTALL), (1, 2), (3,), ()),
+    (re.compile(rf"^ADD\s+(?:CONSTRAINT\s+{_NAME}\s+)?PRIMARY\s+KEY\s*\((.*?)\)",
+                re.IGNORECASE | re.DOTALL), (1,), (2,), ("primary",)),
+    (re.compile(rf"^ADD\s+(?:CONSTRAINT\s+{_NAME}\s+)?{_INDEX_KIND}\s*(?:{_NAME}\s*)?\((.*?)\)",
+                re.IGNORECASE | re.DOTALL), (1, 2), (3,), ()),
+    (re.compile(rf"^DROP\s+(?:INDEX|KEY|FOREIGN\s+KEY|CHECK|CONSTRAINT)\s+{_NAME}\s*$",
+                re.IGNORECASE), (1,), (), ()),
+    (re.compile(r"^DROP\s+PRIMARY\s+KEY\s*$", re.IGNORECASE), (), (), ("primary",)),
+    (re.compile(rf"^CHANGE\s+(?:COLUMN\s+)?{_NAME}\s+{_NAME}\s.*?(?:\bAFTER\s+{_NAME})?\s*$",
+                re.IGNORECASE | re.DOTALL), (1, 2), (3,), ()),
+    (re.compile(rf"^(?:MODIFY|ALTER)\s+(?:COLUMN\s+)?{_NAME}(?:\s.*?(?:\bAFTER\s+{_NAME})?)?\s*$",
+                re.IGNORECASE | re.DOTALL), (1,), (2,), ()),
+    (re.compile(rf"^DROP\s+(?:COLUMN\s+)?{_NAME}\s*$", re.IGNORECASE), (1,), (), ()),
+    (re.compile(rf"^ADD\s+(?:COLUMN\s+)?(?!(?:CONSTRAINT|PRIMARY|FOREIGN|UNIQUE|FULLTEXT|SPATIAL|"
+                rf"INDEX|KEY|CHECK|PARTITION)\b){_NAME}\s.*?(?:\bAFTER\s+{_NAME})?\s*$",
+                re.IGNORECASE | re.DOTALL), (1,), (2,), ()),
+]
+
+
+def _names(text: str | None) -> set[str]:
+    if not text:
+        return set()
+    # an index column list: "a, b(10) DESC" -> {a, b}
+    return {part.strip().strip("`").split("(")[0].split()[0].strip("`").lower()
+            for part in text.split(",") if part.strip()}
+
+
+def clause_effects(clause: str) -> tuple[set[str], set[str]] | None:
+    """``(written, read)`` object names of one ALTER clause, or None if it cannot be merged."""
+    for pattern, written, read, implicit in _CLAUSES:
+        m = pattern.match(clause.strip())
+        if m:
+            writes = set(implicit).union(*(_names(m.group(g)) for g in written))
+            return writes, set().union(*(_names(m.group(g)) for g in read))
+    return None
+
+
+def _depends(later: dict, earlier: dict) -> bool:
+    return bool(later["reads"] & earlier["writes"]
+                or later["writes"] & (earlier["writes"] | earlier["reads"]))
+
+
+def alter_parts(sql_text: str) -> dict | None:
+    """
+    ``{"table", "clauses", "writes", "reads"}`` when every statement of
+    *sql_text* is a mergeable ALTER TABLE on one table, else None.
+    """
+    parts = {"table": None, "clauses": [], "writes": set(), "reads": set()}
+    statements = split_statements(sql_text)
+    if not statements:
+        return None
+    for stmt in statements:
+        m = _ALTER_RE.match(stmt)
+        if not m or _PARTITION_RE.search(stmt):
+            return None
+        table = (m.group(2) or m.group(1)).lower()
+        if parts["table"] not in (None, table):
+            return None
+        parts["table"] = table
+        stmt_part = {"writes": set(), "reads": set()}
+        for clause in split_clauses(m.group(3)):
+            effects = clause_effects(clause)
+            if effects is None:
+                return None
+            stmt_part["writes"] |= effects[0]
+            stmt_part["reads"] |= effects[1]
+        # a later statement of the same changeset may build on an earlier one
+        if _depends(stmt_part, parts):
+            return None
+        parts["writes"] |= stmt_part["writes"]
+        parts["reads"] |= stmt_part["reads"]
+        parts["clauses"].extend(split_clauses(m.group(3)))
+    return parts
+
+
+def plan_groups(pending: list[tuple[dict, str]]) -> list[dict]:
+    """
+    Groups of two or more consecutive changesets (from ``(changeset,
+    sql_text)`` pairs in apply order) that can run as one ALTER TABLE:
+    ``{"table", "changesets", "clauses"}``.
+    """
+    groups: list[dict] = []
+    current: dict | None = None
+    for cs, sql_text in pending:
+        parts = None if cs.get("preconditions") else alter_parts(sql_text)
+        if (parts and current and parts["table"] == current["table"]
+                and not _depends(parts, current)):
+            current["changesets"].append(cs)
+            current["clauses"].extend(parts["clauses"])
+            current["writes"] |= parts["writes"]
+            current["reads"] |= parts["reads"]
+            continue
+        if current and len(current["changesets"]) > 1:
+            groups.append(current)
+        current = {**parts, "changesets": [cs]} if parts else None
+    if current and len(current["changesets"]) > 1:
+        groups.append(current)
+    return [{"table": g["table"], "changesets": g["changesets"], "clauses": g["clauses"]}
+            for g in groups]
+
+
+def merged_statement(group: dict) -> str:
+    return f"ALTER TABLE `{group['table']}` " + ", ".join(group["clauses"])
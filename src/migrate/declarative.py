@@ -0,0 +1,334 @@
+"""
+Declarative target-state schema (``diff``).
+
+The desired schema is declared as plain ``CREATE TABLE`` statements in
+``*.sql`` files under a schema directory (default ``schema/``).  MySQL
+itself is the parser: the files are loaded into a scratch database on the
+rehearsal server (REHEARSAL_DB_*, see ``rehearsal.scratch_settings``) and
+read back with the same catalog snapshot the drift check uses, so declared
+and live schema are compared in one canonical form.
+
+The generated statements are minimal and ordered:
+
+  1. ``CREATE TABLE`` for declared tables that do not exist yet, referenced
+     tables first;
+  2. a standalone ``DROP FOREIGN KEY`` for foreign keys that are redefined
+     under the same name (MySQL cannot drop and re-add one in one ALTER);
+  3. one ``ALTER TABLE`` per changed table carrying every column, index,
+     foreign-key and option change, so each table is rebuilt at most once;
+  4. ``DROP TABLE`` for undeclared tables, only when asked to.  Tables code
+     creates (``ops_*``, the changelog, ``archive_*`` partitions) are never
+     undeclared.
+
+Columns are compared by definition, not position: added columns are placed
+``AFTER`` their declared predecessor, existing columns are not reordered.
+Generated columns, expression indexes, check constraints and partitioning
+changes cannot be derived from the catalog and are reported for a
+hand-written changeset instead.
+
+With ``write`` the statements become an ordinary migration file (header
+metadata as for web uploads), so they reach the database only through
+``update``: policy gate, preconditions, changelog and checksum as usual.
+A migration with destructive statements is written with
+``allowDestructive: true``, leaving ALLOW_DESTRUCTIVE as the gate.
+"""
+
+import json
+import logging
+import re
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from ..db import fetch_one, get_conn, use_database
+from .changelog import load_changelog
+from .drift import UNMANAGED_TABLE_RE, catalog_snapshot
+from .policy import DESTRUCTIVE_PATTERNS
+from .rehearsal import drop_database, mysql_cli, recreate_database, scratch_settings
+
+logger = logging.getLogger("migrate")
+
+_AUTO_INCREMENT_RE = re.compile(r"\s+AUTO_INCREMENT=\d+")
+_VERSION_RE = re.compile(r"^(\d+)_")
+_EXPRESSION_DEFAULT_RE = re.compile(r"^(CURRENT_TIMESTAMP|NOW|LOCALTIME|LOCALTIMESTAMP)\b",
+                                    re.IGNORECASE)
+
+
+def _q(name: str) -> str:
+    return f"`{name}`"
+
+
+def _literal(value: str) -> str:
+    if re.match(r"^b'[01]*'$", value):
+        return value
+    return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def base_tables(snapshot: dict) -> dict:
+    return {t: s for t, s in snapshot.items() if s["options"]["type"] == "BASE TABLE"}
+
+
+def column_definition(name: str, col: dict, table_collation: str | None = None) -> str:
+    """Column DDL rebuilt from its catalog entry."""
+    extra = col["extra"] or ""
+    if re.search(r"\b(VIRTUAL|STORED) GENERATED\b", extra, re.IGNORECASE):
+        raise ValueError(f"generated column {name}")
+    parts = [_q(name), col["type"]]
+    if col["collation"] and col["collation"] != table_collation:
+        parts.append(f"COLLATE {col['collation']}")
+    parts.append("NULL" if col["nullable"] else "NOT NULL")
+    default = col["default"]
+    if default is not None:
+        if _EXPRESSION_DEFAULT_RE.match(default):
+            parts.append(f"DEFAULT {default}")
+        elif "DEFAULT_GENERATED" in extra:
+            parts.append(f"DEFAULT ({default})")
+        else:
+            parts.append(f"DEFAULT {_literal(str(default))}")
+    rest = extra.replace("DEFAULT_GENERATED", "").strip()
+    if rest:
+        parts.append(rest.upper() if rest.lower() == "auto_increment" else rest)
+    return " ".join(parts)
+
+
+def _index_columns(columns: list) -> str:
+    rendered = []
+    for column in columns:
+        if column is None:
+            raise ValueError("expression index")
+        name, _, prefix = column.partition("(")
+        rendered.append(_q(name) + (f"({prefix}" if prefix else ""))
+    return ", ".join(rendered)
+
+
+def index_clause(name: str, index: dict) -> str:
+    if name == "PRIMARY":
+        return f"ADD PRIMARY KEY ({_index_columns(index['columns'])})"
+    kind = {"FULLTEXT": "FULLTEXT INDEX", "SPATIAL": "SPATIAL INDEX"}.get(
+        index["type"], "UNIQUE INDEX" if index["unique"] else "INDEX")
+    return f"ADD {kind} {_q(name)} ({_index_columns(index['columns'])})"
+
+
+def foreign_key_clause(name: str, fk: dict) -> str:
+    ref_table = fk["references"][0].split(".", 1)[0]
+    ref_cols = ", ".join(_q(r.split(".", 1)[1]) for r in fk["references"])
+    clause = (f"ADD CONSTRAINT {_q(name)} FOREIGN KEY "
+              f"({', '.join(_q(c) for c in fk['columns'])}) REFERENCES {_q(ref_table)} ({ref_cols})")
+    for rule in ("on_update", "on_delete"):
+        if fk[rule]:
+            clause += f" {rule.replace('_', ' ').upper()} {fk[rule]}"
+    return clause
+
+
+def _references(table: dict) -> set[str]:
+    return {fk["references"][0].split(".", 1)[0].lower()
+            for fk in table["constraints"].values()
+            if fk["type"] == "FOREIGN KEY" and fk["references"]}
+
+
+def _dependency_order(tables: list[str], snapshot: dict) -> list[str]:
+    """*tables* with the tables their foreign keys reference (among them) first."""
+    pending = sorted(tables)
+    ordered: list[str] = []
+    while pending:
+        ready = [t for t in pending if not (_references(snapshot[t]) & set(pending)) - {t}]
+        # a reference cycle cannot be ordered; fall back to name order
+        for t in ready or pending[:1]:
+            ordered.append(t)
+            pending.remove(t)
+    return ordered
+
+
+def _alter_clauses(table: str, live: dict, desired: dict,
+                   unsupported: list[str]) -> tuple[list[str], list[str]]:
+    """(standalone statements to run first, clauses of the table's single ALTER)."""
+    pre: list[str] = []
+    drops: list[str] = []
+    changes: list[str] = []
+    adds: list[str] = []
+    collation = desired["options"]["collation"]
+
+    def strip_position(col):
+        return {k: v for k, v in col.items() if k != "position"} if col else None
+
+    for name, fk in sorted(live["constraints"].items()):
+        new = desired["constraints"].get(name)
+        if fk["type"] != "FOREIGN KEY":
+            if fk != new:
+                unsupported.append(f"{table}: {fk['type']} constraint {name}")
+        elif new is None:
+            drops.append(f"DROP FOREIGN KEY {_q(name)}")
+        elif new != fk:
+            pre.append(f"ALTER TABLE {_q(table)} DROP FOREIGN KEY {_q(name)}")
+    for name, new in sorted(desired["constraints"].items()):
+        old = live["constraints"].get(name)
+        if new["type"] != "FOREIGN KEY":
+            if old is None:
+                unsupported.append(f"{table}: {new['type']} constraint {name}")
+        elif new != old:
+            adds.append(foreign_key_clause(name, new))
+
+    for name, index in sorted(live["indexes"].items()):
+        new = desired["indexes"].get(name)
+        if new != index:
+            drops.append("DROP PRIMARY KEY" if name == "PRIMARY" else f"DROP INDEX {_q(name)}")
+    index_adds = []
+    for name, index in sorted(desired["indexes"].items()):
+        if live["indexes"].get(name) != index:
+            try:
+                index_adds.append(index_clause(name, index))
+            except ValueError as exc:
+                unsupported.append(f"{table}: {exc} {name}")
+    adds[:0] = index_adds
+
+    for name in sorted(set(live["columns"]) - set(desired["columns"])):
+        drops.append(f"DROP COLUMN {_q(name)}")
+    ordered = sorted(desired["columns"].items(), key=lambda kv: kv[1]["position"])
+    previous = None
+    for name, col in ordered:
+        old = live["columns"].get(name)
+        try:
+            if old is None:
+                place = f"AFTER {_q(previous)}" if previous else "FIRST"
+                changes.append(f"ADD COLUMN {column_definition(name, col, collation)} {place}")
+            elif strip_position(old) != strip_position(col):
+                changes.append(f"MODIFY COLUMN {column_definition(name, col, collation)}")
+        except ValueError as exc:
+            unsupported.append(f"{table}: {exc}")
+        previous = name
+
+    options = []
+    if live["options"]["engine"] != desired["options"]["engine"]:
+        options.append(f"ENGINE={desired['options']['engine']}")
+    if live["options"]["collation"] != collation:
+        options.append(f"DEFAULT COLLATE={collation}")
+    if live["partitioning"] != desired["partitioning"]:
+        unsupported.append(f"{table}: partitioning")
+    return pre, drops + changes + adds + options
+
+
+def generate_statements(live: dict, desired: dict, create_ddl: dict[str, str],
+                        drop_undeclared: bool = False) -> dict:
+    """
+    Statements taking *live* to *desired* (catalog snapshots of base tables).
+    Returns ``{"statements", "unsupported", "undeclared"}``.
+    """
+    unsupported: list[str] = []
+    new_tables = [t for t in desired if t not in live]
+    undeclared = sorted(t for t in live if t not in desired and not UNMANAGED_TABLE_RE.match(t))
+
+    creates = [_AUTO_INCREMENT_RE.sub("", create_ddl[t]).rstrip(";") + ";"
+               for t in _dependency_order(new_tables, desired)]
+    pre_statements, alters = [], []
+    for table in _dependency_order([t for t in desired if t in live], desired):
+        pre, clauses = _alter_clauses(table, live[table], desired[table], unsupported)
+        pre_statements.extend(s + ";" for s in pre)
+        if clauses:
+            alters.append(f"ALTER TABLE {_q(table)}\n    " + ",\n    ".join(clauses) + ";")
+    drops = [f"DROP TABLE {_q(t)};" for t in undeclared] if drop_undeclared else []
+    return {"statements": creates + pre_statements + alters + drops,
+            "unsupported": unsupported, "undeclared": undeclared}
+
+
+def load_declared_sql(schema_dir: str) -> str:
+    files = sorted(Path(schema_dir).glob("*.sql"))
+    if not files:
+        raise RuntimeError(f"No declared schema: no *.sql files in {schema_dir}")
+    return "\n\n".join(f.read_text(encoding="utf-8") for f in files)
+
+
+def declared_snapshot(schema_dir: str, keep: bool = False) -> tuple[dict, dict[str, str]]:
+    """Load the declared DDL into a scratch database; return its snapshot and CREATE TABLEs."""
+    settings = scratch_settings()
+    database = f"{settings['database']}_declared"
+    recreate_database(settings, database)
+    try:
+        with tempfile.TemporaryDirectory(prefix="declared_") as tmp:
+            script = Path(tmp) / "schema.sql"
+            # declaration order must not matter
+            script.write_text("SET FOREIGN_KEY_CHECKS = 0;\n" + load_declared_sql(schema_dir),
+                              encoding="utf-8")
+            mysql_cli(settings, database=database, input_file=str(script))
+        with use_database(**{**settings, "database": database}):
+            conn = get_conn()
+            try:
+                desired = base_tables(catalog_snapshot(conn))
+                create_ddl = {t: fetch_one(conn, f"SHOW CREATE TABLE {_q(t)}")[1]
+                              for t in desired}
+            finally:
+                conn.close()
+    finally:
+        if not keep:
+            drop_database(settings, database)
+    return desired, create_ddl
+
+
+def next_migration_id(changesets: list[dict], migrations_dir: str = "migrations") -> int:
+    versions = [int(cs["id"]) for cs in changesets if str(cs["id"]).isdigit()]
+    versions += [int(m.group(1)) for f in Path(migrations_dir).glob("*.up.sql")
+                 if (m := _VERSION_RE.match(f.name))]
+    return max(versions, default=0) + 1
+
+
+def write_migration(statements: list[str], migration_id: int, description: str,
+                    author: str, schema_dir: str, migrations_dir: str = "migrations",
+                    changelog_path: str = "changelog/changelog.yml") -> str:
+    """Write *statements* as the next migration; register it in a YAML changelog if one is used."""
+    sql = "\n\n".join(statements)
+    risk = ("high" if re.search(r"\bDROP\s+(TABLE|COLUMN)\b", sql, re.IGNORECASE)
+            else "medium" if re.search(r"\bALTER\s+TABLE\b", sql, re.IGNORECASE) else "low")
+    destructive = "true" if any(p.search(sql) for p, _ in DESTRUCTIVE_PATTERNS) else "false"
+    path = Path(migrations_dir) / f"{migration_id}_{description}.up.sql"
+    path.write_text(f"""-- =============================================================================
+-- Migration {migration_id}: {description.replace('_', ' ').title()}
+-- Generated from the declared schema ({schema_dir}/) on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+-- =============================================================================
+-- id: {migration_id}
+-- author: {author}
+-- risk: {risk}
+-- allowDestructive: {destructive}
+-- labels: declarative
+-- contexts: dev,prod
+
+{sql}
+""", encoding="utf-8")
+    if Path(changelog_path).exists():
+        with open(changelog_path, "a", encoding="utf-8") as fh:
+            fh.write(f"""
+  # --- {migration_id}: generated from the declared schema -----------------
+  - changeSet:
+      id: "{migration_id}"
+      author: "{author}"
+      sqlFile: "{path.as_posix()}"
+      risk: "{risk}"
+      allowDestructive: {destructive}
+      labels: "declarative"
+      contexts: "dev,prod"
+""")
+    logger.info(json.dumps({"event": "declarative_migration_written", "file": str(path),
+                            "id": migration_id, "statements": len(statements), "risk": risk}))
+    return str(path)
+
+
+def diff_schema(schema_dir: str = "schema", changelog_path: str = "changelog/changelog.yml",
+                write: bool = False, description: str = "declarative_schema_sync",
+                author: str = "declarative", drop_undeclared: bool = False) -> dict:
+    """Diff the declared schema against the live one; with *write*, save it as a migration."""
+    conn = get_conn()
+    try:
+        live = base_tables(catalog_snapshot(conn))
+    finally:
+        conn.close()
+    desired, create_ddl = declared_snapshot(schema_dir)
+    result = generate_statements(live, desired, create_ddl, drop_undeclared)
+    result["file"] = None
+    if write and result["statements"]:
+        migration_id = next_migration_id(load_changelog(changelog_path))
+        result["file"] = write_migration(result["statements"], migration_id, description,
+                                         author, schema_dir, changelog_path=changelog_path)
+    logger.info(json.dumps({
+        "event": "declarative_diff", "schema_dir": schema_dir,
+        "statements": len(result["statements"]), "unsupported": result["unsupported"],
+        "undeclared": len(result["undeclared"]), "file": result["file"],
+    }))
+    return result
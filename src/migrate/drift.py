@@ -0,0 +1,260 @@
+"""
+Schema drift detection from catalog fingerprints.
+
+``verify`` proves the SQL files have not changed since they ran; this
+module proves the live schema has not changed since they ran.  After every
+applied changeset the runner stores a canonical snapshot of the schema and
+its SHA-256 fingerprint in ``ops_schema_fingerprints``.  A drift check
+rebuilds the snapshot and compares fingerprints; only on a mismatch is the
+stored snapshot loaded and diffed.
+
+A snapshot costs five bulk INFORMATION_SCHEMA queries however many tables
+there are (tables, columns, indexes, foreign-key / check constraints,
+partitioning) and covers every table the changelog manages: the runner's
+and pipeline's own ``ops_*`` tables, the changelog tables and the
+``archive_<table>_pYYYYMM`` tables ``partitions --archive`` creates are
+left out, since code creates and alters them.  Partitioning is compared by
+method and expression only, so partition maintenance adding or dropping
+ranges is not drift.
+
+SCHEMA_DRIFT_CHECK (status / update):
+    off  – skip the check
+    warn – log ``schema_drift`` with the differences (default)
+    fail – also refuse to run ``update`` on a drifted schema
+
+After reviewing an intentional out-of-band change, ``drift --accept``
+records the live schema as the new baseline.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+
+from ..db import execute, fetch_all, fetch_one
+
+logger = logging.getLogger("migrate")
+
+DRIFT_CHECK_MODES = ("off", "warn", "fail")
+
+# Runner / pipeline bookkeeping and archived partitions, created by code
+# rather than the changelog
+UNMANAGED_TABLE_RE = re.compile(r"^(ops_|databasechangelog|archive_\w+_p\d{6}$)", re.IGNORECASE)
+
+
+def drift_check_mode() -> str:
+    mode = os.getenv("SCHEMA_DRIFT_CHECK", "warn").strip().lower()
+    if mode not in DRIFT_CHECK_MODES:
+        raise RuntimeError(
+            f"Invalid SCHEMA_DRIFT_CHECK '{mode}'; expected one of {', '.join(DRIFT_CHECK_MODES)}."
+        )
+    return mode
+
+
+def ensure_fingerprint_table(conn) -> None:
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_schema_fingerprints (
+            id           BIGINT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            changeset_id VARCHAR(255) NULL,
+            author       VARCHAR(255) NULL,
+            run_id       CHAR(36)     NULL,
+            source       ENUM('changeset','accepted') NOT NULL,
+            fingerprint  CHAR(64)     NOT NULL,
+            snapshot     LONGTEXT     NOT NULL,
+            recorded_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            KEY idx_schema_fp_changeset (changeset_id, author)
+        ) ENGINE=InnoDB
+    """)
+
+
+def build_snapshot(tables, columns, indexes, constraints, partitions) -> dict:
+    """
+    Canonical ``{table: {...}}`` from the catalog rows of the five snapshot
+    queries (see ``catalog_snapshot`` for their column order).
+    """
+    snapshot = {}
+    for name, table_type, engine, collation in tables:
+        if UNMANAGED_TABLE_RE.match(name):
+            continue
+        snapshot[name.lower()] = {
+            "options": {"type": table_type, "engine": engine, "collation": collation},
+            "columns": {}, "indexes": {}, "constraints": {}, "partitioning": None,
+        }
+
+    for table, column, position, col_type, nullable, default, extra, collation in columns:
+        if table.lower() in snapshot:
+            snapshot[table.lower()]["columns"][column] = {
+                "position": int(position), "type": col_type, "nullable": nullable == "YES",
+                "default": default, "extra": extra or "", "collation": collation,
+            }
+
+    for table, index, non_unique, column, sub_part, index_type in indexes:
+        if table.lower() in snapshot:
+            entry = snapshot[table.lower()]["indexes"].setdefault(
+                index, {"unique": not int(non_unique), "type": index_type, "columns": []})
+            entry["columns"].append(f"{column}({sub_part})" if sub_part else column)
+
+    for table, name, kind, column, ref_table, ref_column, on_update, on_delete in constraints:
+        if table.lower() in snapshot:
+            entry = snapshot[table.lower()]["constraints"].setdefault(
+                name, {"type": kind, "columns": [], "references": [],
+                       "on_update": on_update, "on_delete": on_delete})
+            if column:
+                entry["columns"].append(column)
+            if ref_table:
+                entry["references"].append(f"{ref_table}.{ref_column}")
+
+    for table, method, expression, sub_method, sub_expression in partitions:
+        if table.lower() in snapshot:
+            snapshot[table.lower()]["partitioning"] = {
+                "method": method, "expression": expression,
+                "subpartition_method": sub_method, "subpartition_expression": sub_expression,
+            }
+    return snapshot
+
+
+def catalog_snapshot(conn) -> dict:
+    """Snapshot of the live schema in five INFORMATION_SCHEMA queries."""
+    tables = fetch_all(conn, """
+        SELECT TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_COLLATION
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    columns = fetch_all(conn, """
+        SELECT TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE, IS_NULLABLE,
+               COLUMN_DEFAULT, EXTRA, COLLATION_NAME
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    indexes = fetch_all(conn, """
+        SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME, SUB_PART, INDEX_TYPE
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """)
+    # PRIMARY KEY / UNIQUE are covered by the indexes
+    constraints = fetch_all(conn, """
+        SELECT tc.TABLE_NAME, tc.CONSTRAINT_NAME, tc.CONSTRAINT_TYPE, k.COLUMN_NAME,
+               k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME,
+               rc.UPDATE_RULE, rc.DELETE_RULE
+        FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+        LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+               ON k.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+              AND k.TABLE_NAME = tc.TABLE_NAME
+              AND k.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+        LEFT JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+               ON rc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+              AND rc.TABLE_NAME = tc.TABLE_NAME
+              AND rc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+        WHERE tc.TABLE_SCHEMA = DATABASE()
+          AND tc.CONSTRAINT_TYPE NOT IN ('PRIMARY KEY', 'UNIQUE')
+        ORDER BY tc.TABLE_NAME, tc.CONSTRAINT_NAME, k.ORDINAL_POSITION
+    """)
+    partitions = fetch_all(conn, """
+        SELECT DISTINCT TABLE_NAME, PARTITION_METHOD, PARTITION_EXPRESSION,
+               SUBPARTITION_METHOD, SUBPARTITION_EXPRESSION
+        FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND PARTITION_METHOD IS NOT NULL
+    """)
+    return build_snapshot(tables, columns, indexes, constraints, partitions)
+
+
+def fingerprint(snapshot: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(snapshot, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def diff_snapshots(expected: dict, actual: dict) -> list[dict]:
+    """
+    Structured differences, one per table / object:
+    ``{"table", "kind", "name", "change", "expected", "actual"}`` with
+    *kind* ``table``, ``options``, ``columns``, ``indexes``,
+    ``constraints`` or ``partitioning`` and *change* ``added``,
+    ``removed`` or ``changed``.
+    """
+    diffs = []
+
+    def add(table, kind, name, old, new):
+        change = "added" if old is None else "removed" if new is None else "changed"
+        diffs.append({"table": table, "kind": kind, "name": name, "change": change,
+                      "expected": old, "actual": new})
+
+    for table in sorted(set(expected) | set(actual)):
+        old, new = expected.get(table), actual.get(table)
+        if old is None or new is None:
+            add(table, "table", table, old and old["options"], new and new["options"])
+            continue
+        for kind in ("options", "partitioning"):
+            if old[kind] != new[kind]:
+                add(table, kind, table, old[kind], new[kind])
+        for kind in ("columns", "indexes", "constraints"):
+            for name in sorted(set(old[kind]) | set(new[kind])):
+                if old[kind].get(name) != new[kind].get(name):
+                    add(table, kind, name, old[kind].get(name), new[kind].get(name))
+    return diffs
+
+
+def record_fingerprint(conn, source: str = "changeset", cs: dict | None = None,
+                       run_id: str | None = None) -> str:
+    """Store the live schema as the baseline after *cs* (or as an accepted baseline)."""
+    snapshot = catalog_snapshot(conn)
+    digest = fingerprint(snapshot)
+    execute(conn, """
+        INSERT INTO ops_schema_fingerprints
+            (changeset_id, author, run_id, source, fingerprint, snapshot)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, (cs and cs["id"], cs and cs["author"], run_id, source, digest,
+          json.dumps(snapshot, sort_keys=True, default=str)))
+    return digest
+
+
+def check_drift(conn) -> dict:
+    """
+    Compare the live schema with the latest baseline.  Returns ``status``
+    (``clean``, ``drift`` or ``no_baseline``), both fingerprints, the
+    baseline's changeset and, on drift, the differences.
+    """
+    ensure_fingerprint_table(conn)
+    baseline = fetch_one(conn, """
+        SELECT id, changeset_id, source, fingerprint, recorded_at
+        FROM ops_schema_fingerprints
+        ORDER BY id DESC
+        LIMIT 1
+    """)
+    snapshot = catalog_snapshot(conn)
+    result = {"status": "no_baseline", "fingerprint": fingerprint(snapshot),
+              "baseline": None, "baseline_changeset": None, "baseline_source": None,
+              "baseline_recorded_at": None, "differences": []}
+    if not baseline:
+        return result
+    fp_id, changeset_id, source, expected_fp, recorded_at = baseline
+    result.update({"baseline": expected_fp, "baseline_changeset": changeset_id,
+                   "baseline_source": source, "baseline_recorded_at": str(recorded_at),
+                   "status": "clean" if expected_fp == result["fingerprint"] else "drift"})
+    if result["status"] == "drift":
+        stored = fetch_one(conn, "SELECT snapshot FROM ops_schema_fingerprints WHERE id = %s",
+                           (fp_id,))
+        result["differences"] = diff_snapshots(json.loads(stored[0]), snapshot)
+    return result
+
+
+def report_drift(conn, mode: str | None = None) -> dict | None:
+    """Run ``check_drift`` according to SCHEMA_DRIFT_CHECK and log the outcome."""
+    mode = mode or drift_check_mode()
+    if mode == "off":
+        return None
+    result = check_drift(conn)
+    if result["status"] == "drift":
+        logger.warning(json.dumps({
+            "event": "schema_drift", "fingerprint": result["fingerprint"],
+            "baseline": result["baseline"], "baseline_changeset": result["baseline_changeset"],
+            "differences": len(result["differences"]),
+            "objects": [f"{d['table']}.{d['kind']}:{d['name']}:{d['change']}"
+                        for d in result["differences"][:50]],
+        }))
+    else:
+        logger.info(json.dumps({"event": "schema_drift_check", "status": result["status"],
+                                "fingerprint": result["fingerprint"]}))
+    return result
@@ -0,0 +1,204 @@
+"""
+Automatic inverse scripts for reversible DDL.
+
+Before a changeset runs, the runner captures ``SHOW CREATE TABLE`` of every
+table it touches.  After it succeeds, ``derive_inverse`` turns the script
+into the statements that undo it, newest first, and the runner stores them
+in ``DATABASECHANGELOG.INVERSE_SQL``.  ``rollback`` runs a changeset's
+down-script if it has one, else its stored inverse, and only restores a
+backup when neither exists.
+
+Reversible statements and their inverses:
+
+  CREATE TABLE t                 DROP TABLE t (nothing if t already existed)
+  CREATE INDEX i ON t            DROP INDEX i ON t
+  DROP INDEX i ON t              re-add i from the captured definition
+  RENAME TABLE a TO b            RENAME TABLE b TO a
+  ALTER TABLE t ...              one ALTER TABLE undoing every clause:
+      ADD COLUMN / INDEX / KEY / PRIMARY KEY / FOREIGN KEY   → DROP …
+      DROP INDEX / PRIMARY KEY / FOREIGN KEY                 → ADD captured definition
+      MODIFY / CHANGE / ALTER COLUMN                         → MODIFY / CHANGE back
+      RENAME COLUMN / INDEX / TO                             → rename back
+      ALGORITHM= / LOCK=                                     → (no inverse needed)
+
+Anything else — DROP TABLE or DROP COLUMN (data is gone), DML, table
+options, partitioning, unnamed indexes, or a clause whose previous
+definition was not captured — makes the whole changeset irreversible, and
+no inverse is stored.  Inverses restore structure, not data: changing a
+column back re-converts the values it holds.
+"""
+
+import re
+
+from ..db import fetch_one, split_statements
+from .online_ddl import classify_statement, split_clauses
+
+_NAME = r"`?([\w$]+)`?"
+_QUALIFIED = rf"(?:`?[\w$]+`?\s*\.\s*)?{_NAME}"
+
+_CREATE_TABLE_RE = re.compile(
+    rf"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?{_QUALIFIED}", re.IGNORECASE)
+_CREATE_INDEX_RE = re.compile(
+    rf"^\s*CREATE\s+(?:UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?INDEX\s+{_NAME}\s+ON\s+{_QUALIFIED}",
+    re.IGNORECASE)
+_DROP_INDEX_RE = re.compile(rf"^\s*DROP\s+INDEX\s+{_NAME}\s+ON\s+{_QUALIFIED}\s*$", re.IGNORECASE)
+_RENAME_TABLE_RE = re.compile(r"^\s*RENAME\s+TABLE\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_RENAME_PAIR_RE = re.compile(rf"^\s*{_QUALIFIED}\s+TO\s+{_QUALIFIED}\s*$", re.IGNORECASE)
+_ALTER_RE = re.compile(rf"^\s*ALTER\s+TABLE\s+{_QUALIFIED}\s+(.*)$", re.IGNORECASE | re.DOTALL)
+
+_INDEX_KIND = r"(?:UNIQUE(?:\s+(?:INDEX|KEY))?|FULLTEXT(?:\s+(?:INDEX|KEY))?|" \
+              r"SPATIAL(?:\s+(?:INDEX|KEY))?|INDEX|KEY)"
+_FLAGS = re.IGNORECASE | re.DOTALL
+_CLAUSE_RES = {
+    "add_fk": re.compile(rf"^ADD\s+CONSTRAINT\s+{_NAME}\s+FOREIGN\s+KEY\b", _FLAGS),
+    "add_pk": re.compile(r"^ADD\s+(?:CONSTRAINT\s+\S+\s+)?PRIMARY\s+KEY\b", _FLAGS),
+    # the lookahead keeps "UNIQUE KEY (a)" from naming the index "KEY"
+    "add_index": re.compile(rf"^ADD\s+(?:CONSTRAINT\s+\S+\s+)?{_INDEX_KIND}\s+"
+                            rf"(?!(?:INDEX|KEY)\b){_NAME}\s*\(", _FLAGS),
+    "add_column": re.compile(
+        rf"^ADD\s+(?:COLUMN\s+)?(?!(?:CONSTRAINT|PRIMARY|FOREIGN|UNIQUE|FULLTEXT|SPATIAL|INDEX|KEY|"
+        rf"CHECK|PARTITION)\b){_NAME}\s", _FLAGS),
+    "drop_pk": re.compile(r"^DROP\s+PRIMARY\s+KEY\s*$", _FLAGS),
+    "drop_fk": re.compile(rf"^DROP\s+FOREIGN\s+KEY\s+{_NAME}\s*$", _FLAGS),
+    "drop_index": re.compile(rf"^DROP\s+(?:INDEX|KEY)\s+{_NAME}\s*$", _FLAGS),
+    "modify": re.compile(rf"^MODIFY\s+(?:COLUMN\s+)?{_NAME}\s", _FLAGS),
+    "change": re.compile(rf"^CHANGE\s+(?:COLUMN\s+)?{_NAME}\s+{_NAME}\s", _FLAGS),
+    "alter_column": re.compile(rf"^ALTER\s+(?:COLUMN\s+)?{_NAME}\s+(?:SET|DROP)\b", _FLAGS),
+    "rename_column": re.compile(rf"^RENAME\s+COLUMN\s+{_NAME}\s+TO\s+{_NAME}\s*$", _FLAGS),
+    "rename_index": re.compile(rf"^RENAME\s+(?:INDEX|KEY)\s+{_NAME}\s+TO\s+{_NAME}\s*$", _FLAGS),
+    "rename_table": re.compile(rf"^RENAME\s+(?:TO\s+|AS\s+)?{_QUALIFIED}\s*$", _FLAGS),
+    "option": re.compile(r"^(?:ALGORITHM|LOCK)\s*=?\s*\w+\s*$", _FLAGS),
+}
+
+
+class Irreversible(Exception):
+    """A statement has no derivable inverse."""
+
+
+def parse_definition(create_sql: str) -> dict:
+    """Column, index and constraint lines of a ``SHOW CREATE TABLE`` result."""
+    parsed = {"columns": {}, "indexes": {}, "constraints": {}}
+    for line in create_sql.splitlines()[1:]:
+        line = line.strip().rstrip(",")
+        if m := re.match(r"^`([^`]+)`\s", line):
+            parsed["columns"][m.group(1).lower()] = line
+        elif line.startswith("PRIMARY KEY"):
+            parsed["indexes"]["primary"] = line
+        elif m := re.match(r"^(?:UNIQUE |FULLTEXT |SPATIAL )?KEY `([^`]+)`", line):
+            parsed["indexes"][m.group(1).lower()] = line
+        elif m := re.match(r"^CONSTRAINT `([^`]+)`", line):
+            parsed["constraints"][m.group(1).lower()] = line
+    return parsed
+
+
+def touched_tables(sql_text: str) -> set[str]:
+    """Tables whose definitions must be captured before *sql_text* runs."""
+    tables = set()
+    for stmt in split_statements(sql_text):
+        if m := _RENAME_TABLE_RE.match(stmt):
+            for pair in split_clauses(m.group(1)):
+                if p := _RENAME_PAIR_RE.match(pair):
+                    tables.add(p.group(1).lower())
+        elif table := classify_statement(stmt)["table"]:
+            tables.add(table.lower())
+    return tables
+
+
+def capture_definitions(conn, sql_text: str) -> dict[str, str | None]:
+    """``SHOW CREATE TABLE`` of every touched table; None for tables that do not exist."""
+    captured = {}
+    for table in sorted(touched_tables(sql_text)):
+        try:
+            captured[table] = fetch_one(conn, f"SHOW CREATE TABLE `{table}`")[1]
+        except Exception:
+            captured[table] = None
+    return captured
+
+
+def _definition(before: dict, table: str) -> dict:
+    create_sql = before.get(table.lower())
+    if create_sql is None:
+        raise Irreversible(f"no captured definition of {table}")
+    return parse_definition(create_sql)
+
+
+def _lookup(defn: dict, kind: str, name: str) -> str:
+    line = defn[kind].get(name.lower())
+    if line is None:
+        raise Irreversible(f"{name} not in captured definition")
+    return line
+
+
+def _invert_clause(clause: str, table: str, before: dict) -> str | None:
+    """Inverse of one ALTER TABLE clause; None when none is needed."""
+    for kind, pattern in _CLAUSE_RES.items():
+        m = pattern.match(clause.strip())
+        if not m:
+            continue
+        if kind == "option":
+            return None
+        if kind == "add_fk":
+            return f"DROP FOREIGN KEY `{m.group(1)}`"
+        if kind == "add_pk":
+            return "DROP PRIMARY KEY"
+        if kind == "add_index":
+            return f"DROP INDEX `{m.group(1)}`"
+        if kind == "add_column":
+            return f"DROP COLUMN `{m.group(1)}`"
+        if kind == "rename_column":
+            return f"RENAME COLUMN `{m.group(2)}` TO `{m.group(1)}`"
+        if kind == "rename_index":
+            return f"RENAME INDEX `{m.group(2)}` TO `{m.group(1)}`"
+        if kind == "rename_table":
+            return f"RENAME TO `{table}`"
+        defn = _definition(before, table)
+        if kind == "drop_pk":
+            return f"ADD {_lookup(defn, 'indexes', 'primary')}"
+        if kind == "drop_fk":
+            return f"ADD {_lookup(defn, 'constraints', m.group(1))}"
+        if kind == "drop_index":
+            return f"ADD {_lookup(defn, 'indexes', m.group(1))}"
+        if kind in ("modify", "alter_column"):
+            return f"MODIFY COLUMN {_lookup(defn, 'columns', m.group(1))}"
+        if kind == "change":
+            return f"CHANGE COLUMN `{m.group(2)}` {_lookup(defn, 'columns', m.group(1))}"
+    raise Irreversible(f"no inverse for clause: {clause[:80]}")
+
+
+def _invert_statement(stmt: str, before: dict) -> list[str]:
+    if m := _CREATE_TABLE_RE.match(stmt):
+        # CREATE TABLE IF NOT EXISTS of an existing table did nothing
+        if m.group(1) and before.get(m.group(2).lower()):
+            return []
+        return [f"DROP TABLE `{m.group(2)}`"]
+    if m := _CREATE_INDEX_RE.match(stmt):
+        return [f"DROP INDEX `{m.group(1)}` ON `{m.group(2)}`"]
+    if m := _DROP_INDEX_RE.match(stmt):
+        line = _lookup(_definition(before, m.group(2)), "indexes", m.group(1))
+        return [f"ALTER TABLE `{m.group(2)}` ADD {line}"]
+    if m := _RENAME_TABLE_RE.match(stmt):
+        pairs = [_RENAME_PAIR_RE.match(p) for p in split_clauses(m.group(1))]
+        if not all(pairs):
+            raise Irreversible("unparsed RENAME TABLE")
+        return ["RENAME TABLE " + ", ".join(f"`{p.group(2)}` TO `{p.group(1)}`"
+                                            for p in reversed(pairs))]
+    if m := _ALTER_RE.match(stmt):
+        table, body = m.group(1), m.group(2)
+        inverses = [inv for clause in split_clauses(body)
+                    if (inv := _invert_clause(clause, table, before)) is not None]
+        renamed = _CLAUSE_RES["rename_table"].match
+        new_name = next((r.group(1) for c in split_clauses(body) if (r := renamed(c.strip()))),
+                        table)
+        return [f"ALTER TABLE `{new_name}` " + ", ".join(reversed(inverses))] if inverses else []
+    raise Irreversible(f"no inverse for: {stmt[:80]}")
+
+
+def derive_inverse(sql_text: str, before: dict[str, str | None]) -> str | None:
+    """The script undoing *sql_text*, or None if any statement is irreversible."""
+    inverse: list[str] = []
+    try:
+        for stmt in split_statements(sql_text):
+            inverse[:0] = _invert_statement(stmt, before)
+    except Irreversible:
+        return None
+    return ";\n".join(inverse) + ";" if inverse else None
@@ -0,0 +1,192 @@
+"""
+Classify migration statements by the online-DDL algorithm MySQL 8.0 will use.
+
+For every statement ``classify_statement`` returns the operation, its
+target table, the expected algorithm and the lock concurrent sessions see:
+
+  instant – metadata-only change, no table data touched
+  inplace – rebuilt or indexed inside InnoDB; concurrent DML allowed
+  copy    – table copied row by row; writes blocked for the duration
+  none    – not DDL (INSERT / UPDATE / DELETE): row locks only
+
+An ALTER TABLE with several clauses takes its most expensive clause, and an
+explicit ``ALGORITHM=`` / ``LOCK=`` clause wins over the inferred one.  The
+rules follow the MySQL 8.0.29+ online DDL matrix (instant ADD / DROP COLUMN)
+and err on the side of the slower algorithm where the outcome depends on
+column types the statement alone does not reveal (MODIFY / CHANGE COLUMN).
+"""
+
+import re
+
+ALGORITHMS = ("instant", "inplace", "copy")
+
+# Algorithms whose duration grows with the table's size
+SIZE_DEPENDENT = ("inplace", "copy", "none")
+
+_IDENT = r"`?([\w$]+)`?(?:\s*\.\s*`?([\w$]+)`?)?"
+_ALTER_RE = re.compile(rf"^\s*ALTER\s+(?:ONLINE\s+|IGNORE\s+)?TABLE\s+{_IDENT}\s*(.*)$",
+                       re.IGNORECASE | re.DOTALL)
+_CREATE_TABLE_RE = re.compile(
+    rf"^\s*CREATE\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?{_IDENT}(.*)$",
+    re.IGNORECASE | re.DOTALL)
+_CREATE_INDEX_RE = re.compile(
+    rf"^\s*CREATE\s+(UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?INDEX\s+\S+\s+ON\s+{_IDENT}",
+    re.IGNORECASE)
+_CTAS_RE = re.compile(r"^\s*(\(.*\))?[^()]*?\b(AS\s+)?SELECT\b", re.IGNORECASE | re.DOTALL)
+_DROP_INDEX_RE = re.compile(rf"^\s*DROP\s+INDEX\s+\S+\s+ON\s+{_IDENT}", re.IGNORECASE)
+_DROP_TABLE_RE = re.compile(rf"^\s*DROP\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+EXISTS\s+)?{_IDENT}",
+                            re.IGNORECASE)
+_TRUNCATE_RE = re.compile(rf"^\s*TRUNCATE\s+(?:TABLE\s+)?{_IDENT}", re.IGNORECASE)
+_RENAME_TABLE_RE = re.compile(rf"^\s*RENAME\s+TABLE\s+{_IDENT}", re.IGNORECASE)
+_INSERT_RE = re.compile(rf"^\s*(INSERT|REPLACE)\s+(?:IGNORE\s+)?(?:INTO\s+)?{_IDENT}",
+                        re.IGNORECASE)
+_UPDATE_RE = re.compile(rf"^\s*UPDATE\s+(?:IGNORE\s+)?{_IDENT}", re.IGNORECASE)
+_DELETE_RE = re.compile(rf"^\s*DELETE\s+(?:IGNORE\s+)?FROM\s+{_IDENT}", re.IGNORECASE)
+_EXPLICIT_ALGO_RE = re.compile(r"\bALGORITHM\s*=?\s*(INSTANT|INPLACE|COPY)\b", re.IGNORECASE)
+_EXPLICIT_LOCK_RE = re.compile(r"\bLOCK\s*=?\s*(NONE|SHARED|EXCLUSIVE)\b", re.IGNORECASE)
+
+# (pattern on one ALTER clause, operation, algorithm, lock); first match wins
+_CLAUSE_RULES: list[tuple[re.Pattern, str, str, str]] = [
+    (re.compile(r"^ADD\s+(CONSTRAINT\s+\S+\s+)?PRIMARY\s+KEY\b", re.I), "add_primary_key", "inplace", "none"),
+    (re.compile(r"^ADD\s+(CONSTRAINT\s+\S+\s+)?FOREIGN\s+KEY\b", re.I), "add_foreign_key", "copy", "shared"),
+    (re.compile(r"^ADD\s+(CONSTRAINT\s+\S+\s+)?CHECK\b", re.I), "add_check", "copy", "shared"),
+    (re.compile(r"^ADD\s+(CONSTRAINT\s+\S+\s+)?(FULLTEXT|SPATIAL)\b", re.I), "add_index", "inplace", "shared"),
+    (re.compile(r"^ADD\s+(CONSTRAINT\s+\S+\s+)?(UNIQUE|INDEX|KEY)\b", re.I), "add_index", "inplace", "none"),
+    (re.compile(r"^ADD\s+(PARTITION)\b", re.I), "add_partition", "inplace", "none"),
+    (re.compile(r"^ADD\s+(COLUMN\s+)?.*\bAUTO_INCREMENT\b", re.I), "add_column", "inplace", "shared"),
+    (re.compile(r"^ADD\s+(COLUMN\s+)?.*\bSTORED\b", re.I), "add_column", "copy", "shared"),
+    (re.compile(r"^ADD\s+", re.I), "add_column", "instant", "none"),
+    (re.compile(r"^DROP\s+PRIMARY\s+KEY\b", re.I), "drop_primary_key", "copy", "shared"),
+    (re.compile(r"^DROP\s+(INDEX|KEY)\b", re.I), "drop_index", "inplace", "none"),
+    (re.compile(r"^DROP\s+(FOREIGN\s+KEY|CONSTRAINT)\b", re.I), "drop_constraint", "inplace", "none"),
+    (re.compile(r"^DROP\s+CHECK\b", re.I), "drop_constraint", "instant", "none"),
+    (re.compile(r"^(DROP|TRUNCATE|COALESCE|REORGANIZE|EXCHANGE|REBUILD)\s+PARTITION\b", re.I),
+     "partition_maintenance", "inplace", "none"),
+    (re.compile(r"^DROP\s+", re.I), "drop_column", "instant", "none"),
+    (re.compile(r"^RENAME\s+COLUMN\b", re.I), "rename_column", "instant", "none"),
+    (re.compile(r"^RENAME\s+(INDEX|KEY)\b", re.I), "rename_index", "inplace", "none"),
+    (re.compile(r"^RENAME\b", re.I), "rename_table", "instant", "none"),
+    (re.compile(r"^ALTER\s+(COLUMN\s+)?\S+\s+(SET|DROP)\s+(DEFAULT|VISIBLE|INVISIBLE)\b", re.I),
+     "set_default", "instant", "none"),
+    (re.compile(r"^ALTER\s+INDEX\b", re.I), "index_visibility", "instant", "none"),
+    (re.compile(r"^(MODIFY|CHANGE)\b", re.I), "modify_column", "copy", "shared"),
+    (re.compile(r"^CONVERT\s+TO\b", re.I), "convert_charset", "copy", "shared"),
+    (re.compile(r"^(ENGINE|ROW_FORMAT|KEY_BLOCK_SIZE|FORCE)\b", re.I), "rebuild", "inplace", "none"),
+    (re.compile(r"^REMOVE\s+PARTITIONING\b", re.I), "repartition", "copy", "shared"),
+    (re.compile(r"^(AUTO_INCREMENT|COMMENT|STATS_\w+)\b", re.I), "table_option", "instant", "none"),
+    (re.compile(r"^(ALGORITHM|LOCK)\b", re.I), None, None, None),
+]
+_PARTITION_BY_RE = re.compile(r"\bPARTITION\s+BY\b", re.IGNORECASE)
+
+_RANK = {"instant": 0, "inplace": 1, "copy": 2}
+_LOCK_RANK = {"none": 0, "shared": 1, "exclusive": 2}
+
+
+def _table(match: re.Match) -> str:
+    return match.group(2) or match.group(1)
+
+
+def split_clauses(body: str) -> list[str]:
+    """Split an ALTER TABLE body on top-level commas (ignoring parentheses and quotes)."""
+    clauses, depth, quote, current = [], 0, None, []
+    for ch in body:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            clauses.append("".join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    if "".join(current).strip():
+        clauses.append("".join(current).strip())
+    return clauses
+
+
+def _classify_alter(table: str, body: str) -> dict:
+    partition_by = _PARTITION_BY_RE.search(body)
+    clauses_text = body[:partition_by.start()] if partition_by else body
+    ops: list[str] = []
+    algorithm, lock = None, "none"
+    for clause in split_clauses(clauses_text):
+        for pattern, op, algo, clause_lock in _CLAUSE_RULES:
+            if pattern.match(clause):
+                if op:
+                    ops.append(op)
+                    if algorithm is None or _RANK[algo] > _RANK[algorithm]:
+                        algorithm = algo
+                    if _LOCK_RANK[clause_lock] > _LOCK_RANK[lock]:
+                        lock = clause_lock
+                break
+        else:
+            ops.append("other")
+            algorithm, lock = "copy", "shared"
+    # DROP + ADD PRIMARY KEY in one statement is an in-place rebuild
+    if "drop_primary_key" in ops and "add_primary_key" in ops:
+        ops.remove("drop_primary_key")
+        if algorithm == "copy" and not {"add_foreign_key", "add_check", "modify_column",
+                                        "convert_charset", "other"} & set(ops):
+            algorithm, lock = "inplace", "none"
+    if partition_by:
+        ops.append("repartition")
+        algorithm, lock = "copy", "shared"
+    return {
+        "operation": "+".join(dict.fromkeys(ops)) or "alter_table",
+        "table": table,
+        "algorithm": algorithm or "instant",
+        "lock": lock,
+    }
+
+
+def classify_statement(sql: str) -> dict:
+    """Return ``{"operation", "table", "algorithm", "lock"}`` for one statement."""
+    sql = sql.strip()
+    result: dict
+    if m := _ALTER_RE.match(sql):
+        result = _classify_alter(_table(m), m.group(3))
+    elif m := _CREATE_INDEX_RE.match(sql):
+        special = (m.group(1) or "").strip().upper() in ("FULLTEXT", "SPATIAL")
+        result = {"operation": "add_index", "table": m.group(3) or m.group(2),
+                  "algorithm": "inplace", "lock": "shared" if special else "none"}
+    elif m := _CREATE_TABLE_RE.match(sql):
+        # CREATE TABLE … SELECT copies rows; anything else starts empty
+        ctas = _CTAS_RE.match(m.group(3))
+        result = {"operation": "create_table_as_select" if ctas else "create_table",
+                  "table": _table(m), "algorithm": "none" if ctas else "instant",
+                  "lock": "none"}
+    elif m := _DROP_INDEX_RE.match(sql):
+        result = {"operation": "drop_index", "table": _table(m),
+                  "algorithm": "inplace", "lock": "none"}
+    elif m := _DROP_TABLE_RE.match(sql):
+        result = {"operation": "drop_table", "table": _table(m),
+                  "algorithm": "instant", "lock": "exclusive"}
+    elif m := _TRUNCATE_RE.match(sql):
+        result = {"operation": "truncate_table", "table": _table(m),
+                  "algorithm": "instant", "lock": "exclusive"}
+    elif m := _RENAME_TABLE_RE.match(sql):
+        result = {"operation": "rename_table", "table": _table(m),
+                  "algorithm": "instant", "lock": "exclusive"}
+    elif m := _INSERT_RE.match(sql):
+        result = {"operation": m.group(1).lower(), "table": m.group(3) or m.group(2),
+                  "algorithm": "none", "lock": "row"}
+    elif m := _UPDATE_RE.match(sql):
+        result = {"operation": "update", "table": _table(m), "algorithm": "none", "lock": "row"}
+    elif m := _DELETE_RE.match(sql):
+        result = {"operation": "delete", "table": _table(m), "algorithm": "none", "lock": "row"}
+    else:
+        words = re.sub(r"\s+OR\s+REPLACE\b", "", sql, flags=re.I).lower().split(None, 2) or ["other"]
+        keyword = "_".join(words[:2]) if words[0] in ("create", "drop") else words[0]
+        result = {"operation": keyword, "table": None, "algorithm": "instant", "lock": "none"}
+
+    if result["algorithm"] in ALGORITHMS:
+        if m := _EXPLICIT_ALGO_RE.search(sql):
+            result["algorithm"] = m.group(1).lower()
+        if m := _EXPLICIT_LOCK_RE.search(sql):
+            result["lock"] = m.group(1).lower()
+    return result
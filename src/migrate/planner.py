@@ -0,0 +1,143 @@
+"""
+Planning dry-run for pending changesets (``update_sql --plan``).
+
+Nothing is executed.  For each pending changeset the plan lists its
+statements with:
+
+  - the operation, target table and expected algorithm / lock
+    (``online_ddl.classify_statement``),
+  - the target table's current size from INFORMATION_SCHEMA (tables created
+    earlier in the same plan count as empty),
+  - a predicted duration from ``ops_migration_statements`` history.
+
+Durations are predicted from the most specific history available:
+
+  1. the same statement (by digest) ran before,
+  2. statements of the same operation and algorithm ran before,
+
+scaling the median milliseconds per row by the table's current size when
+the history recorded sizes, and using the median duration otherwise.
+Instant / metadata-only statements without history are estimated at zero;
+anything else without history is reported as unknown.
+"""
+
+import json
+import logging
+import statistics
+
+from ..db import fetch_all, split_statements
+from .changelog import resolve_sql
+from .online_ddl import SIZE_DEPENDENT, classify_statement
+from .policy import check_policy
+from .preconditions import evaluate_preconditions
+from .profiling import statement_digest
+
+logger = logging.getLogger("migrate")
+
+# Most recent successful statements considered for predictions
+HISTORY_LIMIT = 5000
+
+
+def _sample_rows(algorithm: str, table_rows, rows_affected) -> int | None:
+    if table_rows:
+        return int(table_rows)
+    # a COPY ALTER or DML reports the rows it touched
+    if algorithm in ("copy", "none") and rows_affected:
+        return int(rows_affected)
+    return None
+
+
+class DurationModel:
+    """Historical per-statement timings grouped by digest and by operation class."""
+
+    def __init__(self, history: list[tuple]):
+        self.by_digest: dict[str, list[tuple]] = {}
+        self.by_class: dict[tuple, list[tuple]] = {}
+        for sql_text, digest, duration_ms, rows_affected, table_rows in history:
+            info = classify_statement(sql_text)
+            sample = (float(duration_ms),
+                      _sample_rows(info["algorithm"], table_rows, rows_affected))
+            self.by_digest.setdefault(digest, []).append(sample)
+            self.by_class.setdefault((info["operation"], info["algorithm"]), []).append(sample)
+
+    @classmethod
+    def load(cls, conn, limit: int = HISTORY_LIMIT) -> "DurationModel":
+        rows = fetch_all(conn, """
+            SELECT sql_text, sql_digest, duration_ms, rows_affected, table_rows
+            FROM ops_migration_statements
+            WHERE status = 'ok'
+              AND (coalesced_group IS NULL OR coalesced_group = changeset_id)
+            ORDER BY id DESC
+            LIMIT %s
+        """, (limit,))
+        return cls(rows)
+
+    def estimate(self, sql: str, info: dict, table_rows: int | None) -> tuple[float | None, str]:
+        """Return ``(milliseconds or None, source)`` for one statement."""
+        candidates = [
+            ("same_statement", self.by_digest.get(statement_digest(sql))),
+            ("same_operation", self.by_class.get((info["operation"], info["algorithm"]))),
+        ]
+        for source, samples in candidates:
+            if not samples:
+                continue
+            rated = [ms / rows for ms, rows in samples if rows]
+            if rated and table_rows is not None and info["algorithm"] in SIZE_DEPENDENT:
+                return round(statistics.median(rated) * table_rows, 1), f"{source}:per_row"
+            return round(statistics.median(ms for ms, _ in samples), 1), f"{source}:median"
+        if info["algorithm"] == "instant":
+            return 0.0, "metadata_only"
+        return None, "no_history"
+
+
+def table_sizes(conn) -> dict[str, dict]:
+    rows = fetch_all(conn, """
+        SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+    """)
+    return {r[0].lower(): {"rows": int(r[1] or 0), "bytes": int(r[2] or 0)} for r in rows}
+
+
+def plan_changesets(conn, pending: list[dict], base_dir: str = ".") -> list[dict]:
+    """Build the plan for *pending* changesets without executing any of them."""
+    model = DurationModel.load(conn)
+    sizes = table_sizes(conn)
+    plans = []
+    for cs in pending:
+        sql_text = resolve_sql(cs, base_dir)
+        plan = {"id": cs["id"], "author": cs["author"], "sqlFile": cs["sqlFile"],
+                "risk": cs["risk"], "outcome": "apply", "statements": []}
+        try:
+            check_policy(sql_text, cs)
+            if evaluate_preconditions(conn, cs.get("preconditions", [])) == "SKIP":
+                plan["outcome"] = "mark_ran"
+        except RuntimeError as exc:
+            plan["outcome"] = f"blocked: {exc}"
+
+        for index, stmt in enumerate(split_statements(sql_text), start=1):
+            info = classify_statement(stmt)
+            table = (info["table"] or "").lower()
+            size = sizes.get(table)
+            est_ms, source = model.estimate(stmt, info, size["rows"] if size else None)
+            plan["statements"].append({
+                "index": index, "sql": " ".join(stmt.split())[:200], **info,
+                "table_rows": size["rows"] if size else None,
+                "table_bytes": size["bytes"] if size else None,
+                "est_ms": est_ms, "estimate_source": source,
+            })
+            if info["operation"] == "create_table" and table not in sizes:
+                sizes[table] = {"rows": 0, "bytes": 0}
+
+        counted = plan["statements"] if plan["outcome"] == "apply" else []
+        plan["est_ms"] = round(sum(s["est_ms"] or 0 for s in counted), 1)
+        plan["unknown_estimates"] = sum(1 for s in counted if s["est_ms"] is None)
+        plan["locks"] = sorted({s["lock"] for s in counted if s["lock"] not in ("none", "row")})
+        plans.append(plan)
+        logger.info(json.dumps({
+            "event": "changeset_plan", "id": cs["id"], "outcome": plan["outcome"],
+            "statements": len(plan["statements"]), "est_ms": plan["est_ms"],
+            "unknown_estimates": plan["unknown_estimates"],
+            "algorithms": sorted({s["algorithm"] for s in plan["statements"]}),
+        }))
+    return plans
@@ -0,0 +1,227 @@
+"""
+Per-statement profiling for migration changesets.
+
+Each statement of a changeset is executed and timed individually.  For every
+statement the runner records its duration, affected rows and warnings, and
+(when ``MIGRATION_PROFILE=stages``) the performance_schema stage breakdown.
+The records are stored in ``ops_migration_statements`` keyed by run and
+changeset, together with the target table's estimated row count for
+statements whose duration grows with table size (used by ``planner.py``).
+A coalesced ALTER (``update --coalesce-alters``) is recorded under every
+member changeset with ``coalesced_group`` set to the first member's id;
+summaries across changesets count it once, under that first member.
+
+MIGRATION_PROFILE:
+    off        – execute the script without per-statement records
+    statements – time each statement, capture rows + warnings (default)
+    stages     – additionally read events_stages_history_long; requires the
+                 ``events_stages_history_long`` consumer to be enabled
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from ..db import fetch_all, split_statements
+from .online_ddl import SIZE_DEPENDENT, classify_statement
+
+logger = logging.getLogger("migrate")
+
+PROFILE_LEVELS = ("off", "statements", "stages")
+
+# Stored SQL text is truncated; the digest identifies the full statement.
+_MAX_SQL_TEXT = 4000
+_WS_RE = re.compile(r"\s+")
+_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b")
+_PUNCT_RE = re.compile(r"\s*([(),=])\s*")
+
+
+def profile_level() -> str:
+    """Return the profiling level from ``MIGRATION_PROFILE`` (default ``statements``)."""
+    level = os.getenv("MIGRATION_PROFILE", "statements").strip().lower()
+    if level not in PROFILE_LEVELS:
+        raise RuntimeError(
+            f"Invalid MIGRATION_PROFILE '{level}'; expected one of {', '.join(PROFILE_LEVELS)}."
+        )
+    return level
+
+
+def statement_digest(sql: str) -> str:
+    """Digest of *sql* with literals and whitespace normalised, for grouping across runs."""
+    normalised = _LITERAL_RE.sub("?", _WS_RE.sub(" ", sql).strip())
+    normalised = _PUNCT_RE.sub(r"\1", normalised).lower()
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+
+def _read_stages(cur) -> list[dict]:
+    """Stage timings of the statement that just ran on this connection."""
+    cur.execute("""
+        SELECT s.EVENT_NAME, ROUND(s.TIMER_WAIT / 1000000000, 3)
+        FROM performance_schema.events_stages_history_long s
+        WHERE s.THREAD_ID = PS_CURRENT_THREAD_ID()
+          AND s.NESTING_EVENT_ID = (
+              SELECT MAX(h.EVENT_ID)
+              FROM performance_schema.events_statements_history h
+              WHERE h.THREAD_ID = PS_CURRENT_THREAD_ID()
+                AND h.EVENT_NAME <> 'statement/sql/show_warnings'
+          )
+        ORDER BY s.EVENT_ID
+    """)
+    return [
+        {"stage": name.replace("stage/sql/", ""), "ms": float(ms or 0)}
+        for name, ms in cur.fetchall()
+    ]
+
+
+def _table_rows(cur, sql: str) -> int | None:
+    info = classify_statement(sql)
+    if not info["table"] or info["algorithm"] not in SIZE_DEPENDENT:
+        return None
+    cur.execute("""
+        SELECT TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (info["table"],))
+    row = cur.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def execute_profiled(conn, sql_text: str, records: list[dict], level: str = "statements") -> None:
+    """
+    Execute *sql_text* statement by statement, appending one record per
+    statement to *records*.
+
+    Records are appended before any exception propagates, so the failing
+    statement is profiled too.
+    """
+    for index, stmt in enumerate(split_statements(sql_text), start=1):
+        record = {
+            "index": index,
+            "sql": stmt,
+            "status": "ok",
+            "rows": None,
+            "table_rows": None,
+            "warnings": [],
+            "stages": None,
+            "error": None,
+        }
+        cur = conn.cursor()
+        try:
+            record["table_rows"] = _table_rows(cur, stmt)
+        except Exception:
+            pass  # size is only a planning hint
+        start = time.perf_counter()
+        try:
+            cur.execute(stmt)
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            record["rows"] = cur.rowcount if cur.rowcount is not None and cur.rowcount >= 0 else None
+            if cur.with_rows:
+                cur.fetchall()
+            if getattr(cur, "warning_count", 0):
+                cur.execute("SHOW WARNINGS")
+                record["warnings"] = [
+                    {"level": lvl, "code": code, "message": msg}
+                    for lvl, code, msg in cur.fetchall()
+                ]
+            if level == "stages":
+                try:
+                    record["stages"] = _read_stages(cur)
+                except Exception as exc:  # performance_schema off or no privilege
+                    record["stages"] = None
+                    logger.warning(json.dumps({
+                        "event": "statement_stages_unavailable", "error": str(exc),
+                    }))
+                    level = "statements"
+            conn.commit()
+        except Exception as exc:
+            record.setdefault("duration_ms", round((time.perf_counter() - start) * 1000, 3))
+            record["status"] = "failed"
+            record["error"] = str(exc)
+            records.append(record)
+            raise
+        finally:
+            cur.close()
+        records.append(record)
+        if record["warnings"]:
+            logger.warning(json.dumps({
+                "event": "statement_warnings", "index": index,
+                "warnings": record["warnings"],
+            }))
+
+
+def save_statement_profile(conn, run_id: str, changeset: dict, records: list[dict],
+                           coalesced_group: str | None = None) -> None:
+    """Insert *records* for one changeset into ops_migration_statements."""
+    if not records:
+        return
+    rows = [
+        (
+            run_id, changeset["id"], changeset["author"], coalesced_group, r["index"],
+            r["sql"][:_MAX_SQL_TEXT], statement_digest(r["sql"]), r["duration_ms"],
+            r["rows"], r.get("table_rows"), len(r["warnings"]),
+            json.dumps(r["warnings"]) if r["warnings"] else None,
+            json.dumps(r["stages"]) if r["stages"] is not None else None,
+            r["status"], r["error"],
+        )
+        for r in records
+    ]
+    cur = conn.cursor()
+    try:
+        cur.executemany("""
+            INSERT INTO ops_migration_statements
+                (run_id, changeset_id, author, coalesced_group, stmt_index, sql_text,
+                 sql_digest, duration_ms, rows_affected, table_rows, warning_count, warnings,
+                 stages, status, error_message)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, rows)
+        conn.commit()
+    finally:
+        cur.close()
+
+
+def slowest_statements(conn, limit: int = 20, run_id: str | None = None,
+                       changeset_id: str | None = None) -> list[dict]:
+    """Summarise the slowest statements (grouped by digest) across recorded runs."""
+    where, params = [], []
+    if run_id:
+        where.append("run_id = %s")
+        params.append(run_id)
+    if changeset_id:
+        where.append("changeset_id = %s")
+        params.append(changeset_id)
+    else:
+        # a coalesced ALTER ran once for its whole group
+        where.append("(coalesced_group IS NULL OR coalesced_group = changeset_id)")
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    rows = fetch_all(conn, f"""
+        SELECT sql_digest,
+               MIN(changeset_id),
+               MIN(sql_text),
+               COUNT(*),
+               COUNT(DISTINCT run_id),
+               ROUND(MAX(duration_ms), 3),
+               ROUND(AVG(duration_ms), 3),
+               ROUND(SUM(duration_ms), 3),
+               SUM(COALESCE(rows_affected, 0)),
+               SUM(warning_count),
+               SUM(status = 'failed'),
+               MAX(executed_at)
+        FROM ops_migration_statements
+        {clause}
+        GROUP BY sql_digest
+        ORDER BY MAX(duration_ms) DESC
+        LIMIT %s
+    """, (*params, limit))
+    return [
+        {
+            "digest": r[0], "changeset_id": r[1], "sql": r[2],
+            "executions": int(r[3]), "runs": int(r[4]),
+            "max_ms": float(r[5]), "avg_ms": float(r[6]), "total_ms": float(r[7]),
+            "rows_affected": int(r[8] or 0), "warnings": int(r[9] or 0),
+            "failures": int(r[10] or 0),
+            "last_executed": r[11].isoformat() if r[11] else None,
+        }
+        for r in rows
+    ]
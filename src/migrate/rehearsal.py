@@ -0,0 +1,275 @@
+"""
+Shadow-database rehearsal of pending changesets (``rehearse``).
+
+Nothing is applied to the configured database.  The rehearsal:
+
+  1. dumps the schema plus at most ``sample_rows`` rows per table
+     (``create_backup``; ``0`` = schema only) and the full changelog tables,
+  2. restores both into a scratch schema on the rehearsal server
+     (REHEARSAL_DB_* settings, defaulting to DB_*),
+  3. applies the pending changesets there with ``update_cmd`` and
+     per-statement profiling,
+  4. scales every size-dependent statement's duration by the target
+     table's production / sample row ratio,
+  5. builds the expected schema by applying the whole changelog to a second,
+     empty scratch schema and diffs the two (``SHOW CREATE TABLE``).
+
+Scaling is linear, which is right for copy/rebuild ALTERs and full-table
+DML and conservative for index builds.  A size-dependent statement on a
+table the sample left empty cannot be scaled and is reported as such.
+
+Both scratch schemas are dropped afterwards unless ``keep`` is set.
+"""
+
+import difflib
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import uuid
+from pathlib import Path
+
+from ..db import execute, fetch_all, fetch_one, get_conn, use_database
+from .drift import UNMANAGED_TABLE_RE
+from .online_ddl import SIZE_DEPENDENT, classify_statement
+from .planner import table_sizes
+from .runner import create_backup, status_cmd, update_cmd
+
+logger = logging.getLogger("migrate")
+
+# Dumped in full: the rehearsal must see exactly what has been applied
+CHANGELOG_TABLES = ("DATABASECHANGELOG", "DATABASECHANGELOGLOCK")
+
+_AUTO_INCREMENT_RE = re.compile(r"\s+AUTO_INCREMENT=\d+")
+# partitions are added and dropped by partition maintenance; keep only the scheme
+_PARTITION_LIST_RE = re.compile(r"\s*\(\s*PARTITION\s.*$", re.IGNORECASE | re.DOTALL)
+
+
+def scratch_settings() -> dict:
+    """Connection settings for the rehearsal server, falling back to DB_*."""
+    base = os.getenv("DB_NAME", "migration_db")
+    return {
+        "host": os.getenv("REHEARSAL_DB_HOST") or os.getenv("DB_HOST", "127.0.0.1"),
+        "port": os.getenv("REHEARSAL_DB_PORT") or os.getenv("DB_PORT", "3306"),
+        "user": os.getenv("REHEARSAL_DB_USER") or os.getenv("DB_USER", "root"),
+        "password": os.getenv("REHEARSAL_DB_PASSWORD", os.getenv("DB_PASSWORD", "")),
+        "database": os.getenv("REHEARSAL_DB_NAME") or f"{base}_rehearsal",
+    }
+
+
+def mysql_cli(settings: dict, sql: str | None = None, database: str | None = None,
+           input_file: str | None = None) -> None:
+    cmd = ["mysql", "-h", settings["host"], "-P", str(settings["port"]),
+           "-u", settings["user"], f"-p{settings['password']}"]
+    if database:
+        cmd.append(database)
+    if sql:
+        cmd.extend(["-e", sql])
+    if input_file:
+        with open(input_file) as f:
+            result = subprocess.run(cmd, stdin=f, capture_output=True, text=True)
+    else:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"mysql failed on {database or settings['host']}: {result.stderr.strip()}")
+
+
+def recreate_database(settings: dict, database: str) -> None:
+    mysql_cli(settings, f"DROP DATABASE IF EXISTS `{database}`; CREATE DATABASE `{database}`")
+
+
+def drop_database(settings: dict, database: str) -> None:
+    try:
+        mysql_cli(settings, f"DROP DATABASE IF EXISTS `{database}`")
+    except RuntimeError as exc:
+        logger.warning(json.dumps({"event": "rehearsal_drop_failed", "database": database,
+                                   "error": str(exc)}))
+
+
+def row_counts(conn) -> dict[str, int]:
+    """Exact row count per base table (the scratch copy only holds samples)."""
+    tables = fetch_all(conn, """
+        SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+    """)
+    return {t.lower(): int(fetch_one(conn, f"SELECT COUNT(*) FROM `{t}`")[0]) for (t,) in tables}
+
+
+def schema_snapshot(conn) -> dict[str, str]:
+    """Normalised ``SHOW CREATE TABLE`` per changelog-managed table."""
+    tables = fetch_all(conn, """
+        SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    snapshot = {}
+    for (table,) in tables:
+        if UNMANAGED_TABLE_RE.match(table):
+            continue
+        ddl = fetch_one(conn, f"SHOW CREATE TABLE `{table}`")[1]
+        snapshot[table.lower()] = normalise_ddl(ddl)
+    return snapshot
+
+
+def normalise_ddl(ddl: str) -> str:
+    """Drop what legitimately differs between copies: counters and partition lists."""
+    ddl = _AUTO_INCREMENT_RE.sub("", ddl)
+    ddl = _PARTITION_LIST_RE.sub("", ddl.replace("/*!50100 ", "").replace("/*!50500 ", ""))
+    return "\n".join(line.rstrip() for line in ddl.rstrip(" */\n").splitlines())
+
+
+def diff_schemas(actual: dict[str, str], expected: dict[str, str]) -> list[dict]:
+    """Tables missing, unexpected or different in *actual* compared with *expected*."""
+    diffs = []
+    for table in sorted(set(actual) | set(expected)):
+        if table not in actual:
+            diffs.append({"table": table, "change": "missing", "diff": []})
+        elif table not in expected:
+            diffs.append({"table": table, "change": "unexpected", "diff": []})
+        elif actual[table] != expected[table]:
+            diffs.append({"table": table, "change": "differs", "diff": list(difflib.unified_diff(
+                expected[table].splitlines(), actual[table].splitlines(),
+                "expected", "rehearsed", lineterm="", n=0))})
+    return diffs
+
+
+def scale_timings(statements: list[dict], sample_rows: dict[str, int],
+                  prod_sizes: dict[str, dict]) -> list[dict]:
+    """
+    Add ``scale`` and ``scaled_ms`` to each statement: size-dependent work is
+    scaled by production / sample rows of its table, metadata-only work and
+    tables new in this run are taken as measured.
+    """
+    scaled = []
+    for stmt in statements:
+        info = classify_statement(stmt["sql"])
+        table = (info["table"] or "").lower()
+        in_sample = sample_rows.get(table)
+        prod = prod_sizes.get(table, {}).get("rows")
+        scale = 1.0
+        if info["algorithm"] in SIZE_DEPENDENT and prod:
+            # an empty sample of a non-empty table says nothing about its cost
+            scale = prod / in_sample if in_sample else None
+        scaled.append({
+            **stmt, **info, "sample_rows": in_sample, "prod_rows": prod,
+            "scale": None if scale is None else round(scale, 3),
+            # never scale down: production TABLE_ROWS is only an estimate
+            "scaled_ms": None if scale is None else round(stmt["duration_ms"] * max(scale, 1.0), 1),
+        })
+    return scaled
+
+
+def _apply(settings: dict, database: str, changelog_path: str, base_dir: str,
+           context: str | None, profiling: str, run_id: str) -> str | None:
+    try:
+        with use_database(**{**settings, "database": database}):
+            update_cmd(changelog_path, base_dir, context, auto_backup=False,
+                       profiling=profiling, run_id=run_id)
+        return None
+    except RuntimeError as exc:
+        return str(exc)
+
+
+def rehearse(changelog_path: str = "changelog/changelog.yml", base_dir: str = ".",
+             context: str | None = None, sample_rows: int = 1000,
+             keep: bool = False) -> dict:
+    """Rehearse the pending changesets on a scratch copy and return the report."""
+    settings = scratch_settings()
+    rehearsal_db = settings["database"]
+    expected_db = f"{rehearsal_db}_expected"
+    run_id = str(uuid.uuid4())
+
+    pending = status_cmd(changelog_path, base_dir, context)
+    conn = get_conn()
+    try:
+        prod_sizes = table_sizes(conn)
+        prod_db = fetch_one(conn, "SELECT DATABASE()")[0]
+    finally:
+        conn.close()
+    if (settings["host"], str(settings["port"]), rehearsal_db) == (
+            os.getenv("DB_HOST"), os.getenv("DB_PORT", "3306"), prod_db):
+        raise RuntimeError("Rehearsal database must differ from the configured database")
+
+    report = {"run_id": run_id, "rehearsal_db": rehearsal_db, "expected_db": expected_db,
+              "sample_rows": sample_rows, "pending": [cs["id"] for cs in pending],
+              "error": None, "statements": [], "schema_diff": [], "expected_error": None,
+              "sample_ms": 0.0, "scaled_ms": 0.0, "unscaled": 0}
+    if not pending:
+        return report
+
+    logger.info(json.dumps({"event": "rehearsal_start", "run_id": run_id,
+                            "rehearsal_db": rehearsal_db, "pending": len(pending),
+                            "sample_rows": sample_rows}))
+    with tempfile.TemporaryDirectory(prefix="rehearsal_") as tmp:
+        data_dump = str(Path(tmp) / "sample.sql")
+        changelog_dump = str(Path(tmp) / "changelog.sql")
+        create_backup(data_dump, backup_type="rehearsal", schema_only=sample_rows == 0,
+                      sample_rows=sample_rows or None, ignore_tables=list(CHANGELOG_TABLES),
+                      record_metadata=False)
+        create_backup(changelog_dump, backup_type="rehearsal", tables=list(CHANGELOG_TABLES),
+                      record_metadata=False)
+        recreate_database(settings, rehearsal_db)
+        mysql_cli(settings, database=rehearsal_db, input_file=data_dump)
+        mysql_cli(settings, database=rehearsal_db, input_file=changelog_dump)
+
+    try:
+        with use_database(**settings):
+            conn = get_conn()
+            try:
+                # a lock held in production at dump time must not block the copy
+                execute(conn, "UPDATE DATABASECHANGELOGLOCK "
+                              "SET LOCKED = 0, LOCKGRANTED = NULL, LOCKEDBY = NULL")
+                sample = row_counts(conn)
+            finally:
+                conn.close()
+
+        report["error"] = _apply(settings, rehearsal_db, changelog_path, base_dir, context,
+                                 "statements", run_id)
+
+        with use_database(**settings):
+            conn = get_conn()
+            try:
+                rows = fetch_all(conn, """
+                    SELECT changeset_id, stmt_index, sql_text, duration_ms, rows_affected,
+                           status, error_message
+                    FROM ops_migration_statements
+                    WHERE run_id = %s
+                    ORDER BY id
+                """, (run_id,))
+                rehearsed = schema_snapshot(conn)
+            finally:
+                conn.close()
+        report["statements"] = scale_timings([
+            {"changeset_id": r[0], "index": int(r[1]), "sql": r[2],
+             "duration_ms": float(r[3]), "rows_affected": r[4], "status": r[5], "error": r[6]}
+            for r in rows
+        ], sample, prod_sizes)
+
+        recreate_database(settings, expected_db)
+        report["expected_error"] = _apply(settings, expected_db, changelog_path, base_dir,
+                                          context, "off", str(uuid.uuid4()))
+        if report["expected_error"] is None:
+            with use_database(**{**settings, "database": expected_db}):
+                conn = get_conn()
+                try:
+                    expected = schema_snapshot(conn)
+                finally:
+                    conn.close()
+            report["schema_diff"] = diff_schemas(rehearsed, expected)
+    finally:
+        if not keep:
+            drop_database(settings, rehearsal_db)
+            drop_database(settings, expected_db)
+
+    timed = report["statements"]
+    report["sample_ms"] = round(sum(s["duration_ms"] for s in timed), 1)
+    report["scaled_ms"] = round(sum(s["scaled_ms"] or 0 for s in timed), 1)
+    report["unscaled"] = sum(1 for s in timed if s["scaled_ms"] is None)
+    logger.info(json.dumps({
+        "event": "rehearsal_summary", "run_id": run_id, "error": report["error"],
+        "statements": len(timed), "sample_ms": report["sample_ms"],
+        "scaled_ms": report["scaled_ms"], "unscaled": report["unscaled"],
+        "schema_differences": len(report["schema_diff"]), "kept": keep,
+    }))
+    return report
@@ -6,8 +6,13 @@ Commands
 validate   – validate the changelog YAML + referenced SQL files (offline).
 status     – show pending changesets for a given context.
 update     – apply pending changesets (lock → audit → policy → preconditions → execute).
-update_sql – dry-run: print the SQL that *would* run.
+update_sql – dry-run: print the SQL that *would* run; with --plan, report
+             per statement the algorithm, lock, table size and predicted
+             duration instead (executes nothing).
 verify     – confirm all applied checksums match the current SQL files.
+drift      – compare the live schema with the fingerprint recorded after the
+             last applied changeset (also checked by status / update).
+profile    – summarise the slowest recorded migration statements.
 """
 
 import json
@@ -18,10 +23,19 @@ import subprocess
 from datetime import datetime
 from pathlib import Path
 
-from ..db import get_conn, fetch_one, fetch_all, execute, execute_script
-from .changelog import load_changelog, resolve_sql, checksum
+from ..db import (
+    get_conn, fetch_one, fetch_all, execute, execute_script, ensure_column, ensure_index,
+)
+from .changelog import load_changelog, resolve_sql, resolve_down_sql, checksum
+from .coalesce import merged_statement, plan_groups
+from .inverse import capture_definitions, derive_inverse
+from .drift import (
+    check_drift, drift_check_mode, ensure_fingerprint_table, record_fingerprint, report_drift,
+)
 from .preconditions import evaluate_preconditions
+from .planner import plan_changesets
 from .policy import check_policy, should_handle_gracefully
+from .profiling import execute_profiled, profile_level, save_statement_profile, slowest_statements
 
 logger = logging.getLogger("migrate")
 
@@ -31,8 +45,9 @@ logger = logging.getLogger("migrate")
 # ---------------------------------------------------------------------------
 
 def _bootstrap_tables(conn) -> None:
-    """Create the DATABASECHANGELOGLOCK, DATABASECHANGELOG, and
-    ops_migration_runs tables if they do not yet exist."""
+    """Create the DATABASECHANGELOGLOCK, DATABASECHANGELOG, ops_migration_runs,
+    ops_migration_statements, ops_rollback_runs, ops_backup_metadata and
+    ops_schema_fingerprints tables if they do not yet exist."""
 
     execute(conn, """
         CREATE TABLE IF NOT EXISTS DATABASECHANGELOGLOCK (
@@ -59,9 +74,18 @@ def _bootstrap_tables(conn) -> None:
             COMMENTS      TEXT         NULL,
             LABELS        VARCHAR(255) NULL,
             CONTEXTS      VARCHAR(255) NULL,
-            PRIMARY KEY (ID, AUTHOR)
+            PRIMARY KEY (ID, AUTHOR),
+            KEY idx_dcl_orderexecuted (ORDEREXECUTED),
+            KEY idx_dcl_dateexecuted (DATEEXECUTED)
         ) ENGINE=InnoDB
     """)
+    # Checksum of the changeset's down-script when it was applied
+    ensure_column(conn, "DATABASECHANGELOG", "DOWNSUM", "CHAR(64) NULL AFTER MD5SUM")
+    # Inverse of the changeset's DDL, derived when it was applied
+    ensure_column(conn, "DATABASECHANGELOG", "INVERSE_SQL", "LONGTEXT NULL AFTER DOWNSUM")
+    # History APIs page by ORDEREXECUTED and filter by DATEEXECUTED
+    ensure_index(conn, "DATABASECHANGELOG", "idx_dcl_orderexecuted", "ORDEREXECUTED")
+    ensure_index(conn, "DATABASECHANGELOG", "idx_dcl_dateexecuted", "DATEEXECUTED")
 
     execute(conn, """
         CREATE TABLE IF NOT EXISTS ops_migration_runs (
@@ -78,6 +102,64 @@ def _bootstrap_tables(conn) -> None:
         ) ENGINE=InnoDB
     """)
 
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_migration_statements (
+            id            BIGINT        NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            run_id        CHAR(36)      NOT NULL,
+            changeset_id  VARCHAR(255)  NOT NULL,
+            author        VARCHAR(255)  NOT NULL,
+            stmt_index    INT           NOT NULL,
+            sql_text      TEXT          NOT NULL,
+            sql_digest    CHAR(64)      NOT NULL,
+            duration_ms   DECIMAL(14,3) NOT NULL,
+            rows_affected BIGINT        NULL,
+            table_rows    BIGINT        NULL,
+            warning_count INT           NOT NULL DEFAULT 0,
+            warnings      LONGTEXT      NULL,
+            stages        LONGTEXT      NULL,
+            status        ENUM('ok','failed') NOT NULL,
+            error_message TEXT          NULL,
+            executed_at   TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            KEY idx_mstmt_run (run_id, changeset_id),
+            KEY idx_mstmt_digest (sql_digest),
+            KEY idx_mstmt_duration (duration_ms)
+        ) ENGINE=InnoDB
+    """)
+    # Target-table size when the statement ran, for duration planning
+    ensure_column(conn, "ops_migration_statements", "table_rows", "BIGINT NULL AFTER rows_affected")
+    # First member of a coalesced ALTER group, on every member's rows
+    ensure_column(conn, "ops_migration_statements", "coalesced_group",
+                  "VARCHAR(255) NULL AFTER author")
+
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_rollback_runs (
+            run_id             CHAR(36)     PRIMARY KEY,
+            target_version     VARCHAR(255) NOT NULL,
+            backup_file        VARCHAR(512) NULL,
+            status             ENUM('started','completed','failed') NOT NULL,
+            started_at         TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            completed_at       TIMESTAMP    NULL,
+            removed_migrations LONGTEXT     NULL,
+            error_message      TEXT         NULL
+        ) ENGINE=InnoDB
+    """)
+    # down_scripts or backup_restore
+    ensure_column(conn, "ops_rollback_runs", "method", "VARCHAR(16) NULL AFTER backup_file")
+
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_backup_metadata (
+            id          BIGINT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            backup_file VARCHAR(512) NOT NULL,
+            file_size   BIGINT       NULL,
+            environment VARCHAR(32)  NULL,
+            backup_type VARCHAR(32)  NOT NULL,
+            created_at  DATETIME     NOT NULL,
+            KEY idx_backup_created (created_at)
+        ) ENGINE=InnoDB
+    """)
+
+    ensure_fingerprint_table(conn)
+
 
 # ---------------------------------------------------------------------------
 # Locking  (Liquibase-style table lock + MySQL advisory lock)
@@ -120,23 +202,155 @@ def _release_lock(conn) -> None:
 # ---------------------------------------------------------------------------
 
 def _get_applied(conn) -> dict:
-    """Return a dict keyed by (id, author) → {checksum, execType}."""
+    """Return a dict keyed by (id, author) → {checksum, execType, downChecksum}."""
     rows = fetch_all(conn, """
-        SELECT ID, AUTHOR, MD5SUM, EXECTYPE
+        SELECT ID, AUTHOR, MD5SUM, EXECTYPE, DOWNSUM
         FROM DATABASECHANGELOG
         ORDER BY ORDEREXECUTED
     """)
     return {
-        (r[0], r[1]): {"checksum": r[2], "execType": r[3]}
+        (r[0], r[1]): {"checksum": r[2], "execType": r[3], "downChecksum": r[4]}
         for r in rows
     }
 
 
+def _down_checksum(cs: dict, base_dir: str) -> str | None:
+    down_sql = resolve_down_sql(cs, base_dir)
+    return checksum(down_sql) if down_sql is not None else None
+
+
 def _next_order(conn) -> int:
     row = fetch_one(conn, "SELECT COALESCE(MAX(ORDEREXECUTED), 0) + 1 FROM DATABASECHANGELOG")
     return row[0]
 
 
+def _insert_changelog(conn, cs: dict, exec_type: str, cs_checksum: str,
+                      down_checksum: str | None = None, inverse_sql: str | None = None) -> None:
+    """Record *cs* in DATABASECHANGELOG; a duplicate row (concurrent run) is only logged."""
+    order = _next_order(conn)
+    try:
+        execute(conn, """
+            INSERT INTO DATABASECHANGELOG
+                (ID, AUTHOR, FILENAME, DATEEXECUTED, ORDEREXECUTED,
+                 EXECTYPE, MD5SUM, DOWNSUM, INVERSE_SQL, LABELS, CONTEXTS)
+            VALUES (%s, %s, %s, NOW(), %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            cs["id"], cs["author"], cs["sqlFile"], order,
+            exec_type, cs_checksum, down_checksum, inverse_sql,
+            ",".join(cs["labels"]),
+            ",".join(cs["contexts"]),
+        ))
+    except Exception as log_exc:
+        if "duplicate entry" in str(log_exc).lower():
+            logger.warning(json.dumps({
+                "event": "changelog_duplicate_skipped",
+                "id": cs["id"], "file": cs["sqlFile"],
+            }))
+        else:
+            raise
+
+
+def _capture_definitions(conn, cs: dict, sql_text: str) -> dict | None:
+    """Best-effort ``SHOW CREATE TABLE`` of the tables *sql_text* touches."""
+    try:
+        return capture_definitions(conn, sql_text)
+    except Exception as exc:
+        logger.warning(json.dumps({
+            "event": "definition_capture_failed", "id": cs["id"], "error": str(exc),
+        }))
+        return None
+
+
+def _derive_inverse(sql_text: str, before: dict | None) -> str | None:
+    return derive_inverse(sql_text, before) if before is not None else None
+
+
+def _apply_coalesced(conn, run_id: str, group: dict, base_dir: str, profiling: str,
+                     applied: dict) -> bool:
+    """
+    Run *group*'s changesets as one ALTER TABLE and record each of them.
+    Returns False, having changed nothing, when the caller should apply
+    them one by one instead.
+    """
+    ids = [cs["id"] for cs in group["changesets"]]
+    sql_texts = [resolve_sql(cs, base_dir) for cs in group["changesets"]]
+    try:
+        for cs, sql_text in zip(group["changesets"], sql_texts):
+            check_policy(sql_text, cs)
+    except RuntimeError:
+        # let the usual path apply the members before the blocked one
+        return False
+
+    merged = merged_statement(group)
+    # members are independent, so the table as it was before the group
+    # is the table as it was before each of them
+    before = _capture_definitions(conn, group["changesets"][0], merged)
+    logger.info(json.dumps({
+        "event": "applying_coalesced_alter", "ids": ids, "table": group["table"],
+        "clauses": len(group["clauses"]),
+    }))
+    statements: list[dict] = []
+    try:
+        if profiling == "off":
+            execute_script(conn, merged)
+        else:
+            execute_profiled(conn, merged, statements, profiling)
+    except Exception as exc:
+        logger.warning(json.dumps({
+            "event": "coalesced_alter_fallback", "ids": ids, "error": str(exc),
+        }))
+        return False
+    finally:
+        # every member ran the merged ALTER; aggregates count it once
+        for cs in group["changesets"]:
+            _record_statements(conn, run_id, cs, statements, coalesced_group=ids[0])
+
+    for cs, sql_text in zip(group["changesets"], sql_texts):
+        cs_checksum = checksum(sql_text)
+        down_checksum = _down_checksum(cs, base_dir)
+        _insert_changelog(conn, cs, "EXECUTED", cs_checksum, down_checksum,
+                          _derive_inverse(sql_text, before))
+        applied[(cs["id"], cs["author"])] = {"checksum": cs_checksum, "execType": "EXECUTED",
+                                             "downChecksum": down_checksum}
+        logger.info(json.dumps({"event": "changeset_applied", "id": cs["id"],
+                                "coalesced_with": [i for i in ids if i != cs["id"]]}))
+    _record_fingerprint(conn, run_id, group["changesets"][-1])
+    return True
+
+
+def _record_statements(conn, run_id: str, cs: dict, statements: list[dict],
+                       coalesced_group: str | None = None) -> None:
+    """Best-effort write of a changeset's statement profile."""
+    try:
+        save_statement_profile(conn, run_id, cs, statements, coalesced_group)
+    except Exception as exc:
+        logger.warning(json.dumps({
+            "event": "statement_profile_not_saved", "id": cs["id"], "error": str(exc),
+        }))
+
+
+def _record_fingerprint(conn, run_id: str, cs: dict) -> None:
+    """Best-effort write of the schema baseline after a changeset."""
+    try:
+        record_fingerprint(conn, "changeset", cs, run_id)
+    except Exception as exc:
+        logger.warning(json.dumps({
+            "event": "schema_fingerprint_not_saved", "id": cs["id"], "error": str(exc),
+        }))
+
+
+def _check_drift(conn) -> None:
+    """Log schema drift; with SCHEMA_DRIFT_CHECK=fail, refuse to go on."""
+    mode = drift_check_mode()
+    result = report_drift(conn, mode)
+    if mode == "fail" and result and result["status"] == "drift":
+        raise RuntimeError(
+            f"Schema drift: {len(result['differences'])} difference(s) since changeset "
+            f"'{result['baseline_changeset']}'. Review with `python -m src.migrate drift` "
+            f"and accept with `drift --accept` if intended."
+        )
+
+
 def _matches_context(changeset: dict, context: str | None) -> bool:
     """Return True if the changeset should run in the given context."""
     if context is None:
@@ -187,6 +401,7 @@ def status_cmd(changelog_path: str = "changelog/changelog.yml",
     try:
         _bootstrap_tables(conn)
         applied = _get_applied(conn)
+        _check_drift(conn)
     finally:
         conn.close()
 
@@ -210,8 +425,43 @@ def status_cmd(changelog_path: str = "changelog/changelog.yml",
     return pending
 
 
-def create_backup(backup_file: str = None, environment: str = "unknown") -> str:
-    """Create a database backup before migration."""
+def plan_cmd(changelog_path: str = "changelog/changelog.yml",
+             base_dir: str = ".",
+             context: str | None = None) -> list[dict]:
+    """Plan pending changesets: statements, locks, table sizes and predicted durations."""
+    changesets = load_changelog(changelog_path)
+    conn = get_conn()
+    try:
+        _bootstrap_tables(conn)
+        applied = _get_applied(conn)
+        pending = [
+            cs for cs in changesets
+            if _matches_context(cs, context) and (cs["id"], cs["author"]) not in applied
+        ]
+        plans = plan_changesets(conn, pending, base_dir)
+    finally:
+        conn.close()
+
+    logger.info(json.dumps({
+        "event": "plan_summary", "changesets": len(plans),
+        "est_ms": round(sum(p["est_ms"] for p in plans), 1),
+        "unknown_estimates": sum(p["unknown_estimates"] for p in plans),
+    }))
+    return plans
+
+
+def create_backup(backup_file: str = None, environment: str = "unknown",
+                  backup_type: str = "pre_migration", schema_only: bool = False,
+                  sample_rows: int | None = None, tables: list[str] | None = None,
+                  ignore_tables: list[str] | None = None,
+                  record_metadata: bool = True) -> str:
+    """
+    Create a database backup (before migration unless *backup_type* says otherwise).
+
+    *schema_only* dumps no rows, *sample_rows* at most that many rows per
+    table; *tables* / *ignore_tables* limit the dump.  With
+    *record_metadata* false nothing is written to the database.
+    """
     if not backup_file:
         timestamp = datetime.now().strftime('%Y%m%dT%H%M%SZ')
         backup_file = f"backup_pre_migration_{timestamp}.sql"
@@ -231,8 +481,15 @@ def create_backup(backup_file: str = None, environment: str = "unknown") -> str:
         '-u', env.get('DB_USER', 'root'),
         f'-p{env.get("DB_PASSWORD", "testpw")}',
         '--single-transaction', '--no-tablespaces', '--skip-triggers', '--skip-events',
-        env.get('DB_NAME', 'migration_db')
     ]
+    if schema_only:
+        cmd.append('--no-data')
+    elif sample_rows is not None:
+        cmd.append(f'--where=1 LIMIT {int(sample_rows)}')
+    for table in ignore_tables or []:
+        cmd.append(f'--ignore-table={env.get("DB_NAME", "migration_db")}.{table}')
+    cmd.append(env.get('DB_NAME', 'migration_db'))
+    cmd.extend(tables or [])
     
     try:
         with open(backup_file, 'w') as f:
@@ -243,26 +500,27 @@ def create_backup(backup_file: str = None, environment: str = "unknown") -> str:
         
         # Record backup metadata (if table exists)
         backup_size = os.path.getsize(backup_file)
-        try:
-            conn = get_conn()
+        if record_metadata:
             try:
-                execute(conn, """
-                    INSERT INTO ops_backup_metadata 
-                    (backup_file, file_size, environment, backup_type, created_at)
-                    VALUES (%s, %s, %s, 'pre_migration', NOW())
-                """, (backup_file, backup_size, environment))
-            except Exception as e:
-                # Table might not exist yet (first migration run)
-                logger.warning(json.dumps({
-                    "event": "backup_metadata_skip",
-                    "reason": "ops_backup_metadata table not yet created",
-                    "backup_file": backup_file
-                }))
-            finally:
-                conn.close()
-        except Exception:
-            # Database connection might not be fully set up yet
-            pass
+                conn = get_conn()
+                try:
+                    execute(conn, """
+                        INSERT INTO ops_backup_metadata 
+                        (backup_file, file_size, environment, backup_type, created_at)
+                        VALUES (%s, %s, %s, %s, NOW())
+                    """, (backup_file, backup_size, environment, backup_type))
+                except Exception as e:
+                    # Table might not exist yet (first migration run)
+                    logger.warning(json.dumps({
+                        "event": "backup_metadata_skip",
+                        "reason": "ops_backup_metadata table not yet created",
+                        "backup_file": backup_file
+                    }))
+                finally:
+                    conn.close()
+            except Exception:
+                # Database connection might not be fully set up yet
+                pass
         
         logger.info(json.dumps({
             "event": "backup_created", 
@@ -281,17 +539,32 @@ def update_cmd(changelog_path: str = "changelog/changelog.yml",
                base_dir: str = ".",
                context: str | None = None,
                dry_run: bool = False,
-               auto_backup: bool = True) -> int:
-    """Apply pending changesets with automatic backup. Returns the count of changesets applied."""
+               auto_backup: bool = True,
+               profiling: str | None = None,
+               run_id: str | None = None,
+               coalesce_alters: bool = False) -> int:
+    """Apply pending changesets with automatic backup. Returns the count of changesets applied.
+
+    *profiling* overrides ``MIGRATION_PROFILE`` for this run; *run_id* lets
+    the caller find the run's ``ops_migration_*`` rows afterwards.  With
+    *coalesce_alters*, consecutive changesets that only alter the same table
+    run as one ALTER TABLE (see ``coalesce``).
+    """
     actor      = os.getenv("GITHUB_ACTOR", "local")
     env_name   = os.getenv("ENV_NAME", "dev")
     git_sha    = os.getenv("GITHUB_SHA")
     backup_ref = os.getenv("BACKUP_FILE")
-    run_id     = str(uuid.uuid4())
+    run_id     = run_id or str(uuid.uuid4())
+    profiling  = profiling or profile_level()
 
     changesets = load_changelog(changelog_path)
     conn = get_conn()
     _bootstrap_tables(conn)
+    try:
+        _check_drift(conn)
+    except RuntimeError:
+        conn.close()
+        raise
     
     # Check if there are pending migrations
     applied = _get_applied(conn)
@@ -335,6 +608,12 @@ def update_cmd(changelog_path: str = "changelog/changelog.yml",
 
     try:
         applied = _get_applied(conn)
+        groups = {}
+        if coalesce_alters and not dry_run:
+            for group in plan_groups([(cs, resolve_sql(cs, base_dir))
+                                      for cs in pending_changesets]):
+                first = group["changesets"][0]
+                groups[(first["id"], first["author"])] = group
 
         for cs in changesets:
             if not _matches_context(cs, context):
@@ -369,33 +648,20 @@ def update_cmd(changelog_path: str = "changelog/changelog.yml",
                     )
                 continue  # already applied successfully
 
+            # Coalesced ALTER (later members then count as applied) ----------
+            group = groups.pop(key, None)
+            if group and _apply_coalesced(conn, run_id, group, base_dir, profiling, applied):
+                applied_count += len(group["changesets"])
+                continue
+
             # Policy gate -----------------------------------------------------
             check_policy(sql_text, cs)
 
             # Preconditions ---------------------------------------------------
             exec_type = evaluate_preconditions(conn, cs.get("preconditions", []))
             if exec_type == "SKIP":
-                order = _next_order(conn)
-                try:
-                    execute(conn, """
-                        INSERT INTO DATABASECHANGELOG
-                            (ID, AUTHOR, FILENAME, DATEEXECUTED, ORDEREXECUTED,
-                             EXECTYPE, MD5SUM, LABELS, CONTEXTS)
-                        VALUES (%s, %s, %s, NOW(), %s, 'MARK_RAN', %s, %s, %s)
-                    """, (
-                        cs["id"], cs["author"], cs["sqlFile"], order,
-                        cs_checksum,
-                        ",".join(cs["labels"]),
-                        ",".join(cs["contexts"]),
-                    ))
-                except Exception as log_exc:
-                    if "duplicate entry" in str(log_exc).lower():
-                        logger.warning(json.dumps({
-                            "event": "changelog_duplicate_skipped",
-                            "id": cs["id"], "file": cs["sqlFile"],
-                        }))
-                    else:
-                        raise
+                _insert_changelog(conn, cs, "MARK_RAN", cs_checksum,
+                                  _down_checksum(cs, base_dir))
                 applied[key] = {"checksum": cs_checksum, "execType": "MARK_RAN"}
                 logger.info(json.dumps({
                     "event": "changeset_mark_ran", "id": cs["id"],
@@ -418,8 +684,13 @@ def update_cmd(changelog_path: str = "changelog/changelog.yml",
                 "event": "applying_changeset",
                 "id": cs["id"], "author": cs["author"], "risk": cs["risk"],
             }))
+            before = _capture_definitions(conn, cs, sql_text)
+            statements: list[dict] = []
             try:
-                execute_script(conn, sql_text)
+                if profiling == "off":
+                    execute_script(conn, sql_text)
+                else:
+                    execute_profiled(conn, sql_text, statements, profiling)
                 exec_type = "EXECUTED"
             except Exception as exc:
                 # Handle common idempotent errors gracefully if enabled
@@ -452,38 +723,31 @@ def update_cmd(changelog_path: str = "changelog/changelog.yml",
                     raise RuntimeError(
                         f"Changeset '{cs['id']}' failed: {exc}"
                     ) from exc
+            finally:
+                _record_statements(conn, run_id, cs, statements)
 
-            order = _next_order(conn)
-            try:
-                execute(conn, """
-                    INSERT INTO DATABASECHANGELOG
-                        (ID, AUTHOR, FILENAME, DATEEXECUTED, ORDEREXECUTED,
-                         EXECTYPE, MD5SUM, LABELS, CONTEXTS)
-                    VALUES (%s, %s, %s, NOW(), %s, %s, %s, %s, %s)
-                """, (
-                    cs["id"], cs["author"], cs["sqlFile"], order,
-                    exec_type, cs_checksum,
-                    ",".join(cs["labels"]),
-                    ",".join(cs["contexts"]),
-                ))
-            except Exception as log_exc:
-                if "duplicate entry" in str(log_exc).lower():
-                    logger.warning(json.dumps({
-                        "event": "changelog_duplicate_skipped",
-                        "id": cs["id"], "file": cs["sqlFile"],
-                    }))
-                else:
-                    raise
+            inverse_sql = _derive_inverse(sql_text, before) if exec_type == "EXECUTED" else None
+            _insert_changelog(conn, cs, exec_type, cs_checksum, _down_checksum(cs, base_dir),
+                              inverse_sql)
 
             # Update in-memory applied dict so later changesets with
             # the same (id, author) are skipped immediately.
             applied[key] = {"checksum": cs_checksum, "execType": exec_type}
             applied_count += 1
+            if exec_type == "EXECUTED":
+                _record_fingerprint(conn, run_id, cs)
             
             if exec_type == "EXECUTED":
-                logger.info(json.dumps({
-                    "event": "changeset_applied", "id": cs["id"],
-                }))
+                applied_event = {"event": "changeset_applied", "id": cs["id"]}
+                if statements:
+                    slowest = max(statements, key=lambda r: r["duration_ms"])
+                    applied_event.update({
+                        "statements": len(statements),
+                        "duration_ms": round(sum(r["duration_ms"] for r in statements), 3),
+                        "slowest_statement": slowest["index"],
+                        "slowest_ms": slowest["duration_ms"],
+                    })
+                logger.info(json.dumps(applied_event))
             else:
                 logger.info(json.dumps({
                     "event": "changeset_marked_ran", "id": cs["id"],
@@ -518,6 +782,36 @@ def update_cmd(changelog_path: str = "changelog/changelog.yml",
     return applied_count
 
 
+def profile_cmd(limit: int = 20, run_id: str | None = None,
+                changeset_id: str | None = None) -> list[dict]:
+    """Return the slowest recorded migration statements, grouped by digest."""
+    conn = get_conn()
+    try:
+        _bootstrap_tables(conn)
+        rows = slowest_statements(conn, limit, run_id, changeset_id)
+    finally:
+        conn.close()
+    logger.info(json.dumps({"event": "profile_summary", "statements": len(rows)}))
+    return rows
+
+
+def drift_cmd(accept: bool = False) -> dict:
+    """Compare the live schema with its baseline; with *accept*, make it the new baseline."""
+    conn = get_conn()
+    try:
+        _bootstrap_tables(conn)
+        result = check_drift(conn)
+        if accept and result["status"] != "clean":
+            result["accepted"] = record_fingerprint(conn, "accepted")
+    finally:
+        conn.close()
+    logger.info(json.dumps({
+        "event": "drift_summary", "status": result["status"],
+        "differences": len(result["differences"]), "accepted": bool(result.get("accepted")),
+    }))
+    return result
+
+
 def verify_cmd(changelog_path: str = "changelog/changelog.yml",
                base_dir: str = ".") -> None:
     """Verify that all applied changesets still match their on-disk SQL."""
@@ -548,6 +842,13 @@ def verify_cmd(changelog_path: str = "changelog/changelog.yml",
                 "id": cs["id"], "author": cs["author"],
                 "error": "file_missing",
             })
+        # a down-script recorded at apply time must still be the one that would run
+        recorded_down = applied[key].get("downChecksum")
+        if recorded_down and _down_checksum(cs, base_dir) != recorded_down:
+            mismatches.append({
+                "id": cs["id"], "author": cs["author"], "file": cs["downFile"],
+                "expected": recorded_down, "actual": _down_checksum(cs, base_dir),
+            })
 
     if mismatches:
         for m in mismatches:
@@ -557,111 +858,196 @@ def verify_cmd(changelog_path: str = "changelog/changelog.yml",
     logger.info(json.dumps({"event": "verify_ok", "checked": len(applied)}))
 
 
-def rollback_cmd(target_version: str, backup_file: str) -> None:
+def _plan_rollback(conn, target_version: str, changelog_path: str, base_dir: str) -> dict:
     """
-    Rollback to a specific migration version by restoring from backup.
-    
-    This is a destructive operation that replaces the entire database
-    with the backup, then removes migration records newer than target_version.
+    Changesets applied after *target_version*, newest first, each with its
+    down-script, or else the inverse stored when it was applied (None for
+    MARK_RAN rows, which changed nothing), plus the IDs of executed
+    changesets that have neither.
+    """
+    target = fetch_one(conn, """
+        SELECT ORDEREXECUTED, AUTHOR FROM DATABASECHANGELOG WHERE ID = %s
+        ORDER BY ORDEREXECUTED DESC LIMIT 1
+    """, (target_version,))
+    if not target:
+        raise RuntimeError(f"Target version {target_version} not found in changelog")
+    rows = fetch_all(conn, """
+        SELECT ID, AUTHOR, EXECTYPE, DOWNSUM, INVERSE_SQL
+        FROM DATABASECHANGELOG
+        WHERE ORDEREXECUTED > %s
+        ORDER BY ORDEREXECUTED DESC
+    """, (target[0],))
+    by_key = {(cs["id"], cs["author"]): cs for cs in load_changelog(changelog_path)}
+
+    steps, irreversible = [], []
+    for cs_id, author, exec_type, down_checksum, inverse_sql in rows:
+        step = {"id": cs_id, "author": author, "execType": exec_type, "down_sql": None}
+        if exec_type != "MARK_RAN":
+            cs = by_key.get((cs_id, author))
+            down_sql = resolve_down_sql(cs, base_dir) if cs else None
+            if down_sql is None and inverse_sql:
+                step.update({"down_sql": inverse_sql, "verified": True, "source": "inverse"})
+            elif down_sql is None:
+                irreversible.append(cs_id)
+            elif down_checksum and checksum(down_sql) != down_checksum:
+                raise RuntimeError(
+                    f"Down-script {cs['downFile']} of changeset '{cs_id}' changed since the "
+                    f"changeset was applied; restore it or roll back from a backup."
+                )
+            else:
+                step.update({"down_sql": down_sql, "verified": down_checksum is not None,
+                             "source": "down_script"})
+        steps.append(step)
+    return {"target": {"id": target_version, "author": target[1]},
+            "steps": steps, "irreversible": irreversible}
+
+
+def _restore_backup(backup_file: str) -> None:
+    env = dict(os.environ)
+    cmd = [
+        "mysql", 
+        "-h", env.get("DB_HOST", "127.0.0.1"), 
+        "-P", env.get("DB_PORT", "3306"),
+        "-u", env.get("DB_USER", "root"), 
+        f"-p{env.get('DB_PASSWORD', 'testpw')}", 
+        env.get("DB_NAME", "migration_db")
+    ]
+    with open(backup_file, 'r') as f:
+        result = subprocess.run(cmd, stdin=f, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Backup restore failed: {result.stderr}")
+    logger.info(json.dumps({
+        "event": "backup_restored",
+        "backup_file": backup_file
+    }))
+
+
+def _run_down_scripts(conn, steps: list[dict]) -> list[str]:
+    """Revert *steps* newest first; each changeset's row goes as soon as it is undone."""
+    removed = []
+    _acquire_lock(conn, locked_by="migrate-rollback")
+    try:
+        for step in steps:
+            if step["down_sql"] is not None:
+                if not step["verified"]:
+                    logger.warning(json.dumps({
+                        "event": "down_script_unverified", "id": step["id"],
+                        "reason": "no down-script checksum was recorded when it was applied",
+                    }))
+                logger.info(json.dumps({"event": "running_down_script", "id": step["id"],
+                                        "source": step["source"]}))
+                try:
+                    execute_script(conn, step["down_sql"])
+                except Exception as exc:
+                    raise RuntimeError(
+                        f"{'Inverse' if step['source'] == 'inverse' else 'Down-script'} of "
+                        f"changeset '{step['id']}' failed: {exc}"
+                    ) from exc
+            execute(conn, "DELETE FROM DATABASECHANGELOG WHERE ID = %s AND AUTHOR = %s",
+                    (step["id"], step["author"]))
+            removed.append(step["id"])
+            logger.info(json.dumps({"event": "changeset_rolled_back", "id": step["id"],
+                                    "exec_type": step["execType"]}))
+    finally:
+        _release_lock(conn)
+    return removed
+
+
+def rollback_cmd(target_version: str, backup_file: str | None = None,
+                 changelog_path: str = "changelog/changelog.yml",
+                 base_dir: str = ".") -> dict:
+    """
+    Roll back to a specific migration version.
+
+    When every changeset applied after *target_version* has a down-script
+    or a stored inverse (or was only marked as ran), they run newest first and each
+    changeset's DATABASECHANGELOG row is removed as it is undone.  Otherwise
+    the whole database is restored from *backup_file* (destructive: it
+    replaces everything) and migration records newer than the target are
+    removed.  Returns ``{"method", "backup_file", "removed", "run_id"}``;
+    ``backup_file`` is None unless the backup was restored.
     """
-    import subprocess
-    from datetime import datetime
-    
     logger.warning(json.dumps({
         "event": "rollback_start", 
         "target": target_version, 
         "backup": backup_file,
         "timestamp": datetime.now().isoformat()
     }))
-    
-    # Record rollback attempt in ops table
+
     conn = get_conn()
     rollback_run_id = str(uuid.uuid4())
-    
     try:
-        # Record rollback start
+        _bootstrap_tables(conn)
+        plan = _plan_rollback(conn, target_version, changelog_path, base_dir)
+        method = "backup_restore" if plan["irreversible"] else "down_scripts"
+        if method == "backup_restore" and not backup_file:
+            raise RuntimeError(
+                f"No down-script or inverse for changeset(s) "
+                f"{', '.join(plan['irreversible'])}; "
+                f"pass --backup-file to restore from a backup instead."
+            )
         execute(conn, """
             INSERT INTO ops_rollback_runs (
-                run_id, target_version, backup_file, status, started_at
-            ) VALUES (%s, %s, %s, 'started', NOW())
-        """, (rollback_run_id, target_version, backup_file))
-        
-        # Get current version before rollback
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT ID, ORDEREXECUTED FROM DATABASECHANGELOG 
-            ORDER BY ORDEREXECUTED DESC LIMIT 1
-        """)
-        current_version = cursor.fetchone()
-        cursor.close()
-        
+                run_id, target_version, backup_file, method, status, started_at
+            ) VALUES (%s, %s, %s, %s, 'started', NOW())
+        """, (rollback_run_id, target_version, backup_file, method))
         logger.info(json.dumps({
-            "event": "rollback_current_version",
-            "current": current_version['ID'] if current_version else None,
-            "target": target_version
+            "event": "rollback_plan", "target": target_version, "method": method,
+            "changesets": [step["id"] for step in plan["steps"]],
+            "without_down_script": plan["irreversible"],
         }))
-        
+        if method == "down_scripts":
+            removed = _run_down_scripts(conn, plan["steps"])
     except Exception as e:
-        logger.error(f"Failed to record rollback start: {e}")
-        # Continue with rollback even if logging fails
-    finally:
+        try:
+            execute(conn, """
+                UPDATE ops_rollback_runs 
+                SET status = 'failed', error_message = %s, completed_at = NOW()
+                WHERE run_id = %s
+            """, (str(e), rollback_run_id))
+        except Exception:
+            pass  # best-effort audit
         conn.close()
-    
-    # Restore from backup
-    env = dict(os.environ)
-    cmd = [
-        "mysql", 
-        "-h", env.get("DB_HOST", "127.0.0.1"), 
-        "-P", env.get("DB_PORT", "3306"),
-        "-u", env.get("DB_USER", "root"), 
-        f"-p{env.get('DB_PASSWORD', 'testpw')}", 
-        env.get("DB_NAME", "migration_db")
-    ]
-    
-    try:
-        with open(backup_file, 'r') as f:
-            result = subprocess.run(cmd, stdin=f, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise RuntimeError(f"Backup restore failed: {result.stderr}")
-        
-        logger.info(json.dumps({
-            "event": "backup_restored",
-            "backup_file": backup_file
-        }))
-        
-    except Exception as e:
-        # Record rollback failure
+        raise
+
+    if method == "backup_restore":
+        conn.close()
+        try:
+            _restore_backup(backup_file)
+        except Exception as e:
+            # Record rollback failure
+            conn = get_conn()
+            try:
+                execute(conn, """
+                    UPDATE ops_rollback_runs 
+                    SET status = 'failed', error_message = %s, completed_at = NOW()
+                    WHERE run_id = %s
+                """, (str(e), rollback_run_id))
+            finally:
+                conn.close()
+            raise
+
+        # The restored dump carries its own DATABASECHANGELOG; clean up
+        # migration records newer than the target
         conn = get_conn()
         try:
+            target_row = fetch_one(conn, "SELECT ORDEREXECUTED FROM DATABASECHANGELOG WHERE ID = %s",
+                                   (target_version,))
+            if not target_row:
+                raise RuntimeError(f"Target version {target_version} not found in changelog")
+            removed = [r[0] for r in fetch_all(
+                conn, "SELECT ID FROM DATABASECHANGELOG WHERE ORDEREXECUTED > %s", (target_row[0],))]
+            execute(conn, "DELETE FROM DATABASECHANGELOG WHERE ORDEREXECUTED > %s", (target_row[0],))
+        except Exception as e:
             execute(conn, """
                 UPDATE ops_rollback_runs 
                 SET status = 'failed', error_message = %s, completed_at = NOW()
                 WHERE run_id = %s
             """, (str(e), rollback_run_id))
-        finally:
             conn.close()
-        raise
-    
-    # Clean up migration records newer than target
-    conn = get_conn()
+            raise
+
     try:
-        # Get target order for cleanup
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT ORDEREXECUTED FROM DATABASECHANGELOG WHERE ID = %s", (target_version,))
-        target_row = cursor.fetchone()
-        
-        if not target_row:
-            raise RuntimeError(f"Target version {target_version} not found in changelog")
-        
-        target_order = target_row['ORDEREXECUTED']
-        
-        # Remove newer migration records
-        cursor.execute("SELECT ID FROM DATABASECHANGELOG WHERE ORDEREXECUTED > %s", (target_order,))
-        removed_migrations = [row['ID'] for row in cursor.fetchall()]
-        
-        cursor.execute("DELETE FROM DATABASECHANGELOG WHERE ORDEREXECUTED > %s", (target_order,))
-        
         # Record successful rollback
         execute(conn, """
             UPDATE ops_rollback_runs 
@@ -669,24 +1055,17 @@ def rollback_cmd(target_version: str, backup_file: str) -> None:
                 removed_migrations = %s,
                 completed_at = NOW()
             WHERE run_id = %s
-        """, (json.dumps(removed_migrations), rollback_run_id))
-        
-        cursor.close()
-        
-        logger.info(json.dumps({
-            "event": "rollback_complete", 
-            "target": target_version,
-            "removed_migrations": removed_migrations,
-            "run_id": rollback_run_id
-        }))
-        
-    except Exception as e:
-        # Record rollback failure
-        execute(conn, """
-            UPDATE ops_rollback_runs 
-            SET status = 'failed', error_message = %s, completed_at = NOW()
-            WHERE run_id = %s
-        """, (str(e), rollback_run_id))
-        raise
+        """, (json.dumps(removed), rollback_run_id))
+        _record_fingerprint(conn, rollback_run_id, plan["target"])
     finally:
         conn.close()
+
+    logger.info(json.dumps({
+        "event": "rollback_complete", 
+        "target": target_version,
+        "method": method,
+        "removed_migrations": removed,
+        "run_id": rollback_run_id
+    }))
+    return {"method": method, "removed": removed, "run_id": rollback_run_id,
+            "backup_file": backup_file if method == "backup_restore" else None}
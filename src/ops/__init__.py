@@ -0,0 +1 @@
+# Ops audit tables: daily rollups and retention
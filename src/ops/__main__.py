@@ -0,0 +1,92 @@
+"""
+CLI entry-point for ops audit-table maintenance.
+
+Usage:
+    python -m src.ops maintain [--table ops_pipeline_runs] [--retention ops_dq_results=30]
+                               [--dry-run] [--metrics-file ops.prom]
+    python -m src.ops status
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from ..db import get_conn
+from .retention import POLICIES, maintain, retention_status
+
+
+def _setup_logging() -> None:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for name in ("ops", "db"):
+        lgr = logging.getLogger(name)
+        lgr.addHandler(handler)
+        lgr.setLevel(logging.INFO)
+
+
+def main() -> None:
+    # Load .env file if it exists
+    env_file = Path("env.local")
+    if env_file.exists():
+        load_dotenv(env_file)
+        print(f"Loaded environment from {env_file}")
+
+    _setup_logging()
+
+    parser = argparse.ArgumentParser(
+        prog="ops",
+        description="Roll up and purge the ops_* audit tables",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_mnt = sub.add_parser("maintain",
+                           help="Roll up completed days and purge rows past retention")
+    p_mnt.add_argument("--table", action="append", choices=list(POLICIES),
+                       help="Limit to this table (repeatable; default: all)")
+    p_mnt.add_argument("--retention", action="append", default=[], metavar="TABLE=DAYS",
+                       help="Override a table's retention in days (repeatable)")
+    p_mnt.add_argument("--dry-run", action="store_true",
+                       help="Report what would be rolled up and purged without changing anything")
+    p_mnt.add_argument("--metrics-file", default=None,
+                       help="Write per-table timings and counts as OpenMetrics text to this path "
+                            "(default: $OPS_METRICS_FILE)")
+
+    sub.add_parser("status", help="Show rollup progress and the last purge per table")
+
+    args = parser.parse_args()
+
+    try:
+        conn = get_conn()
+        try:
+            if args.command == "maintain":
+                retention = {}
+                for item in args.retention:
+                    table, _, days = item.partition("=")
+                    if table not in POLICIES or not days.isdigit():
+                        raise RuntimeError(f"Invalid --retention '{item}'; expected TABLE=DAYS")
+                    retention[table] = int(days)
+                report = maintain(conn, args.table, retention, args.dry_run,
+                                  metrics_file=args.metrics_file)
+                verb = "would purge" if args.dry_run else "purged"
+                for table, r in report.items():
+                    print(f"{table}: rolled up {r['days_rolled_up']} day(s); "
+                          f"{verb} {r['rows_purged']} row(s) before {r['cutoff'] or '-'}")
+
+            elif args.command == "status":
+                print(f"{'TABLE':<26} {'ROLLED UP THROUGH':<18} {'LAST RUN':<20} "
+                      f"{'DAYS':>6} {'PURGED':>10}")
+                for table, through, last_run, rolled, purged in retention_status(conn):
+                    print(f"{table:<26} {str(through or '-'):<18} {str(last_run or '-'):<20} "
+                          f"{rolled:>6} {purged:>10}")
+        finally:
+            conn.close()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
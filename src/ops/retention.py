@@ -0,0 +1,392 @@
+"""
+Retention and compaction for the ops_* audit tables.
+
+For each table in POLICIES, ``maintain()``:
+
+  1. makes sure the index on its time column exists;
+  2. rolls detailed rows of every completed day not yet summarised up into
+     a daily summary table (``ops_daily_*``), recording progress in
+     ``ops_retention_state``.  A day is only complete once none of its runs
+     is still in flight, so rollup stops at the oldest in-flight row;
+  3. deletes detailed rows older than the retention period — and already
+     rolled up — in batches of OPS_PURGE_BATCH_SIZE (default 5000) with a
+     short pause between batches, so purges never hold long locks or
+     produce huge transactions.
+
+Retention defaults to each policy's ``retention_days`` and can be
+overridden per table (``python -m src.ops maintain --retention T=DAYS``).  Summary rows are kept indefinitely (one row per
+day and group).  ops_dq_results is also month-partitioned; whole months
+can be dropped with ``python -m src.pipeline partitions`` instead.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from ..db import ensure_index, execute, fetch_all, fetch_one
+from ..metrics import RunProfiler, add_counters
+
+logger = logging.getLogger("ops")
+
+
+POLICIES = {
+    "ops_pipeline_runs": {
+        "time_column": "started_at",
+        "index": "idx_pipeline_runs_started",
+        "retention_days": 90,
+        # rows still running are neither rolled up nor purged
+        "in_flight": "status = 'running'",
+        "summary_ddl": """
+            CREATE TABLE IF NOT EXISTS ops_daily_pipeline_runs (
+                day                DATE         NOT NULL,
+                env_name           VARCHAR(32)  NOT NULL,
+                status             VARCHAR(16)  NOT NULL,
+                runs               INT          NOT NULL,
+                total_seconds      BIGINT       NOT NULL,
+                max_seconds        BIGINT       NOT NULL,
+                customers_ingested BIGINT       NOT NULL,
+                orders_ingested    BIGINT       NOT NULL,
+                PRIMARY KEY (day, env_name, status)
+            ) ENGINE=InnoDB
+        """,
+        "rollup_sql": """
+            INSERT INTO ops_daily_pipeline_runs
+                (day, env_name, status, runs, total_seconds, max_seconds,
+                 customers_ingested, orders_ingested)
+            SELECT DATE(started_at), env_name, status, COUNT(*),
+                   COALESCE(SUM(TIMESTAMPDIFF(SECOND, started_at, finished_at)), 0),
+                   COALESCE(MAX(TIMESTAMPDIFF(SECOND, started_at, finished_at)), 0),
+                   COALESCE(SUM(CAST(details->>'$.customers_ingested' AS UNSIGNED)), 0),
+                   COALESCE(SUM(CAST(details->>'$.orders_ingested' AS UNSIGNED)), 0)
+            FROM ops_pipeline_runs
+            WHERE started_at >= %s AND started_at < %s
+            GROUP BY DATE(started_at), env_name, status
+            ON DUPLICATE KEY UPDATE
+                runs = VALUES(runs), total_seconds = VALUES(total_seconds),
+                max_seconds = VALUES(max_seconds),
+                customers_ingested = VALUES(customers_ingested),
+                orders_ingested = VALUES(orders_ingested)
+        """,
+    },
+    "ops_dq_results": {
+        "time_column": "run_date",
+        "index": None,  # partitioning column, leads every partition
+        "retention_days": 90,
+        "summary_ddl": """
+            CREATE TABLE IF NOT EXISTS ops_daily_dq_results (
+                day         DATE          NOT NULL,
+                check_name  VARCHAR(128)  NOT NULL,
+                runs        INT           NOT NULL,
+                passed      INT           NOT NULL,
+                failed      INT           NOT NULL,
+                avg_metric  DECIMAL(20,4) NULL,
+                max_metric  DECIMAL(20,4) NULL,
+                PRIMARY KEY (day, check_name)
+            ) ENGINE=InnoDB
+        """,
+        "rollup_sql": """
+            INSERT INTO ops_daily_dq_results
+                (day, check_name, runs, passed, failed, avg_metric, max_metric)
+            SELECT run_date, check_name, COUNT(*),
+                   SUM(status = 'pass'), SUM(status = 'fail'),
+                   AVG(metric_value), MAX(metric_value)
+            FROM ops_dq_results
+            WHERE run_date >= %s AND run_date < %s
+            GROUP BY run_date, check_name
+            ON DUPLICATE KEY UPDATE
+                runs = VALUES(runs), passed = VALUES(passed), failed = VALUES(failed),
+                avg_metric = VALUES(avg_metric), max_metric = VALUES(max_metric)
+        """,
+    },
+    "ops_migration_runs": {
+        "time_column": "started_at",
+        "index": "idx_migration_runs_started",
+        "retention_days": 365,
+        "in_flight": "status = 'running'",
+        "summary_ddl": """
+            CREATE TABLE IF NOT EXISTS ops_daily_migration_runs (
+                day           DATE        NOT NULL,
+                env_name      VARCHAR(32) NOT NULL,
+                status        VARCHAR(16) NOT NULL,
+                runs          INT         NOT NULL,
+                total_seconds BIGINT      NOT NULL,
+                max_seconds   BIGINT      NOT NULL,
+                PRIMARY KEY (day, env_name, status)
+            ) ENGINE=InnoDB
+        """,
+        "rollup_sql": """
+            INSERT INTO ops_daily_migration_runs
+                (day, env_name, status, runs, total_seconds, max_seconds)
+            SELECT DATE(started_at), env_name, status, COUNT(*),
+                   COALESCE(SUM(TIMESTAMPDIFF(SECOND, started_at, finished_at)), 0),
+                   COALESCE(MAX(TIMESTAMPDIFF(SECOND, started_at, finished_at)), 0)
+            FROM ops_migration_runs
+            WHERE started_at >= %s AND started_at < %s
+            GROUP BY DATE(started_at), env_name, status
+            ON DUPLICATE KEY UPDATE
+                runs = VALUES(runs), total_seconds = VALUES(total_seconds),
+                max_seconds = VALUES(max_seconds)
+        """,
+    },
+    "ops_rollback_runs": {
+        "time_column": "started_at",
+        "index": "idx_rollback_runs_started",
+        "retention_days": 365,
+        "in_flight": "status = 'started'",
+        "summary_ddl": """
+            CREATE TABLE IF NOT EXISTS ops_daily_rollback_runs (
+                day    DATE        NOT NULL,
+                status VARCHAR(16) NOT NULL,
+                runs   INT         NOT NULL,
+                PRIMARY KEY (day, status)
+            ) ENGINE=InnoDB
+        """,
+        "rollup_sql": """
+            INSERT INTO ops_daily_rollback_runs (day, status, runs)
+            SELECT DATE(started_at), status, COUNT(*)
+            FROM ops_rollback_runs
+            WHERE started_at >= %s AND started_at < %s
+            GROUP BY DATE(started_at), status
+            ON DUPLICATE KEY UPDATE runs = VALUES(runs)
+        """,
+    },
+    "ops_backup_metadata": {
+        "time_column": "created_at",
+        "index": "idx_backup_created",
+        "retention_days": 365,
+        "summary_ddl": """
+            CREATE TABLE IF NOT EXISTS ops_daily_backups (
+                day         DATE        NOT NULL,
+                environment VARCHAR(32) NOT NULL,
+                backup_type VARCHAR(32) NOT NULL,
+                backups     INT         NOT NULL,
+                total_bytes BIGINT      NOT NULL,
+                PRIMARY KEY (day, environment, backup_type)
+            ) ENGINE=InnoDB
+        """,
+        "rollup_sql": """
+            INSERT INTO ops_daily_backups (day, environment, backup_type, backups, total_bytes)
+            SELECT DATE(created_at), COALESCE(environment, 'unknown'), backup_type,
+                   COUNT(*), COALESCE(SUM(file_size), 0)
+            FROM ops_backup_metadata
+            WHERE created_at >= %s AND created_at < %s
+            GROUP BY DATE(created_at), COALESCE(environment, 'unknown'), backup_type
+            ON DUPLICATE KEY UPDATE backups = VALUES(backups), total_bytes = VALUES(total_bytes)
+        """,
+    },
+    # Already one compact row per metric and run; the trend window lives in
+    # ops_dq_baselines, so old values are simply dropped
+    "ops_dq_metrics": {
+        "time_column": "recorded_at",
+        "index": "idx_dq_metrics_recorded",
+        "retention_days": 365,
+    },
+    # Per-statement detail with no summary: the run-level tables cover it
+    "ops_migration_statements": {
+        "time_column": "executed_at",
+        "index": "idx_mstmt_executed",
+        "retention_days": 30,
+    },
+    "ops_query_plans": {
+        "time_column": "created_at",
+        "index": "idx_query_plans_created",
+        "retention_days": 30,
+    },
+}
+
+
+def _batch_size() -> int:
+    return max(1, int(os.getenv("OPS_PURGE_BATCH_SIZE", "5000")))
+
+
+def _pause() -> float:
+    return max(0.0, float(os.getenv("OPS_PURGE_PAUSE_SECONDS", "0.1")))
+
+
+def _ensure_state_table(conn) -> None:
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_retention_state (
+            table_name        VARCHAR(64) NOT NULL PRIMARY KEY,
+            rolled_up_through DATE        NULL,
+            last_run_at       TIMESTAMP   NULL,
+            last_rolled_up    BIGINT      NOT NULL DEFAULT 0,
+            last_purged       BIGINT      NOT NULL DEFAULT 0
+        ) ENGINE=InnoDB
+    """)
+
+
+def _table_exists(conn, table: str) -> bool:
+    row = fetch_one(conn, """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return row[0] > 0
+
+
+def _rolled_up_through(conn, table: str) -> date | None:
+    row = fetch_one(conn, """
+        SELECT rolled_up_through FROM ops_retention_state WHERE table_name = %s
+    """, (table,))
+    return row[0] if row else None
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _rollup_window(conn, table: str, until: date) -> tuple[date, date] | None:
+    """``(start, end)`` of the days a rollup before *until* would summarise, or None."""
+    policy = POLICIES[table]
+    col = policy["time_column"]
+    done = _rolled_up_through(conn, table)
+    if done is None:
+        (oldest,) = fetch_one(conn, f"SELECT MIN({col}) FROM {table}")
+        if oldest is None:
+            return None
+        start = _as_date(oldest)
+    else:
+        start = done + timedelta(days=1)
+    if policy.get("in_flight"):
+        # a day with a run still in flight is not final yet
+        (open_since,) = fetch_one(conn, f"SELECT MIN({col}) FROM {table} "
+                                        f"WHERE {policy['in_flight']}")
+        if open_since is not None and _as_date(open_since) < until:
+            until = _as_date(open_since)
+            logger.info(json.dumps({"event": "ops_rollup_held", "table": table,
+                                    "in_flight_since": until.isoformat()}))
+    return (start, until) if start < until else None
+
+
+def rollup(conn, table: str, until: date, dry_run: bool = False) -> int:
+    """Summarise complete days before *until* not rolled up yet; returns days covered."""
+    policy = POLICIES[table]
+    if "rollup_sql" not in policy:
+        return 0
+    window = _rollup_window(conn, table, until)
+    if window is None:
+        return 0
+    start, until = window
+    if not dry_run:
+        execute(conn, policy["summary_ddl"])
+        execute(conn, policy["rollup_sql"], (start, until))
+        execute(conn, """
+            INSERT INTO ops_retention_state (table_name, rolled_up_through)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE rolled_up_through = VALUES(rolled_up_through)
+        """, (table, until - timedelta(days=1)))
+    return (until - start).days
+
+
+def purge(conn, table: str, cutoff: date, batch_size: int | None = None,
+          dry_run: bool = False) -> int:
+    """Delete rows older than *cutoff* in bounded batches; returns rows deleted."""
+    policy = POLICIES[table]
+    col = policy["time_column"]
+    where = f"{col} < %s"
+    if policy.get("in_flight"):
+        where += f" AND NOT ({policy['in_flight']})"
+    if dry_run:
+        (count,) = fetch_one(conn, f"SELECT COUNT(*) FROM {table} WHERE {where}", (cutoff,))
+        return int(count)
+
+    batch_size = batch_size or _batch_size()
+    pause = _pause()
+    total = 0
+    while True:
+        deleted = execute(conn, f"DELETE FROM {table} WHERE {where} ORDER BY {col} LIMIT {batch_size}",
+                          (cutoff,))
+        total += deleted
+        if deleted < batch_size:
+            return total
+        time.sleep(pause)
+
+
+def maintain(conn, tables: list[str] | None = None, retention: dict[str, int] | None = None,
+             dry_run: bool = False, today: date | None = None,
+             metrics_file: str | None = None) -> dict:
+    """
+    Ensure indexes, roll up and purge each ops table; returns a per-table report.
+
+    Each table is timed as one stage of a RunProfiler with ``days_rolled_up``
+    and ``rows_purged`` counters, written as OpenMetrics to *metrics_file*
+    (or ``OPS_METRICS_FILE``) when set.
+    """
+    today = today or date.today()
+    retention = retention or {}
+    metrics_file = metrics_file or os.getenv("OPS_METRICS_FILE")
+    profiler = RunProfiler(f"ops-{uuid.uuid4()}")
+    _ensure_state_table(conn)
+    report = {}
+    try:
+        with profiler.activate():
+            for table in tables or list(POLICIES):
+                if table not in POLICIES:
+                    raise RuntimeError(
+                        f"Unknown ops table '{table}'; expected one of {', '.join(POLICIES)}"
+                    )
+                if not _table_exists(conn, table):
+                    logger.info(json.dumps({"event": "ops_retention_skipped", "table": table,
+                                            "reason": "table does not exist"}))
+                    continue
+                with profiler.stage(table):
+                    report[table] = _maintain_table(conn, table, retention, dry_run, today)
+    finally:
+        if metrics_file:
+            try:
+                profiler.write_openmetrics(metrics_file, prefix="ops")
+            except OSError as exc:
+                logger.warning(json.dumps({
+                    "event": "metrics_export_failed", "path": metrics_file, "error": str(exc),
+                }))
+    logger.info(json.dumps({
+        "event": "ops_retention_summary", "run_id": profiler.run_id, "dry_run": dry_run,
+        "seconds": round(profiler.wall_seconds or 0.0, 3),
+        "days_rolled_up": sum(r["days_rolled_up"] for r in report.values()),
+        "rows_purged": sum(r["rows_purged"] for r in report.values()),
+    }))
+    return report
+
+
+def _maintain_table(conn, table: str, retention: dict[str, int], dry_run: bool,
+                    today: date) -> dict:
+    policy = POLICIES[table]
+    days = retention.get(table, policy["retention_days"])
+    cutoff = today - timedelta(days=days)
+
+    if policy["index"] and not dry_run:
+        ensure_index(conn, table, policy["index"], policy["time_column"])
+    rolled = rollup(conn, table, today, dry_run)
+    if "rollup_sql" in policy:
+        # never purge detail that has not been summarised; a dry run counts
+        # what its rollup would have summarised
+        done = _rolled_up_through(conn, table)
+        if dry_run and rolled:
+            done = _rollup_window(conn, table, today)[1] - timedelta(days=1)
+        cutoff = min(cutoff, done + timedelta(days=1)) if done else None
+    purged = purge(conn, table, cutoff, dry_run=dry_run) if cutoff else 0
+    add_counters(days_rolled_up=rolled, rows_purged=purged)
+
+    if not dry_run:
+        execute(conn, """
+            INSERT INTO ops_retention_state (table_name, last_run_at, last_rolled_up, last_purged)
+            VALUES (%s, NOW(), %s, %s)
+            ON DUPLICATE KEY UPDATE last_run_at = NOW(),
+                last_rolled_up = VALUES(last_rolled_up), last_purged = VALUES(last_purged)
+        """, (table, rolled, purged))
+    result = {"retention_days": days, "cutoff": cutoff.isoformat() if cutoff else None,
+              "days_rolled_up": rolled, "rows_purged": purged}
+    logger.info(json.dumps({"event": "ops_retention", "table": table, "dry_run": dry_run,
+                            **result}))
+    return result
+
+
+def retention_status(conn) -> list[tuple]:
+    """Rows of ops_retention_state for the CLI ``status`` command."""
+    _ensure_state_table(conn)
+    return fetch_all(conn, """
+        SELECT table_name, rolled_up_through, last_run_at, last_rolled_up, last_purged
+        FROM ops_retention_state ORDER BY table_name
+    """)
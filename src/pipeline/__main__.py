@@ -3,6 +3,11 @@ CLI entry-point for the data pipeline.
 
 Usage:
     python -m src.pipeline run [--env dev] [--data-dir data/raw] [--sql-dir sql]
+                               [--metrics-file pipeline.prom] [--manifest datasets.yml]
+                               [--pipeline pipelines/default.yml]
+    python -m src.pipeline resume RUN_ID [--from-step build_facts]
+    python -m src.pipeline partitions [--ahead 3] [--retention fact_order=36]
+                                      [--archive] [--dry-run]
 """
 
 import argparse
@@ -12,7 +17,9 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from .runner import run_pipeline
+from ..db import get_conn
+from .partitions import PARTITIONED_TABLES, maintain_partitions
+from .runner import resume_pipeline, run_pipeline
 
 
 def _setup_logging() -> None:
@@ -43,13 +50,71 @@ def main() -> None:
     p_run.add_argument("--env",      default="dev",       help="Environment name")
     p_run.add_argument("--data-dir", default="data/raw",  help="Path to raw CSV files")
     p_run.add_argument("--sql-dir",  default="sql",       help="Path to SQL directory")
+    p_run.add_argument("--metrics-file", default=None,
+                       help="Write per-stage timings as OpenMetrics text to this path "
+                            "(default: $PIPELINE_METRICS_FILE)")
+    p_run.add_argument("--manifest", default=None,
+                       help="Dataset manifest with globs/directories per dataset "
+                            "(default: $PIPELINE_MANIFEST or <data-dir>/datasets.yml)")
+    p_run.add_argument("--pipeline", default=None,
+                       help="Pipeline definition (DAG of nodes) "
+                            "(default: $PIPELINE_DEFINITION or pipelines/default.yml)")
+
+    p_res = sub.add_parser("resume", help="Resume a failed run under the same run_id")
+    p_res.add_argument("run_id", help="run_id of the failed run")
+    p_res.add_argument("--from-step", default=None,
+                       help="Re-run this node and everything downstream of it "
+                            "(default: only nodes without a checkpoint)")
+    p_res.add_argument("--data-dir", default=None, help="Override the run's data directory")
+    p_res.add_argument("--sql-dir",  default=None, help="Override the run's SQL directory")
+    p_res.add_argument("--manifest", default=None, help="Override the run's dataset manifest")
+    p_res.add_argument("--pipeline", default=None, help="Override the run's pipeline definition")
+    p_res.add_argument("--metrics-file", default=None,
+                       help="Write per-stage timings as OpenMetrics text to this path")
+
+    p_part = sub.add_parser("partitions",
+                            help="Pre-create future partitions and drop/archive expired ones")
+    p_part.add_argument("--table", action="append", choices=list(PARTITIONED_TABLES),
+                        help="Limit to this table (repeatable; default: all)")
+    p_part.add_argument("--ahead", type=int, default=None,
+                        help="Months to create ahead (default: $PARTITION_AHEAD_MONTHS or 3)")
+    p_part.add_argument("--retention", action="append", default=[], metavar="TABLE=MONTHS",
+                        help="Override a table's retention in months (repeatable)")
+    p_part.add_argument("--archive", action="store_true",
+                        help="Exchange expired partitions into archive_<table>_<partition> "
+                             "tables before dropping them")
+    p_part.add_argument("--dry-run", action="store_true", help="Only print the plan")
 
     args = parser.parse_args()
 
     try:
         if args.command == "run":
-            run_id = run_pipeline(args.env, args.data_dir, args.sql_dir)
+            run_id = run_pipeline(args.env, args.data_dir, args.sql_dir,
+                                  args.metrics_file, args.manifest, args.pipeline)
             print(f"Pipeline completed successfully.  run_id={run_id}")
+
+        elif args.command == "resume":
+            run_id = resume_pipeline(args.run_id, args.from_step, args.data_dir, args.sql_dir,
+                                     args.metrics_file, args.manifest, args.pipeline)
+            print(f"Pipeline resumed and completed successfully.  run_id={run_id}")
+
+        elif args.command == "partitions":
+            retention = {}
+            for item in args.retention:
+                table, _, months = item.partition("=")
+                if table not in PARTITIONED_TABLES or not months.isdigit():
+                    raise RuntimeError(f"Invalid --retention '{item}'; expected TABLE=MONTHS")
+                retention[table] = int(months)
+            conn = get_conn()
+            try:
+                report = maintain_partitions(conn, args.table, args.ahead, retention,
+                                             args.archive, args.dry_run)
+            finally:
+                conn.close()
+            for table, plan in report.items():
+                print(f"{table}: create {', '.join(plan['create']) or '-'}; "
+                      f"{'archive+drop' if plan['archive'] else 'drop'} "
+                      f"{', '.join(plan['expire']) or '-'}")
     except Exception as exc:
         print(f"ERROR: {exc}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,328 @@
+"""
+Declarative pipeline definitions and a DAG scheduler.
+
+A pipeline definition (``pipelines/default.yml``) lists nodes with a type,
+type-specific settings and ``depends_on``.  The scheduler starts every node
+whose dependencies have succeeded on a pool of PIPELINE_WORKERS threads
+(default 4); each node runs on its own MySQL connection.
+
+Per node:
+  retries      – extra attempts after a failure (default 0)
+  retry_delay  – seconds to wait before retrying (default 5)
+  timeout      – seconds; when exceeded, every connection the node opened
+                 (including ingest's per-file workers) is killed
+  scoped       – sql/checks nodes only touch the order_date partitions the
+                 run ingested (default true; false processes everything)
+  sample       – checks nodes: estimate SAMPLEABLE checks from a sample
+                 instead of a full scan (see sampling.py)
+
+When a node fails for good, its descendants are skipped while independent
+branches run to completion, so a resumed run has as little left to do as
+possible.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+import yaml
+
+from ..db import get_conn, execute, track_connections
+from .datasets import ingest_dataset
+from .ingest import DATASET_SPECS, reports_dates
+from .partitions import run_scope
+from .transform import run_sql_file
+from .sampling import sample_settings
+from .validate import CHECKS, SAMPLEABLE, check_row_volume, run_checks
+
+logger = logging.getLogger("pipeline")
+
+NODE_TYPES = ("ingest", "sql", "checks")
+DEFAULT_PIPELINE = "pipelines/default.yml"
+
+# How often the scheduler wakes up to enforce timeouts and retry delays
+_POLL_SECONDS = 0.5
+
+
+def load_pipeline(path: str) -> dict[str, dict]:
+    """Parse and validate a pipeline definition; returns nodes in topological order."""
+    with open(path, encoding="utf-8") as fh:
+        doc = yaml.safe_load(fh) or {}
+    raw = doc.get("nodes") or {}
+    if not raw:
+        raise RuntimeError(f"Pipeline {path}: no nodes defined")
+
+    errors: list[str] = []
+    nodes: dict[str, dict] = {}
+    for name, spec in raw.items():
+        spec = dict(spec or {})
+        ntype = spec.get("type")
+        if ntype not in NODE_TYPES:
+            errors.append(f"{name}: type must be one of {', '.join(NODE_TYPES)}")
+        elif ntype == "ingest" and spec.get("dataset") not in DATASET_SPECS:
+            errors.append(f"{name}: dataset must be one of {', '.join(DATASET_SPECS)}")
+        elif ntype == "sql" and not spec.get("file"):
+            errors.append(f"{name}: sql nodes need a 'file'")
+        elif ntype == "checks":
+            checks = spec.get("checks") or []
+            unknown = [c for c in checks if c not in CHECKS]
+            if not checks or unknown:
+                errors.append(f"{name}: checks must list names from {', '.join(CHECKS)}")
+            sample = spec.get("sample") or {}
+            if not isinstance(sample, dict):
+                errors.append(f"{name}: sample must map check names to settings")
+                sample = {}
+            for check, settings in sample.items():
+                if check not in SAMPLEABLE or check not in checks:
+                    errors.append(f"{name}: cannot sample '{check}' (sampleable checks "
+                                  f"in this node: {', '.join(c for c in checks if c in SAMPLEABLE)})")
+                    continue
+                try:
+                    sample_settings(settings)
+                except (RuntimeError, TypeError, ValueError) as exc:
+                    errors.append(f"{name}: sample.{check}: {exc}")
+        deps = spec.get("depends_on") or []
+        spec["depends_on"] = [deps] if isinstance(deps, str) else list(deps)
+        spec["retries"] = int(spec.get("retries", 0))
+        spec["retry_delay"] = float(spec.get("retry_delay", 5))
+        spec["timeout"] = float(spec["timeout"]) if spec.get("timeout") else None
+        spec["scoped"] = bool(spec.get("scoped", True))
+        nodes[name] = spec
+
+    for name, spec in nodes.items():
+        for dep in spec["depends_on"]:
+            if dep not in nodes:
+                errors.append(f"{name}: depends on unknown node '{dep}'")
+    if errors:
+        for e in errors:
+            logger.error(e)
+        raise RuntimeError(f"Pipeline {path} is invalid with {len(errors)} error(s)")
+
+    # Kahn's algorithm — also rejects cycles
+    order: list[str] = []
+    remaining = {n: set(s["depends_on"]) for n, s in nodes.items()}
+    while remaining:
+        ready = [n for n, deps in remaining.items() if not deps]
+        if not ready:
+            raise RuntimeError(f"Pipeline {path} has a dependency cycle among: "
+                               f"{', '.join(sorted(remaining))}")
+        for n in ready:
+            order.append(n)
+            del remaining[n]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return {n: nodes[n] for n in order}
+
+
+def descendants(nodes: dict[str, dict], name: str) -> set[str]:
+    """All nodes that depend, directly or transitively, on *name*."""
+    found: set[str] = set()
+    frontier = [name]
+    while frontier:
+        current = frontier.pop()
+        for n, spec in nodes.items():
+            if current in spec["depends_on"] and n not in found:
+                found.add(n)
+                frontier.append(n)
+    return found
+
+
+def ancestors(nodes: dict[str, dict], name: str) -> set[str]:
+    """All nodes *name* depends on, directly or transitively."""
+    found: set[str] = set()
+    frontier = list(nodes[name]["depends_on"])
+    while frontier:
+        current = frontier.pop()
+        if current not in found:
+            found.add(current)
+            frontier.extend(nodes[current]["depends_on"])
+    return found
+
+
+def execute_node(node: dict, conn, run_id: str, ctx: dict, upstream: dict[str, dict]) -> dict:
+    """Run one node on *conn*; returns the result stored in its checkpoint.
+
+    *upstream* holds the results of the node's ancestors; ingest results
+    carry the order_date range they touched (for customers, that of the
+    staged orders of the customers they upserted).
+    """
+    if node["type"] == "ingest":
+        dataset = node["dataset"]
+        stats = ingest_dataset(conn, dataset, ctx["data_dir"], ctx["manifest"])
+        # nothing new (unchanged files, nothing past the watermark) is not
+        # a volume sample
+        if stats.rows and not check_row_volume(conn, run_id, dataset, stats.rows):
+            raise RuntimeError(
+                f"Row volume for {dataset} ({stats.rows}) is anomalous vs. its rolling "
+                f"history — see ops_dq_results for details."
+            )
+        result = {"dataset": dataset, "rows": stats.rows}
+        if reports_dates(dataset):
+            result["dates"] = list(stats.dates) if stats.dates else None
+        return result
+    scope = run_scope(upstream) if node["scoped"] else None
+    if node["type"] == "sql":
+        run_sql_file(conn, ctx["sql_dir"], node["file"],
+                     run_id if node.get("set_run_id") else None, scope)
+        return {}
+    if not run_checks(conn, run_id, node["checks"], scope, node.get("sample")):
+        raise RuntimeError(
+            f"Data quality checks failed ({', '.join(node['checks'])}) — "
+            f"see ops_dq_results for details."
+        )
+    return {"passed": True}
+
+
+def _kill_connections(thread_ids: set[int]) -> None:
+    """KILL each connection; ones that already closed are ignored."""
+    ctl = get_conn()
+    try:
+        for thread_id in thread_ids:
+            try:
+                execute(ctl, f"KILL {int(thread_id)}")
+            except Exception as exc:
+                if "unknown thread id" not in str(exc).lower():
+                    raise
+    finally:
+        ctl.close()
+
+
+def run_dag(nodes: dict[str, dict], run_id: str, ctx: dict, completed: dict[str, dict],
+            on_success, profiler=None, plans=None, workers: int | None = None) -> dict[str, dict]:
+    """
+    Execute every node not in *completed*, calling ``on_success(name, result)``
+    from the scheduler thread as each one finishes.  Returns all results;
+    raises RuntimeError if any node failed.
+    """
+    workers = max(1, workers or int(os.getenv("PIPELINE_WORKERS", "4")))
+    results = dict(completed)
+    done = set(completed)
+    failed: dict[str, str] = {}
+    attempts: dict[str, int] = {}
+    retry_at: dict[str, float] = {}
+    running: dict = {}        # future -> name
+    started: dict[str, float] = {}
+    connection_ids: dict[str, set[int]] = {}   # every connection a running node opened
+    killed: dict[str, set[int]] = {}
+    timed_out: set[str] = set()
+
+    for name in completed:
+        logger.info(json.dumps({"event": "pipeline_step_skipped", "step": name, "run_id": run_id}))
+
+    def attempt(name: str, upstream: dict[str, dict]) -> dict:
+        node = nodes[name]
+        # worker threads the node starts inherit the tracker with the context
+        with track_connections(connection_ids.setdefault(name, set())):
+            conn = get_conn()
+            try:
+                stage = profiler.stage(name) if profiler else nullcontext()
+                # ingest only issues upserts and watermark lookups; no plans
+                capture = (plans.capture(name) if plans and node["type"] != "ingest"
+                           else nullcontext())
+                with stage, capture:
+                    return execute_node(node, conn, run_id, ctx, upstream)
+            finally:
+                conn.close()
+
+    def blocked(name: str) -> bool:
+        return any(dep in failed or blocked(dep) for dep in nodes[name]["depends_on"])
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline") as pool:
+        while True:
+            now = time.monotonic()
+            active = set(running.values())
+            for name, node in nodes.items():
+                if (name in done or name in failed or name in active
+                        or retry_at.get(name, 0) > now
+                        or not all(d in done for d in node["depends_on"])):
+                    continue
+                attempts[name] = attempts.get(name, 0) + 1
+                started[name] = now
+                logger.info(json.dumps({
+                    "event": "pipeline_step", "step": name, "run_id": run_id,
+                    "attempt": attempts[name],
+                }))
+                future = pool.submit(contextvars.copy_context().run, attempt, name,
+                                     {a: results[a] for a in ancestors(nodes, name)})
+                running[future] = name
+
+            if not running:
+                if any(retry_at.get(n, 0) > now for n in nodes if n not in done and n not in failed):
+                    time.sleep(_POLL_SECONDS)
+                    continue
+                break
+
+            finished, _ = wait(list(running), timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                node = nodes[name]
+                connection_ids.pop(name, None)
+                killed.pop(name, None)
+                try:
+                    results[name] = future.result()
+                except Exception as exc:
+                    error = (f"timed out after {node['timeout']:g}s" if name in timed_out
+                             else str(exc))
+                    timed_out.discard(name)
+                    if attempts[name] <= node["retries"]:
+                        retry_at[name] = time.monotonic() + node["retry_delay"]
+                        logger.warning(json.dumps({
+                            "event": "pipeline_step_retry", "step": name, "run_id": run_id,
+                            "attempt": attempts[name], "error": error,
+                        }))
+                    else:
+                        failed[name] = error
+                        logger.error(json.dumps({
+                            "event": "pipeline_step_failed", "step": name, "run_id": run_id,
+                            "error": error,
+                        }))
+                    continue
+                done.add(name)
+                on_success(name, results[name])
+                logger.info(json.dumps({
+                    "event": "pipeline_step_complete", "step": name, "run_id": run_id,
+                    "seconds": round(time.monotonic() - started[name], 3),
+                }))
+
+            # Enforce timeouts by killing the node's connections; connections
+            # its workers open after the first kill are killed on later polls
+            now = time.monotonic()
+            for name in running.values():
+                limit = nodes[name]["timeout"]
+                if limit and name not in timed_out and now - started[name] > limit:
+                    timed_out.add(name)
+                    logger.error(json.dumps({
+                        "event": "pipeline_step_timeout", "step": name, "run_id": run_id,
+                        "timeout": limit,
+                    }))
+                if name in timed_out:
+                    # copy first: worker threads may be adding to the set
+                    pending = (connection_ids.get(name, set()).copy()
+                               - killed.setdefault(name, set()))
+                    if not pending:
+                        continue
+                    killed[name] |= pending
+                    try:
+                        _kill_connections(pending)
+                    except Exception as exc:
+                        logger.warning(json.dumps({
+                            "event": "pipeline_step_kill_failed", "step": name,
+                            "error": str(exc),
+                        }))
+
+    skipped = [n for n in nodes if n not in done and n not in failed and blocked(n)]
+    for name in skipped:
+        logger.warning(json.dumps({
+            "event": "pipeline_step_blocked", "step": name, "run_id": run_id,
+        }))
+    if failed:
+        first = next(iter(failed))
+        raise RuntimeError(
+            f"{len(failed)} pipeline step(s) failed ({', '.join(failed)}); "
+            f"{len(skipped)} skipped. {first}: {failed[first]}"
+        )
+    return results
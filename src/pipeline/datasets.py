@@ -0,0 +1,245 @@
+"""
+Multi-file dataset ingestion with per-file checkpoints.
+
+A dataset can be a single file (``<data_dir>/orders.csv``, the original
+layout), a directory (``<data_dir>/orders/``) or a list of globs from a
+manifest::
+
+    # data/raw/datasets.yml
+    datasets:
+      customers:
+        - customers.csv
+      orders:
+        - orders/2026-10-*.csv.gz
+        - orders/backfill/
+
+Patterns are relative to the manifest's directory.  For multi-file
+datasets every file is tracked in ``ops_file_checkpoints`` (path, size,
+mtime, content hash, max compound watermark).  A file whose size and mtime — or,
+failing that, content hash — match its checkpoint is skipped without being
+opened, so run time scales with new data rather than retained history.
+New and changed files are ingested in parallel (INGEST_WORKERS, default 4),
+each worker on its own connection.
+
+Files are expected to partition the data (e.g. one file per day).  Keys
+that appear in several files ingested concurrently are resolved in
+completion order, like re-running the single-file upsert.
+"""
+
+import contextvars
+import glob
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from ..db import get_conn, ensure_column, execute, fetch_all
+from .ingest import (
+    DATASET_SPECS, DATASET_SUFFIXES, LoadStats, ingest_single, load_file, merge_stats,
+    resolve_dataset,
+)
+from .watermarks import EPOCH, Watermark, get_watermark, set_watermark
+
+logger = logging.getLogger("pipeline")
+
+MANIFEST_NAME = "datasets.yml"
+
+
+def load_manifest(path: str | None) -> dict[str, list[str]]:
+    """Return ``{dataset: [absolute patterns]}`` from a manifest, or {} if absent."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        doc = yaml.safe_load(fh) or {}
+    base = os.path.dirname(os.path.abspath(path))
+    manifest = {}
+    for name, patterns in (doc.get("datasets") or {}).items():
+        if name not in DATASET_SPECS:
+            raise RuntimeError(
+                f"Manifest {path}: unknown dataset '{name}' "
+                f"(expected one of {', '.join(DATASET_SPECS)})"
+            )
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        manifest[name] = [os.path.join(base, p) for p in patterns]
+    return manifest
+
+
+def expand_sources(patterns: list[str]) -> list[str]:
+    """Expand globs and directories into a sorted, de-duplicated file list."""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for entry in os.listdir(pattern):
+                full = os.path.join(pattern, entry)
+                if os.path.isfile(full) and entry.lower().endswith(DATASET_SUFFIXES):
+                    files.add(os.path.abspath(full))
+            continue
+        matches = glob.glob(pattern, recursive=True)
+        files.update(os.path.abspath(m) for m in matches if os.path.isfile(m))
+    return sorted(files)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ensure_table(conn) -> None:
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_file_checkpoints (
+            dataset_name  VARCHAR(128)  NOT NULL,
+            file_path     VARCHAR(1024) NOT NULL,
+            file_size     BIGINT        NOT NULL,
+            file_mtime    DOUBLE        NOT NULL,
+            content_hash  CHAR(64)      NOT NULL,
+            max_watermark VARCHAR(64)   NOT NULL,
+            rows_ingested BIGINT        NOT NULL DEFAULT 0,
+            ingested_at   TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP
+                                        ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (dataset_name, file_path(255))
+        ) ENGINE=InnoDB
+    """)
+    # Key part of the compound (updated_at, key) mark
+    ensure_column(conn, "ops_file_checkpoints", "high_key",
+                  "VARCHAR(128) NOT NULL DEFAULT '' AFTER max_watermark")
+
+
+def _load_checkpoints(conn, dataset: str) -> dict[str, dict]:
+    rows = fetch_all(conn, """
+        SELECT file_path, file_size, file_mtime, content_hash, max_watermark, high_key
+        FROM ops_file_checkpoints WHERE dataset_name = %s
+    """, (dataset,))
+    return {
+        r[0]: {"size": int(r[1]), "mtime": float(r[2]), "hash": r[3],
+               "watermark": Watermark(r[4], r[5])}
+        for r in rows
+    }
+
+
+def _save_checkpoint(conn, dataset: str, path: str, size: int, mtime: float,
+                     content_hash: str, watermark: Watermark, rows: int) -> None:
+    execute(conn, """
+        INSERT INTO ops_file_checkpoints
+            (dataset_name, file_path, file_size, file_mtime, content_hash,
+             max_watermark, high_key, rows_ingested)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            file_size     = VALUES(file_size),
+            file_mtime    = VALUES(file_mtime),
+            content_hash  = VALUES(content_hash),
+            max_watermark = VALUES(max_watermark),
+            high_key      = VALUES(high_key),
+            rows_ingested = rows_ingested + VALUES(rows_ingested)
+    """, (dataset, path, size, mtime, content_hash, watermark.ts, watermark.key, rows))
+
+
+def plan_files(conn, dataset: str, files: list[str]) -> list[tuple[str, Watermark]]:
+    """
+    Return ``(path, start_watermark)`` for files that need ingesting.
+
+    Unchanged files are skipped; a file whose content changed resumes from
+    its own previous max watermark, a new file starts from the epoch.
+    """
+    checkpoints = _load_checkpoints(conn, dataset)
+    todo, unchanged = [], 0
+    for path in files:
+        st = os.stat(path)
+        cp = checkpoints.get(path)
+        if cp is None:
+            todo.append((path, Watermark(EPOCH)))
+            continue
+        if cp["size"] == st.st_size and cp["mtime"] == st.st_mtime:
+            unchanged += 1
+            continue
+        content_hash = file_hash(path)
+        if content_hash == cp["hash"]:
+            # touched but identical — refresh mtime so the next run skips cheaply
+            _save_checkpoint(conn, dataset, path, st.st_size, st.st_mtime,
+                             content_hash, cp["watermark"], 0)
+            unchanged += 1
+            continue
+        todo.append((path, cp["watermark"]))
+    logger.info(json.dumps({
+        "event": "dataset_plan", "dataset": dataset,
+        "files": len(files), "pending": len(todo), "unchanged": unchanged,
+    }))
+    return todo
+
+
+def _ingest_one(dataset: str, path: str, start_wm: Watermark) -> LoadStats:
+    conn = get_conn()
+    try:
+        st = os.stat(path)
+        content_hash = file_hash(path)
+        stats = load_file(path, conn, dataset, start_wm)
+        _save_checkpoint(conn, dataset, path, st.st_size, st.st_mtime,
+                         content_hash, stats.mark, stats.rows)
+    finally:
+        conn.close()
+    logger.info(json.dumps({
+        "event": "ingest_file", "dataset": dataset, "file": path,
+        "rows": stats.rows, "watermark": stats.mark.ts,
+    }))
+    return stats
+
+
+def ingest_files(conn, dataset: str, files: list[str], workers: int | None = None) -> LoadStats:
+    """Ingest new/changed *files* of *dataset* in parallel."""
+    _ensure_table(conn)
+    current = get_watermark(conn, dataset)
+    todo = plan_files(conn, dataset, files)
+    if not todo:
+        logger.info(json.dumps({"event": f"ingest_{dataset}", "rows": 0, "files": 0}))
+        return LoadStats(0, current)
+
+    workers = max(1, workers or int(os.getenv("INGEST_WORKERS", "4")))
+    with ThreadPoolExecutor(max_workers=min(workers, len(todo)),
+                            thread_name_prefix=f"ingest-{dataset}") as pool:
+        # copy_context keeps stage instrumentation attached in worker threads
+        futures = [
+            pool.submit(contextvars.copy_context().run, _ingest_one, dataset, path, wm)
+            for path, wm in todo
+        ]
+        try:
+            results = [f.result() for f in futures]
+        except BaseException:
+            # e.g. a timed-out pipeline node killed a worker's connection:
+            # do not start the remaining files
+            for f in futures:
+                f.cancel()
+            raise
+
+    total = LoadStats(0, current)
+    for stats in results:
+        total = merge_stats(total, stats)
+    set_watermark(conn, dataset, total.mark)
+    logger.info(json.dumps({
+        "event": f"ingest_{dataset}", "rows": total.rows, "files": len(todo),
+        "watermark": total.mark.ts,
+    }))
+    return total
+
+
+def ingest_dataset(conn, dataset: str, data_dir: str,
+                   manifest: dict[str, list[str]] | None = None) -> LoadStats:
+    """
+    Ingest *dataset* from the manifest, a ``<data_dir>/<dataset>/`` directory,
+    or the single ``<data_dir>/<dataset>.<ext>`` file (dataset watermark only).
+    """
+    patterns = (manifest or {}).get(dataset)
+    if patterns is None:
+        directory = os.path.join(data_dir, dataset)
+        if not os.path.isdir(directory):
+            return ingest_single(resolve_dataset(data_dir, dataset), conn, dataset)
+        patterns = [directory]
+    files = expand_sources(patterns)
+    if not files:
+        raise RuntimeError(f"No input files for dataset '{dataset}' matched {patterns}")
+    return ingest_files(conn, dataset, files)
@@ -0,0 +1,178 @@
+"""
+Partition maintenance and partition-scoped pipeline runs.
+
+fact_order and stg_orders are range-partitioned by month of order_date and
+ops_dq_results by month of run_date (migration 14).  Partitions are named
+``pYYYYMM``; ``p_start`` holds anything older and ``p_future`` is the
+MAXVALUE catch-all.
+
+Maintenance (``python -m src.pipeline partitions``):
+  - pre-creates monthly partitions PARTITION_AHEAD_MONTHS (default 3) ahead
+    by splitting ``p_future`` while it is still empty;
+  - drops partitions older than each table's retention, optionally
+    archiving them first with EXCHANGE PARTITION into
+    ``archive_<table>_<pYYYYMM>`` (a metadata swap, no row copy).
+
+Scoped runs: the orders ingest reports the min/max order_date it upserted
+and the customers ingest the min/max order_date of the staged orders of the
+customers it upserted (a late customer resolves orders staged in earlier
+runs); transform and DQ SQL filter on the union of those ranges so MySQL
+prunes to the partitions the run touched instead of scanning the whole table.
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import date
+
+from ..db import execute, fetch_all
+
+logger = logging.getLogger("pipeline")
+
+# table -> partitioning column and default retention in months
+PARTITIONED_TABLES = {
+    "fact_order":     {"column": "order_date", "retention_months": 36},
+    "stg_orders":     {"column": "order_date", "retention_months": 6},
+    "ops_dq_results": {"column": "run_date",   "retention_months": 12},
+}
+
+# Bounds used when a query runs unscoped, and a range that matches nothing
+MIN_DATE, MAX_DATE = "1000-01-01", "9999-12-31"
+EMPTY_SCOPE = (MAX_DATE, MIN_DATE)
+
+_MONTHLY_RE = re.compile(r"^p(\d{4})(\d{2})$")
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def _partition_month(name: str) -> date | None:
+    m = _MONTHLY_RE.match(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def list_partitions(conn, table: str) -> list[str]:
+    """Partition names of *table* in ordinal order ([] if not partitioned)."""
+    rows = fetch_all(conn, """
+        SELECT PARTITION_NAME
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [r[0] for r in rows]
+
+
+def plan_maintenance(partitions: list[str], today: date, ahead: int,
+                     retention_months: int) -> dict:
+    """
+    Return ``{"create": [month, ...], "expire": [name, ...]}`` for one table.
+
+    Months from the month after the newest ``pYYYYMM`` partition (or the
+    current month) through *ahead* months from now are created; monthly
+    partitions entirely before ``today - retention_months`` expire.
+    """
+    months = sorted(m for m in map(_partition_month, partitions) if m)
+    this_month = today.replace(day=1)
+    start = _add_months(months[-1], 1) if months else this_month
+    create = []
+    month = start
+    while month <= _add_months(this_month, ahead):
+        create.append(month)
+        month = _add_months(month, 1)
+
+    cutoff = _add_months(this_month, -retention_months)
+    expire = [partition_name(m) for m in months if _add_months(m, 1) <= cutoff]
+    return {"create": create, "expire": expire}
+
+
+def _create_partitions(conn, table: str, months: list[date]) -> None:
+    defs = ", ".join(
+        f"PARTITION {partition_name(m)} VALUES LESS THAN ('{_add_months(m, 1):%Y-%m-%d}')"
+        for m in months
+    )
+    execute(conn, f"""
+        ALTER TABLE {table} REORGANIZE PARTITION p_future INTO (
+            {defs}, PARTITION p_future VALUES LESS THAN (MAXVALUE)
+        )
+    """)
+
+
+def _expire_partition(conn, table: str, name: str, archive: bool) -> None:
+    if archive:
+        archive_table = f"archive_{table}_{name}"
+        execute(conn, f"CREATE TABLE {archive_table} LIKE {table}")
+        execute(conn, f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+        execute(conn, f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive_table}")
+    execute(conn, f"ALTER TABLE {table} DROP PARTITION {name}")
+
+
+def maintain_partitions(conn, tables: list[str] | None = None, ahead: int | None = None,
+                        retention: dict[str, int] | None = None, archive: bool = False,
+                        dry_run: bool = False, today: date | None = None) -> dict:
+    """Pre-create future partitions and drop (or archive) expired ones."""
+    ahead = ahead if ahead is not None else int(os.getenv("PARTITION_AHEAD_MONTHS", "3"))
+    today = today or date.today()
+    retention = retention or {}
+    report = {}
+    for table in tables or list(PARTITIONED_TABLES):
+        if table not in PARTITIONED_TABLES:
+            raise RuntimeError(
+                f"Unknown partitioned table '{table}'; expected one of "
+                f"{', '.join(PARTITIONED_TABLES)}"
+            )
+        existing = list_partitions(conn, table)
+        if "p_future" not in existing:
+            raise RuntimeError(f"{table} is not partitioned (apply migration 14 first)")
+        months = retention.get(table, PARTITIONED_TABLES[table]["retention_months"])
+        plan = plan_maintenance(existing, today, ahead, months)
+        report[table] = {
+            "create": [partition_name(m) for m in plan["create"]],
+            "expire": plan["expire"],
+            "archive": archive,
+        }
+        logger.info(json.dumps({
+            "event": "partition_plan", "table": table, "dry_run": dry_run, **report[table],
+        }))
+        if dry_run:
+            continue
+        if plan["create"]:
+            _create_partitions(conn, table, plan["create"])
+        for name in plan["expire"]:
+            _expire_partition(conn, table, name, archive)
+            logger.info(json.dumps({
+                "event": "partition_expired", "table": table, "partition": name,
+                "archived_to": f"archive_{table}_{name}" if archive else None,
+            }))
+    return report
+
+
+def merge_dates(a: tuple | None, b: tuple | None) -> tuple | None:
+    """Union of two (min, max) date ranges; None means empty."""
+    if a is None or b is None:
+        return a or b
+    return (min(a[0], b[0]), max(a[1], b[1]))
+
+
+def run_scope(results: dict[str, dict]) -> tuple[str, str] | None:
+    """
+    Date range touched by the ingest results of a run.
+
+    Returns None (unscoped — full scan) when no result reports dates, e.g.
+    checkpoints written before partitioning, and EMPTY_SCOPE when the
+    partitioned datasets ingested nothing.
+    """
+    reported = [r["dates"] for r in results.values() if "dates" in r]
+    if not reported:
+        return None
+    scope = None
+    for dates in reported:
+        scope = merge_dates(scope, tuple(dates) if dates else None)
+    return scope or EMPTY_SCOPE
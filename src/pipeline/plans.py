@@ -0,0 +1,253 @@
+"""
+Query-plan capture and regression detection for transform and DQ SQL.
+
+When enabled, every SELECT / INSERT … SELECT / UPDATE / DELETE issued by the
+transform and validate steps is run through ``EXPLAIN FORMAT=JSON`` first.
+Per statement the pipeline stores, in ``ops_query_plans``:
+
+  - a fingerprint of the plan shape (table, access type, key per table),
+  - the estimated query cost and rows examined,
+  - a compact per-table summary and the raw plan.
+
+At the end of the run the plans are compared with those of the last
+successful run.  A statement regresses when a table falls back to a full
+scan (``ALL``) it did not use before, the key used changes, or the estimated
+cost grows by more than ``PIPELINE_PLAN_COST_THRESHOLD`` percent.
+
+PIPELINE_PLAN_CHECK:
+    off  – no capture (default)
+    warn – capture and log ``plan_regression`` warnings
+    fail – capture and fail the run on any regression
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+
+from ..db import execute, fetch_all, observe_statements
+
+logger = logging.getLogger("pipeline")
+
+PLAN_CHECK_MODES = ("off", "warn", "fail")
+
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_INSERT_SELECT_RE = re.compile(r"^\s*(INSERT|REPLACE)\b.*\bSELECT\b", re.IGNORECASE | re.DOTALL)
+_WS_RE = re.compile(r"\s+")
+_MAX_SQL_TEXT = 4000
+
+
+def plan_check_mode() -> str:
+    mode = os.getenv("PIPELINE_PLAN_CHECK", "off").strip().lower()
+    if mode not in PLAN_CHECK_MODES:
+        raise RuntimeError(
+            f"Invalid PIPELINE_PLAN_CHECK '{mode}'; expected one of {', '.join(PLAN_CHECK_MODES)}."
+        )
+    return mode
+
+
+def _explainable(sql: str) -> bool:
+    return bool(_EXPLAINABLE_RE.match(sql) or _INSERT_SELECT_RE.match(sql))
+
+
+def _normalise(sql: str) -> str:
+    return _WS_RE.sub(" ", sql).strip()
+
+
+def summarize_plan(plan: dict) -> dict:
+    """Reduce an ``EXPLAIN FORMAT=JSON`` document to cost, rows and per-table access."""
+    tables: list[dict] = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            table = node.get("table")
+            if isinstance(table, dict) and "table_name" in table:
+                cost = table.get("cost_info", {})
+                tables.append({
+                    "table": table["table_name"],
+                    "access_type": table.get("access_type"),
+                    "key": table.get("key"),
+                    "rows_examined": table.get("rows_examined_per_scan"),
+                    "rows_produced": table.get("rows_produced_per_join"),
+                    "prefix_cost": _to_float(cost.get("prefix_cost")),
+                })
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(plan)
+    query_block = plan.get("query_block", {})
+    cost = _to_float(query_block.get("cost_info", {}).get("query_cost"))
+    if cost is None and tables:
+        cost = max((t["prefix_cost"] or 0.0) for t in tables)
+    shape = [(t["table"], t["access_type"], t["key"]) for t in tables]
+    return {
+        "fingerprint": hashlib.sha256(json.dumps(shape).encode("utf-8")).hexdigest()[:16],
+        "est_cost": cost,
+        "est_rows": sum(int(t["rows_examined"] or 0) for t in tables),
+        "tables": tables,
+    }
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _ensure_table(conn) -> None:
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_query_plans (
+            run_id      CHAR(36)      NOT NULL,
+            step        VARCHAR(64)   NOT NULL,
+            stmt_key    CHAR(16)      NOT NULL,
+            sql_text    TEXT          NOT NULL,
+            fingerprint CHAR(16)      NOT NULL,
+            est_cost    DECIMAL(20,2) NULL,
+            est_rows    BIGINT        NULL,
+            summary     LONGTEXT      NOT NULL,
+            plan_json   LONGTEXT      NOT NULL,
+            created_at  TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (run_id, step, stmt_key)
+        ) ENGINE=InnoDB
+    """)
+
+
+class PlanRecorder:
+    """Captures plans for one pipeline run and compares them with the last good run."""
+
+    def __init__(self, conn, run_id: str, mode: str | None = None,
+                 cost_threshold_pct: float | None = None):
+        self.conn = conn
+        self.run_id = run_id
+        self.mode = mode or plan_check_mode()
+        self.cost_threshold_pct = (
+            cost_threshold_pct if cost_threshold_pct is not None
+            else float(os.getenv("PIPELINE_PLAN_COST_THRESHOLD", "50"))
+        )
+        self.plans: dict[tuple[str, str], dict] = {}
+        if self.enabled:
+            _ensure_table(conn)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @contextmanager
+    def capture(self, step: str):
+        """Capture plans for statements issued inside the block under *step*."""
+        if not self.enabled:
+            yield
+            return
+        with observe_statements(lambda conn, sql, params: self._explain(step, conn, sql, params)):
+            yield
+
+    def _explain(self, step: str, conn, sql: str, params) -> None:
+        if not _explainable(sql):
+            return
+        text = _normalise(sql)
+        stmt_key = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        if (step, stmt_key) in self.plans:
+            return
+        cur = conn.cursor()
+        try:
+            cur.execute(f"EXPLAIN FORMAT=JSON {sql}", params or ())
+            (raw,) = cur.fetchone()
+        except Exception as exc:
+            logger.warning(json.dumps({
+                "event": "plan_capture_failed", "step": step, "stmt_key": stmt_key,
+                "error": str(exc),
+            }))
+            return
+        finally:
+            cur.close()
+        summary = summarize_plan(json.loads(raw))
+        self.plans[(step, stmt_key)] = summary
+        execute(conn, """
+            INSERT INTO ops_query_plans
+                (run_id, step, stmt_key, sql_text, fingerprint, est_cost, est_rows,
+                 summary, plan_json)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE fingerprint = VALUES(fingerprint)
+        """, (
+            self.run_id, step, stmt_key, text[:_MAX_SQL_TEXT], summary["fingerprint"],
+            summary["est_cost"], summary["est_rows"],
+            json.dumps(summary["tables"]), raw,
+        ))
+
+    def _baseline(self) -> dict[tuple[str, str], dict]:
+        rows = fetch_all(self.conn, """
+            SELECT p.step, p.stmt_key, p.fingerprint, p.est_cost, p.summary
+            FROM ops_query_plans p
+            WHERE p.run_id = (
+                SELECT r.run_id
+                FROM ops_pipeline_runs r
+                WHERE r.status = 'succeeded' AND r.run_id <> %s
+                  AND EXISTS (SELECT 1 FROM ops_query_plans q WHERE q.run_id = r.run_id)
+                ORDER BY r.finished_at DESC
+                LIMIT 1
+            )
+        """, (self.run_id,))
+        return {
+            (step, key): {
+                "fingerprint": fp,
+                "est_cost": float(cost) if cost is not None else None,
+                "tables": json.loads(summary),
+            }
+            for step, key, fp, cost, summary in rows
+        }
+
+    def compare(self, baseline: dict[tuple[str, str], dict]) -> list[dict]:
+        """Return one entry per statement whose plan regressed against *baseline*."""
+        regressions = []
+        for (step, key), cur in sorted(self.plans.items()):
+            base = baseline.get((step, key))
+            if base is None:
+                continue
+            reasons = []
+            base_access = {t["table"]: t for t in base["tables"]}
+            for t in cur["tables"]:
+                old = base_access.get(t["table"])
+                if old is None:
+                    continue
+                if t["access_type"] == "ALL" and old["access_type"] != "ALL":
+                    reasons.append(f"{t['table']}: {old['access_type']} -> full scan")
+                elif t["key"] != old["key"]:
+                    reasons.append(f"{t['table']}: key {old['key']} -> {t['key']}")
+            if base["est_cost"] and cur["est_cost"] is not None:
+                growth = (cur["est_cost"] - base["est_cost"]) / base["est_cost"] * 100
+                if growth > self.cost_threshold_pct:
+                    reasons.append(
+                        f"estimated cost {base['est_cost']:.1f} -> {cur['est_cost']:.1f} "
+                        f"(+{growth:.0f}%)"
+                    )
+            if reasons:
+                regressions.append({
+                    "step": step, "stmt_key": key,
+                    "fingerprint": cur["fingerprint"], "baseline_fingerprint": base["fingerprint"],
+                    "reasons": reasons,
+                })
+        return regressions
+
+    def check(self) -> list[dict]:
+        """Compare with the last successful run; warn or raise per the mode."""
+        if not self.enabled or not self.plans:
+            return []
+        regressions = self.compare(self._baseline())
+        for reg in regressions:
+            logger.warning(json.dumps({"event": "plan_regression", "run_id": self.run_id, **reg}))
+        logger.info(json.dumps({
+            "event": "plan_check", "run_id": self.run_id,
+            "statements": len(self.plans), "regressions": len(regressions),
+        }))
+        if regressions and self.mode == "fail":
+            raise RuntimeError(
+                f"Query plan regressed for {len(regressions)} statement(s) — "
+                f"see ops_query_plans for run {self.run_id}."
+            )
+        return regressions
@@ -1,10 +1,17 @@
 """
-Pipeline orchestrator — runs the full pipeline:
-
-    ingest → transform → validate
+Pipeline orchestrator — runs the pipeline defined in a YAML DAG
+(``pipelines/default.yml``: ingest → transform → validate).
 
 With:
   - Run-level audit (ops_pipeline_runs)
+  - Independent nodes run concurrently, each on its own connection, with
+    per-node retries and timeouts (see src/pipeline/dag.py)
+  - Node-level checkpoints in details.steps, so a failed run can be resumed
+    (same run_id) from its incomplete nodes or from a named node
+  - Per-node timings (wall/CPU/RSS/DB round-trips) stored in details.timings
+    and optionally exported as OpenMetrics text
+  - Optional EXPLAIN plan capture for transform/DQ SQL with regression checks
+    against the last successful run (PIPELINE_PLAN_CHECK)
   - Failure handling and status recording
   - Idempotent design (safe to re-run)
 """
@@ -14,69 +21,72 @@ import logging
 import os
 import uuid
 
-from ..db import get_conn, execute
-from .ingest import ingest_customers, ingest_orders
-from .transform import build_dimensions, build_facts
-from .validate import run_validations
+from ..db import get_conn, execute, fetch_one
+from ..metrics import RunProfiler
+from .dag import DEFAULT_PIPELINE, descendants, load_pipeline, run_dag
+from .datasets import MANIFEST_NAME, load_manifest
+from .plans import PlanRecorder
 
 logger = logging.getLogger("pipeline")
 
 
-def run_pipeline(env_name: str = "dev",
-                 data_dir: str = "data/raw",
-                 sql_dir: str = "sql") -> str:
-    """
-    Orchestrate the full pipeline.
-
-    Returns the *run_id* on success; raises on failure.
-    """
-    run_id  = str(uuid.uuid4())
-    git_sha = os.getenv("GITHUB_SHA")
-    actor   = os.getenv("GITHUB_ACTOR", "local")
-
-    conn = get_conn()
-
-    # Record pipeline start ---------------------------------------------------
+def _checkpoint_step(conn, run_id: str, step: str, result: dict) -> None:
+    """Record *step* as succeeded (with its *result*) in details.steps."""
     execute(conn, """
-        INSERT INTO ops_pipeline_runs
-            (run_id, env_name, status, git_sha, actor)
-        VALUES (%s, %s, 'running', %s, %s)
-    """, (run_id, env_name, git_sha, actor))
+        UPDATE ops_pipeline_runs
+        SET details = JSON_SET(
+                JSON_SET(COALESCE(details, '{}'), '$.steps',
+                         COALESCE(JSON_EXTRACT(details, '$.steps'), JSON_OBJECT())),
+                CONCAT('$.steps.', %s), CAST(%s AS JSON)
+            )
+        WHERE run_id = %s
+    """, (step, json.dumps({"status": "succeeded", **result}), run_id))
 
-    try:
-        # Step 1: Ingest ------------------------------------------------------
-        logger.info(json.dumps({"event": "pipeline_step", "step": "ingest", "run_id": run_id}))
-        cust_count  = ingest_customers(os.path.join(data_dir, "customers.csv"), conn)
-        order_count = ingest_orders(os.path.join(data_dir, "orders.csv"), conn)
 
-        # Step 2: Transform ---------------------------------------------------
-        logger.info(json.dumps({"event": "pipeline_step", "step": "transform", "run_id": run_id}))
-        build_dimensions(conn, sql_dir)
-        build_facts(conn, run_id, sql_dir)
+def _ingested(nodes: dict[str, dict], results: dict[str, dict], dataset: str) -> int:
+    return sum(results.get(name, {}).get("rows", 0)
+               for name, node in nodes.items()
+               if node["type"] == "ingest" and node["dataset"] == dataset)
 
-        # Step 3: Validate ----------------------------------------------------
-        logger.info(json.dumps({"event": "pipeline_step", "step": "validate", "run_id": run_id}))
-        all_passed = run_validations(conn, run_id)
 
-        if not all_passed:
-            raise RuntimeError(
-                "Data quality checks failed — see ops_dq_results for details."
+def _execute_run(conn, run_id: str, nodes: dict[str, dict], ctx: dict,
+                 completed: dict[str, dict], metrics_file: str | None) -> None:
+    """Run every node not in *completed*, checkpointing each, and finalise the run row."""
+    profiler = RunProfiler(run_id)
+    plans = PlanRecorder(conn, run_id)
+
+    try:
+        with profiler.activate():
+            results = run_dag(
+                nodes, run_id, ctx, completed,
+                on_success=lambda step, result: _checkpoint_step(conn, run_id, step, result),
+                profiler=profiler, plans=plans,
             )
 
+        plan_regressions = plans.check()
+        cust_count = _ingested(nodes, results, "customers")
+        order_count = _ingested(nodes, results, "orders")
+
         # Success -------------------------------------------------------------
         execute(conn, """
             UPDATE ops_pipeline_runs
             SET status = 'succeeded', finished_at = NOW(),
-                details = JSON_OBJECT(
-                    'customers_ingested', %s,
-                    'orders_ingested', %s
+                details = JSON_SET(
+                    COALESCE(details, '{}'),
+                    '$.customers_ingested', %s,
+                    '$.orders_ingested', %s,
+                    '$.timings', CAST(%s AS JSON),
+                    '$.plan_regressions', CAST(%s AS JSON)
                 )
             WHERE run_id = %s
-        """, (cust_count, order_count, run_id))
+        """, (cust_count, order_count, json.dumps(profiler.to_dict()),
+              json.dumps(plan_regressions), run_id))
 
         logger.info(json.dumps({
             "event": "pipeline_complete", "run_id": run_id,
             "customers": cust_count, "orders": order_count,
+            "skipped_steps": sorted(completed),
+            "seconds": profiler.to_dict()["total_seconds"],
         }))
 
     except Exception as exc:
@@ -85,14 +95,147 @@ def run_pipeline(env_name: str = "dev",
                 UPDATE ops_pipeline_runs
                 SET status = 'failed', finished_at = NOW(),
                     details = JSON_SET(
-                        COALESCE(details, '{}'), '$.error', %s
+                        COALESCE(details, '{}'), '$.error', %s,
+                        '$.timings', CAST(%s AS JSON)
                     )
                 WHERE run_id = %s
-            """, (str(exc), run_id))
+            """, (str(exc), json.dumps(profiler.to_dict()), run_id))
         except Exception:
             pass  # best-effort audit
         raise
 
+    finally:
+        if metrics_file:
+            try:
+                profiler.write_openmetrics(metrics_file)
+            except OSError as exc:
+                logger.warning(json.dumps({
+                    "event": "metrics_export_failed", "path": metrics_file, "error": str(exc),
+                }))
+
+
+def run_pipeline(env_name: str = "dev",
+                 data_dir: str = "data/raw",
+                 sql_dir: str = "sql",
+                 metrics_file: str | None = None,
+                 manifest_path: str | None = None,
+                 pipeline_path: str | None = None) -> str:
+    """
+    Orchestrate the full pipeline.
+
+    The nodes and their dependencies come from *pipeline_path* (or
+    ``PIPELINE_DEFINITION``, default ``pipelines/default.yml``).
+
+    Every node is timed; the timings document is stored in
+    ``ops_pipeline_runs.details.timings`` and, when *metrics_file* (or
+    ``PIPELINE_METRICS_FILE``) is set, written there as OpenMetrics text.
+
+    Datasets are read from *manifest_path* (or ``PIPELINE_MANIFEST``, or
+    ``<data_dir>/datasets.yml`` if present); otherwise each dataset is a
+    ``<data_dir>/<name>/`` directory or a single ``<data_dir>/<name>.<ext>`` file.
+
+    Returns the *run_id* on success; raises on failure.
+    """
+    run_id  = str(uuid.uuid4())
+    git_sha = os.getenv("GITHUB_SHA")
+    actor   = os.getenv("GITHUB_ACTOR", "local")
+    metrics_file = metrics_file or os.getenv("PIPELINE_METRICS_FILE")
+    manifest_path = (manifest_path or os.getenv("PIPELINE_MANIFEST")
+                     or os.path.join(data_dir, MANIFEST_NAME))
+    pipeline_path = pipeline_path or os.getenv("PIPELINE_DEFINITION", DEFAULT_PIPELINE)
+    nodes = load_pipeline(pipeline_path)
+    ctx = {
+        "data_dir": data_dir,
+        "sql_dir": sql_dir,
+        "manifest_path": manifest_path,
+        "manifest": load_manifest(manifest_path),
+    }
+
+    conn = get_conn()
+    try:
+        # Record pipeline start (with the arguments a resume needs) -----------
+        execute(conn, """
+            INSERT INTO ops_pipeline_runs
+                (run_id, env_name, status, git_sha, actor, details)
+            VALUES (%s, %s, 'running', %s, %s, JSON_OBJECT('args', CAST(%s AS JSON)))
+        """, (run_id, env_name, git_sha, actor, json.dumps({
+            "data_dir": data_dir, "sql_dir": sql_dir, "manifest": manifest_path,
+            "pipeline": pipeline_path,
+        })))
+        _execute_run(conn, run_id, nodes, ctx, {}, metrics_file)
+    finally:
+        conn.close()
+
+    return run_id
+
+
+def resume_pipeline(run_id: str,
+                    from_step: str | None = None,
+                    data_dir: str | None = None,
+                    sql_dir: str | None = None,
+                    metrics_file: str | None = None,
+                    manifest_path: str | None = None,
+                    pipeline_path: str | None = None) -> str:
+    """
+    Resume a failed run under the same *run_id*.
+
+    Nodes already checkpointed as succeeded are skipped.  With *from_step*,
+    that node and everything downstream of it re-run; other checkpointed
+    nodes are kept.  Paths default to those recorded when the run started.
+    """
+    conn = get_conn()
+    try:
+        row = fetch_one(conn, """
+            SELECT status, details FROM ops_pipeline_runs WHERE run_id = %s
+        """, (run_id,))
+        if not row:
+            raise RuntimeError(f"Pipeline run '{run_id}' not found")
+        status, details = row[0], json.loads(row[1] or "{}")
+        if status == "running":
+            raise RuntimeError(f"Pipeline run '{run_id}' is still running")
+        if status == "succeeded" and from_step is None:
+            raise RuntimeError(
+                f"Pipeline run '{run_id}' already succeeded; pass --from-step to re-run steps"
+            )
+
+        args = details.get("args", {})
+        pipeline_path = pipeline_path or args.get("pipeline", DEFAULT_PIPELINE)
+        nodes = load_pipeline(pipeline_path)
+        if from_step is not None and from_step not in nodes:
+            raise RuntimeError(
+                f"Unknown step '{from_step}'; expected one of {', '.join(nodes)}"
+            )
+
+        rerun = {from_step} | descendants(nodes, from_step) if from_step else set()
+        completed = {s: r for s, r in details.get("steps", {}).items()
+                     if s in nodes and s not in rerun and r.get("status") == "succeeded"}
+
+        data_dir = data_dir or args.get("data_dir", "data/raw")
+        sql_dir = sql_dir or args.get("sql_dir", "sql")
+        manifest_path = manifest_path or args.get("manifest")
+        ctx = {
+            "data_dir": data_dir,
+            "sql_dir": sql_dir,
+            "manifest_path": manifest_path,
+            "manifest": load_manifest(manifest_path),
+        }
+
+        execute(conn, """
+            UPDATE ops_pipeline_runs
+            SET status = 'running', finished_at = NULL,
+                details = JSON_SET(
+                    JSON_REMOVE(COALESCE(details, '{}'), '$.error'),
+                    '$.resumed_from', %s
+                )
+            WHERE run_id = %s
+        """, (from_step or next((s for s in nodes if s not in completed), None), run_id))
+        logger.info(json.dumps({
+            "event": "pipeline_resume", "run_id": run_id,
+            "skipping": sorted(completed), "from_step": from_step,
+        }))
+
+        _execute_run(conn, run_id, nodes, ctx, completed,
+                     metrics_file or os.getenv("PIPELINE_METRICS_FILE"))
     finally:
         conn.close()
 
@@ -5,6 +5,10 @@ Reads SQL files from sql/transform/ and executes them against MySQL.
 Demonstrates:
   - SCD Type 2 dimension management  (build_dims.sql)
   - Fact-table join + idempotent upsert  (build_facts.sql)
+
+Fact SQL reads the session variables ``@touched_from`` / ``@touched_to``
+(the order_date range the run ingested) so only those partitions are
+rebuilt; both NULL means the whole table.
 """
 
 import json
@@ -24,16 +28,40 @@ def build_dimensions(conn, sql_dir: str = "sql") -> None:
     logger.info(json.dumps({"event": "transform_dims_complete"}))
 
 
-def build_facts(conn, run_id: str, sql_dir: str = "sql") -> None:
+def _set_scope(conn, scope: tuple[str, str] | None) -> None:
+    lo, hi = scope or (None, None)
+    execute(conn, "SET @touched_from = %s, @touched_to = %s", (lo, hi))
+
+
+def build_facts(conn, run_id: str, sql_dir: str = "sql",
+                scope: tuple[str, str] | None = None) -> None:
     """Execute the fact-table build SQL.
 
     Sets the MySQL session variable ``@run_id`` so the SQL can stamp
-    every row with the pipeline run identifier.
+    every row with the pipeline run identifier, and limits the build to
+    the order_date range *scope* (all orders if None).
     """
     sql_path = Path(sql_dir) / "transform" / "build_facts.sql"
     sql_text = sql_path.read_text(encoding="utf-8")
 
-    # Set session variable for the SQL script
+    # Set session variables for the SQL script
     execute(conn, "SET @run_id = %s", (run_id,))
+    _set_scope(conn, scope)
     execute_script(conn, sql_text)
     logger.info(json.dumps({"event": "transform_facts_complete", "run_id": run_id}))
+
+
+def run_sql_file(conn, sql_dir: str, rel_path: str, run_id: str | None = None,
+                 scope: tuple[str, str] | None = None) -> None:
+    """Execute ``<sql_dir>/<rel_path>``, setting ``@run_id`` first when given
+    and ``@touched_from`` / ``@touched_to`` to *scope*.
+
+    Used by pipeline definitions to add transforms without new Python code.
+    """
+    sql_path = Path(sql_dir) / rel_path
+    sql_text = sql_path.read_text(encoding="utf-8")
+    if run_id is not None:
+        execute(conn, "SET @run_id = %s", (run_id,))
+    _set_scope(conn, scope)
+    execute_script(conn, sql_text)
+    logger.info(json.dumps({"event": "transform_sql_complete", "file": rel_path}))
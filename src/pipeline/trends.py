@@ -0,0 +1,185 @@
+"""
+Cross-run DQ metric trends and statistical anomaly thresholds.
+
+Every DQ check metric (``dq:<check>``) and the rows each ingest node loaded
+(``rows_ingested:<dataset>``) are stored once per run in ``ops_dq_metrics``
+— one DOUBLE per metric and run.  Thresholds are evaluated in-process
+against a bounded window of the last DQ_TREND_WINDOW (default 30) values
+per metric.  The window lives in ``ops_dq_baselines`` (one row per metric)
+and in a process-local cache, so a run reads one small row per metric
+instead of scanning history.
+
+Rules per metric family (TREND_RULES):
+  pct_change – percent change vs. the rolling median
+  zscore     – standard deviations from the rolling mean
+with a direction (``drop``, ``rise`` or ``both``) and a threshold.  A
+metric with fewer than DQ_TREND_MIN_HISTORY (default 5) earlier values is
+still learning and never flagged.
+
+DQ_TREND_CHECK:
+    off  – store metrics only
+    warn – log ``dq_trend_anomaly`` warnings (default)
+    fail – also fail the node that produced the anomalous metric
+"""
+
+import json
+import logging
+import os
+import statistics
+import threading
+
+from ..db import execute, execute_many, fetch_all
+
+logger = logging.getLogger("pipeline")
+
+TREND_CHECK_MODES = ("off", "warn", "fail")
+
+# metric family (name before ':') -> rules; every rule is evaluated
+TREND_RULES = {
+    "rows_ingested": [
+        # a broken upstream export usually shows up as a sudden volume drop
+        {"method": "pct_change", "direction": "drop", "threshold": 50.0},
+        {"method": "zscore", "direction": "both", "threshold": 4.0},
+    ],
+}
+
+# metric -> [[run_id, value], ...], oldest first
+_windows: dict[str, list] = {}
+_lock = threading.Lock()
+
+
+def trend_check_mode() -> str:
+    mode = os.getenv("DQ_TREND_CHECK", "warn").strip().lower()
+    if mode not in TREND_CHECK_MODES:
+        raise RuntimeError(
+            f"Invalid DQ_TREND_CHECK '{mode}'; expected one of {', '.join(TREND_CHECK_MODES)}."
+        )
+    return mode
+
+
+def _window_size() -> int:
+    return max(2, int(os.getenv("DQ_TREND_WINDOW", "30")))
+
+
+def _min_history() -> int:
+    return max(2, int(os.getenv("DQ_TREND_MIN_HISTORY", "5")))
+
+
+def _ensure_tables(conn) -> None:
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_dq_metrics (
+            metric_name VARCHAR(160) NOT NULL,
+            run_id      CHAR(36)     NOT NULL,
+            value       DOUBLE       NOT NULL,
+            recorded_at TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (metric_name, run_id),
+            KEY idx_dq_metrics_recorded (recorded_at)
+        ) ENGINE=InnoDB
+    """)
+    execute(conn, """
+        CREATE TABLE IF NOT EXISTS ops_dq_baselines (
+            metric_name VARCHAR(160) NOT NULL PRIMARY KEY,
+            window_json LONGTEXT     NOT NULL,
+            updated_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP
+                                     ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """)
+
+
+def _load_windows(conn, names: list[str]) -> None:
+    missing = [n for n in names if n not in _windows]
+    if not missing:
+        return
+    rows = fetch_all(conn, f"""
+        SELECT metric_name, window_json FROM ops_dq_baselines
+        WHERE metric_name IN ({', '.join(['%s'] * len(missing))})
+    """, missing)
+    for name, window_json in rows:
+        _windows[name] = json.loads(window_json)
+    for name in missing:
+        _windows.setdefault(name, [])
+
+
+def _score(history: list[float], value: float, method: str) -> float | None:
+    if method == "pct_change":
+        median = statistics.median(history)
+        return (value - median) / median * 100.0 if median else None
+    if method == "zscore":
+        mean = statistics.fmean(history)
+        stdev = statistics.pstdev(history)
+        # a flat history has no spread to measure against; pct_change covers it
+        return (value - mean) / stdev if stdev else None
+    raise RuntimeError(f"Unknown trend method '{method}'")
+
+
+def evaluate(history: list[float], value: float, rules: list[dict],
+             min_history: int | None = None) -> list[dict]:
+    """Return one finding per rule: score, threshold and whether it is anomalous."""
+    min_history = min_history or _min_history()
+    findings = []
+    for rule in rules:
+        finding = {**rule, "score": None, "anomalous": False}
+        if len(history) >= min_history:
+            score = _score(history, value, rule["method"])
+            if score is not None:
+                limit = rule["threshold"]
+                direction = rule["direction"]
+                finding["score"] = round(score, 4)
+                finding["anomalous"] = (
+                    (direction in ("drop", "both") and score < -limit)
+                    or (direction in ("rise", "both") and score > limit)
+                )
+        findings.append(finding)
+    return findings
+
+
+def record_metrics(conn, run_id: str, metrics: dict[str, float]) -> dict[str, dict]:
+    """
+    Store *metrics* for *run_id*, roll them into their windows and evaluate
+    TREND_RULES.  Returns ``{metric: {"value", "baseline", "findings"}}`` for
+    metrics that have rules.  A retried node replaces its earlier value.
+    """
+    if not metrics:
+        return {}
+    mode = trend_check_mode()
+    _ensure_tables(conn)
+    size = _window_size()
+    evaluated: dict[str, dict] = {}
+    with _lock:
+        _load_windows(conn, list(metrics))
+        for name, value in metrics.items():
+            value = float(value)
+            window = [e for e in _windows[name] if e[0] != run_id]
+            history = [v for _, v in window]
+            rules = TREND_RULES.get(name.split(":", 1)[0]) if mode != "off" else None
+            if rules:
+                evaluated[name] = {
+                    "value": value,
+                    "baseline": round(statistics.median(history), 4) if history else None,
+                    "history": len(history),
+                    "findings": evaluate(history, value, rules),
+                }
+            _windows[name] = (window + [[run_id, value]])[-size:]
+        baselines = [(name, json.dumps(_windows[name])) for name in metrics]
+
+    execute_many(conn, """
+        INSERT INTO ops_dq_metrics (metric_name, run_id, value)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE value = VALUES(value), recorded_at = CURRENT_TIMESTAMP
+    """, [(name, run_id, float(value)) for name, value in metrics.items()])
+    execute_many(conn, """
+        INSERT INTO ops_dq_baselines (metric_name, window_json)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE window_json = VALUES(window_json)
+    """, baselines)
+
+    for name, result in evaluated.items():
+        for finding in result["findings"]:
+            if finding["anomalous"]:
+                logger.warning(json.dumps({
+                    "event": "dq_trend_anomaly", "run_id": run_id, "metric": name,
+                    "value": result["value"], "baseline": result["baseline"],
+                    "method": finding["method"], "direction": finding["direction"],
+                    "score": finding["score"], "threshold": finding["threshold"],
+                }))
+    return evaluated
@@ -10,88 +10,201 @@ Checks:
   DQ-3  fact_recon_count      – fact row count == joinable staging count
   DQ-4  null_required_fields  – null / empty required columns
   DQ-5  negative_amounts      – order amounts ≤ 0
+
+Volume:
+  row_volume:<dataset>        – rows an ingest node loaded vs. the rolling
+                                 history of that dataset (see trends.py)
+
+orphan_orders, null_required_fields and negative_amounts can run sampled
+(a ``sample`` entry on the checks node, see sampling.py): they estimate the
+violation rate from primary-key range blocks and scan exactly only when the
+estimate is too close to the allowed rate to decide.
+
+Each check is a function registered in CHECKS, so the pipeline DAG can run
+them individually as soon as the tables they read are loaded;
+run_validations() runs them all in order.
+
+Checks on stg_orders / fact_order take a *scope* — the order_date range
+the run ingested — so they read only the partitions the run touched
+(None checks the whole table).  orphan_orders and fact_recon_count also
+depend on customers and facts, which can change while no order was
+ingested, so under EMPTY_SCOPE they check the whole table rather than
+recording a pass over nothing.  Results are stored under the run's start
+date (run_date), the partitioning column of ops_dq_results; run_checks()
+writes all of its results in one multi-row insert and commit, and adds
+each check's metric to the cross-run trend store (``dq:<check>``).
 """
 
+import contextvars
 import json
 import logging
 
-from ..db import fetch_one, execute
+from ..db import fetch_one, execute, execute_many
+from .partitions import EMPTY_SCOPE, MAX_DATE, MIN_DATE
+from .sampling import (
+    decide, estimate_rows, exact_violations, sample_settings, sample_violations,
+)
+from .trends import record_metrics, trend_check_mode
 
 logger = logging.getLogger("pipeline")
 
+_RECORD_SQL = """
+    INSERT INTO ops_dq_results
+        (run_id, check_name, run_date, status, metric_value, threshold, details)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        status       = VALUES(status),
+        metric_value = VALUES(metric_value),
+        threshold    = VALUES(threshold),
+        details      = VALUES(details),
+        created_at   = CURRENT_TIMESTAMP
+"""
+
+# Results buffered by run_checks(); None when checks are called directly
+_pending: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    "dq_pending_results", default=None,
+)
+
+
+def _bounds(scope: tuple[str, str] | None) -> tuple[str, str]:
+    return tuple(scope) if scope else (MIN_DATE, MAX_DATE)
+
+
+def _run_date(conn, run_id: str):
+    (run_date,) = fetch_one(conn, """
+        SELECT COALESCE(
+            (SELECT DATE(started_at) FROM ops_pipeline_runs WHERE run_id = %s),
+            CURRENT_DATE)
+    """, (run_id,))
+    return run_date
+
 
 def _record(conn, run_id: str, name: str, passed: bool,
             metric=None, threshold=None, details: str | None = None) -> None:
-    execute(conn, """
-        INSERT INTO ops_dq_results
-            (run_id, check_name, status, metric_value, threshold, details)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (
-        run_id, name,
-        "pass" if passed else "fail",
-        metric, threshold, details,
-    ))
-
-
-def run_validations(conn, run_id: str) -> bool:
-    """Execute all DQ checks and return True if every check passes."""
-    failures = 0
+    pending = _pending.get()
+    row = [run_id, name, None, "pass" if passed else "fail", metric, threshold, details]
+    if pending is not None:
+        pending.append(row)
+        return
+    row[2] = _run_date(conn, run_id)
+    execute(conn, _RECORD_SQL, row)
 
-    # DQ-1: orphan orders ----------------------------------------------------
+
+def _sampled_check(conn, run_id: str, name: str, sample, scope, rule: str) -> bool:
+    """Run a SAMPLEABLE check from a sample, escalating to an exact count if needed."""
+    spec = SAMPLEABLE[name]
+    settings = sample_settings(sample)
+    where, params = "1=1", ()
+    if spec["scope_column"]:
+        where, params = f"t.{spec['scope_column']} BETWEEN %s AND %s", _bounds(scope)
+    est = sample_violations(conn, spec["table"], spec["pk"], spec["predicate"], settings,
+                            seed=f"{run_id}:{name}", where=where, params=params)
+    decision = decide(est, settings["max_rate"])
+    details = {
+        "rule": rule, "mode": "sampled", "sampled": est.sampled, "violations": est.violations,
+        "rate": round(est.rate, 8), "ci_low": round(est.low, 8), "ci_high": round(est.high, 8),
+        "confidence": settings["confidence"], "max_rate": settings["max_rate"],
+    }
+    if decision == "escalate":
+        total, violations = exact_violations(conn, spec["table"], spec["predicate"],
+                                             where, params)
+        ok = violations <= settings["max_rate"] * total
+        metric, threshold = violations, settings["max_rate"] * total
+        details.update(mode="exact", escalated=True, rows=total)
+    else:
+        ok = decision == "pass"
+        rows = estimate_rows(conn, spec["table"], where, params)
+        metric, threshold = round(est.rate * rows), settings["max_rate"] * rows
+        details.update(est_rows=rows)
+    _record(conn, run_id, name, ok, metric=metric, threshold=threshold,
+            details=json.dumps(details))
+    logger.info(json.dumps({"event": "dq_sampled", "check": name, "decision": decision,
+                            **{k: v for k, v in details.items() if k != "rule"}}))
+    if not ok:
+        logger.error(json.dumps({"event": "dq_fail", "check": name, "mode": details["mode"],
+                                 "estimated_violations": metric}))
+    return ok
+
+
+# DQ-1: orphan orders --------------------------------------------------------
+def check_orphan_orders(conn, run_id: str, scope=None, sample=None) -> bool:
+    if sample:
+        return _sampled_check(conn, run_id, "orphan_orders", sample, scope,
+                              "every order must have a customer")
     (orphan_count,) = fetch_one(conn, """
         SELECT COUNT(*)
         FROM stg_orders o
         LEFT JOIN stg_customers c ON c.customer_id = o.customer_id
         WHERE c.customer_id IS NULL
-    """)
+          AND o.order_date BETWEEN %s AND %s
+    """, _bounds(scope))
     ok = orphan_count == 0
     _record(conn, run_id, "orphan_orders", ok,
             metric=orphan_count, threshold=0,
             details='{"rule":"every order must have a customer"}')
     if not ok:
-        failures += 1
         logger.error(json.dumps({
             "event": "dq_fail", "check": "orphan_orders",
             "orphan_count": int(orphan_count),
         }))
+    return ok
+
 
-    # DQ-2: duplicate order IDs -----------------------------------------------
+# DQ-2: duplicate order IDs ---------------------------------------------------
+def check_duplicate_order_ids(conn, run_id: str, scope=None) -> bool:
+    # order_date is part of the key, so a duplicate can span partitions:
+    # collect the touched ids, then count every row for them by PK prefix.
     (dup_count,) = fetch_one(conn, """
         SELECT COUNT(*) FROM (
-            SELECT order_id FROM stg_orders
-            GROUP BY order_id HAVING COUNT(*) > 1
+            SELECT s.order_id
+            FROM stg_orders s
+            INNER JOIN (
+                SELECT DISTINCT order_id FROM stg_orders
+                WHERE order_date BETWEEN %s AND %s
+            ) t ON t.order_id = s.order_id
+            GROUP BY s.order_id HAVING COUNT(*) > 1
         ) x
-    """)
+    """, _bounds(scope))
     ok = dup_count == 0
     _record(conn, run_id, "duplicate_order_ids", ok,
             metric=dup_count, threshold=0,
             details='{"rule":"order_id must be unique"}')
     if not ok:
-        failures += 1
         logger.error(json.dumps({
             "event": "dq_fail", "check": "duplicate_order_ids",
             "dup_count": int(dup_count),
         }))
+    return ok
+
 
-    # DQ-3: fact reconciliation ------------------------------------------------
+# DQ-3: fact reconciliation ---------------------------------------------------
+def check_fact_recon_count(conn, run_id: str, scope=None) -> bool:
     (stg_joinable,) = fetch_one(conn, """
         SELECT COUNT(*)
         FROM stg_orders o
         INNER JOIN stg_customers c ON c.customer_id = o.customer_id
-    """)
-    (fact_count,) = fetch_one(conn, "SELECT COUNT(*) FROM fact_order")
+        WHERE o.order_date BETWEEN %s AND %s
+    """, _bounds(scope))
+    (fact_count,) = fetch_one(conn, """
+        SELECT COUNT(*) FROM fact_order WHERE order_date BETWEEN %s AND %s
+    """, _bounds(scope))
     ok = fact_count == stg_joinable
     _record(conn, run_id, "fact_recon_count", ok,
             metric=fact_count, threshold=stg_joinable,
             details='{"rule":"fact rows == joinable staging rows"}')
     if not ok:
-        failures += 1
         logger.error(json.dumps({
             "event": "dq_fail", "check": "fact_recon_count",
             "fact": int(fact_count), "stg_joinable": int(stg_joinable),
         }))
+    return ok
 
-    # DQ-4: null required fields -----------------------------------------------
+
+# DQ-4: null required fields --------------------------------------------------
+def check_null_required_fields(conn, run_id: str, scope=None, sample=None) -> bool:
+    if sample:
+        return _sampled_check(conn, run_id, "null_required_fields", sample, None,
+                              "full_name, email, country must be non-empty")
     (null_count,) = fetch_one(conn, """
         SELECT COUNT(*) FROM stg_customers
         WHERE full_name IS NULL OR full_name = ''
@@ -103,32 +216,125 @@ def run_validations(conn, run_id: str) -> bool:
             metric=null_count, threshold=0,
             details='{"rule":"full_name, email, country must be non-empty"}')
     if not ok:
-        failures += 1
         logger.error(json.dumps({
             "event": "dq_fail", "check": "null_required_fields",
             "null_count": int(null_count),
         }))
+    return ok
+
 
-    # DQ-5: negative / zero amounts -------------------------------------------
+# DQ-5: negative / zero amounts -----------------------------------------------
+def check_negative_amounts(conn, run_id: str, scope=None, sample=None) -> bool:
+    if sample:
+        return _sampled_check(conn, run_id, "negative_amounts", sample, scope,
+                              "order amount must be positive")
     (bad_amt,) = fetch_one(conn, """
-        SELECT COUNT(*) FROM stg_orders WHERE amount <= 0
-    """)
+        SELECT COUNT(*) FROM stg_orders
+        WHERE amount <= 0 AND order_date BETWEEN %s AND %s
+    """, _bounds(scope))
     ok = bad_amt == 0
     _record(conn, run_id, "negative_amounts", ok,
             metric=bad_amt, threshold=0,
             details='{"rule":"order amount must be positive"}')
     if not ok:
-        failures += 1
         logger.error(json.dumps({
             "event": "dq_fail", "check": "negative_amounts",
             "bad_count": int(bad_amt),
         }))
+    return ok
+
+
+# Volume: rows ingested vs. rolling history -----------------------------------
+def check_row_volume(conn, run_id: str, dataset: str, rows: int) -> bool:
+    """
+    Evaluate the trend rules for ``rows_ingested:<dataset>``.  Returns False
+    only when a rule fires and DQ_TREND_CHECK is ``fail``.
+    """
+    name = f"rows_ingested:{dataset}"
+    result = record_metrics(conn, run_id, {name: rows}).get(name)
+    if result is None:
+        return True
+    fired = [f for f in result["findings"] if f["anomalous"]]
+    _record(conn, run_id, f"row_volume:{dataset}", not fired,
+            metric=rows, threshold=result["baseline"],
+            details=json.dumps({"rule": "rows ingested within trend thresholds",
+                                "history": result["history"],
+                                "findings": result["findings"]}))
+    return not fired or trend_check_mode() != "fail"
+
+
+# Checks that can run from a sample: table (aliased t), integer primary key
+# (leading PK column), violation predicate and the column *scope* filters on
+SAMPLEABLE = {
+    "orphan_orders": {
+        "table": "stg_orders", "pk": "order_id", "scope_column": "order_date",
+        "predicate": "NOT EXISTS (SELECT 1 FROM stg_customers c "
+                     "WHERE c.customer_id = t.customer_id)",
+    },
+    "null_required_fields": {
+        "table": "stg_customers", "pk": "customer_id", "scope_column": None,
+        "predicate": "t.full_name IS NULL OR t.full_name = '' "
+                     "OR t.email IS NULL OR t.email = '' "
+                     "OR t.country IS NULL OR t.country = ''",
+    },
+    "negative_amounts": {
+        "table": "stg_orders", "pk": "order_id", "scope_column": "order_date",
+        "predicate": "t.amount <= 0",
+    },
+}
+
+# Checks whose outcome depends on more than the orders a run ingested
+CROSS_TABLE_CHECKS = ("orphan_orders", "fact_recon_count")
+
+CHECKS = {
+    "orphan_orders": check_orphan_orders,
+    "duplicate_order_ids": check_duplicate_order_ids,
+    "fact_recon_count": check_fact_recon_count,
+    "null_required_fields": check_null_required_fields,
+    "negative_amounts": check_negative_amounts,
+}
+
+
+def run_checks(conn, run_id: str, names, scope: tuple[str, str] | None = None,
+               sample: dict | None = None) -> bool:
+    """
+    Run the named checks over *scope* and return True if every one passes.
+    *sample* maps SAMPLEABLE check names to their sample settings.
+    """
+    unknown = [n for n in names if n not in CHECKS]
+    if unknown:
+        raise RuntimeError(f"Unknown DQ check(s): {', '.join(unknown)}")
+    sample = sample or {}
+    empty = scope is not None and tuple(scope) == EMPTY_SCOPE
+    pending: list = []
+    token = _pending.set(pending)
+    try:
+        failures = sum(
+            0 if CHECKS[name](conn, run_id,
+                              None if empty and name in CROSS_TABLE_CHECKS else scope,
+                              **({"sample": sample[name]} if sample.get(name) else {}))
+            else 1
+            for name in names
+        )
+    finally:
+        _pending.reset(token)
+        if pending:
+            run_date = _run_date(conn, run_id)
+            execute_many(conn, _RECORD_SQL, [(r[0], r[1], run_date, *r[3:]) for r in pending])
+            record_metrics(conn, run_id, {f"dq:{r[1]}": r[4] for r in pending
+                                          if r[4] is not None})
 
     # Summary -----------------------------------------------------------------
-    total = 5
+    total = len(names)
     passed = total - failures
     logger.info(json.dumps({
-        "event": "dq_summary", "run_id": run_id,
+        "event": "dq_summary", "run_id": run_id, "checks": list(names),
+        "scope": list(scope) if scope else None,
         "total": total, "passed": passed, "failed": failures,
     }))
     return failures == 0
+
+
+def run_validations(conn, run_id: str, scope: tuple[str, str] | None = None) -> bool:
+    """Execute all DQ checks and return True if every check passes."""
+    return run_checks(conn, run_id, list(CHECKS), scope)
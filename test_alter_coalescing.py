@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for merging consecutive same-table ALTER changesets.
+"""
+
+from src.migrate.coalesce import alter_parts, merged_statement, plan_groups
+
+
+def _cs(cs_id, **extra):
+    return {"id": cs_id, "author": "team", **extra}
+
+
+def test_consecutive_independent_alters_merge_until_a_dependency():
+    pending = [
+        (_cs("1"), "ALTER TABLE big ADD COLUMN a INT NULL;"),
+        (_cs("2"), "ALTER TABLE big ADD INDEX idx_b (b), ADD COLUMN c INT NULL AFTER b;"),
+        (_cs("3"), "ALTER TABLE big ADD INDEX idx_a (a);"),              # reads a from 1
+        (_cs("4"), "ALTER TABLE `big` MODIFY COLUMN d BIGINT NOT NULL;"),
+        (_cs("5"), "ALTER TABLE other ADD COLUMN z INT;"),              # another table
+        (_cs("6", preconditions=[{"tableExists": {}}]), "ALTER TABLE other ADD COLUMN y INT;"),
+    ]
+    groups = plan_groups(pending)
+    assert [[cs["id"] for cs in g["changesets"]] for g in groups] == [["1", "2"], ["3", "4"]]
+    assert merged_statement(groups[0]) == \
+        "ALTER TABLE `big` ADD COLUMN a INT NULL, ADD INDEX idx_b (b), ADD COLUMN c INT NULL AFTER b"
+
+
+def test_only_plain_column_and_index_alters_are_mergeable():
+    assert alter_parts("ALTER TABLE t ADD COLUMN x INT, ALGORITHM=INSTANT") is None
+    assert alter_parts("ALTER TABLE t ENGINE=InnoDB") is None
+    assert alter_parts("ALTER TABLE t RENAME TO u") is None
+    assert alter_parts("ALTER TABLE t DROP PRIMARY KEY, ADD PRIMARY KEY (a, d) "
+                       "PARTITION BY RANGE COLUMNS (d) (PARTITION p VALUES LESS THAN (MAXVALUE))") is None
+    assert alter_parts("ALTER TABLE t ADD COLUMN x INT; ALTER TABLE t ADD INDEX i (x)") is None
+    assert alter_parts("ALTER TABLE t ADD COLUMN x INT; UPDATE t SET x = 1") is None
+    parts = alter_parts("ALTER TABLE t DROP FOREIGN KEY fk_a, "
+                        "ADD CONSTRAINT fk_b FOREIGN KEY (b) REFERENCES u (id)")
+    assert parts["writes"] == {"fk_a", "fk_b"} and parts["reads"] == {"b"}
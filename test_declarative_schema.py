@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for generating migrations from a declared target schema.
+"""
+
+from src.migrate.changelog import auto_generate_changelog
+from src.migrate.declarative import generate_statements, write_migration
+from src.migrate.drift import build_snapshot
+from src.migrate.policy import check_policy
+
+COLLATION = "utf8mb4_0900_ai_ci"
+
+
+def _snapshot(columns, indexes=(), constraints=(), tables=("customer", "orders")):
+    return build_snapshot([(t, "BASE TABLE", "InnoDB", COLLATION) for t in tables],
+                          columns, list(indexes), list(constraints), [])
+
+
+LIVE_COLUMNS = [
+    ("orders", "id", 1, "bigint", "NO", None, "auto_increment", None),
+    ("orders", "amount", 2, "decimal(12,2)", "YES", None, "", None),
+    ("orders", "note", 3, "varchar(50)", "YES", None, "", COLLATION),
+    ("customer", "id", 1, "bigint", "NO", None, "", None),
+]
+PK = [("orders", "PRIMARY", 0, "id", None, "BTREE"), ("customer", "PRIMARY", 0, "id", None, "BTREE")]
+
+
+def test_column_and_index_changes_to_one_table_become_one_alter():
+    live = _snapshot(LIVE_COLUMNS, PK)
+    desired = _snapshot(
+        [c for c in LIVE_COLUMNS if c[1] != "note" and c[1] != "amount"] + [
+            ("orders", "amount", 2, "decimal(14,2)", "NO", "0.00", "", None),
+            ("orders", "customer_id", 3, "bigint", "NO", None, "", None),
+            ("orders", "status", 4, "varchar(16)", "NO", "new", "", COLLATION),
+        ],
+        PK + [("orders", "idx_customer", 1, "customer_id", None, "BTREE")],
+        [("orders", "fk_orders_customer", "FOREIGN KEY", "customer_id", "customer", "id",
+          "RESTRICT", "CASCADE")],
+    )
+    result = generate_statements(live, desired, {})
+    assert result["unsupported"] == [] and result["undeclared"] == []
+    assert result["statements"] == ["""ALTER TABLE `orders`
+    DROP COLUMN `note`,
+    MODIFY COLUMN `amount` decimal(14,2) NOT NULL DEFAULT '0.00',
+    ADD COLUMN `customer_id` bigint NOT NULL AFTER `amount`,
+    ADD COLUMN `status` varchar(16) NOT NULL DEFAULT 'new' AFTER `customer_id`,
+    ADD INDEX `idx_customer` (`customer_id`),
+    ADD CONSTRAINT `fk_orders_customer` FOREIGN KEY (`customer_id`) REFERENCES `customer` (`id`) ON UPDATE RESTRICT ON DELETE CASCADE;"""]
+
+
+def test_new_tables_are_created_referenced_first_and_undeclared_kept():
+    live = _snapshot(LIVE_COLUMNS[:3], PK[:1], tables=("orders",))
+    desired = _snapshot(
+        [("line", "order_id", 1, "bigint", "NO", None, "", None),
+         ("sku", "id", 1, "bigint", "NO", None, "", None)],
+        constraints=[("line", "fk_line_sku", "FOREIGN KEY", "order_id", "sku", "id", None, None)],
+        tables=("line", "sku"),
+    )
+    ddl = {"line": "CREATE TABLE `line` (...)", "sku": "CREATE TABLE `sku` (...) AUTO_INCREMENT=7"}
+    result = generate_statements(live, desired, ddl)
+    assert result["statements"] == ["CREATE TABLE `sku` (...);", "CREATE TABLE `line` (...);"]
+    assert result["undeclared"] == ["orders"]
+    assert generate_statements(live, desired, ddl, drop_undeclared=True)["statements"][-1] == \
+        "DROP TABLE `orders`;"
+
+
+def test_archived_partitions_are_never_undeclared():
+    live = _snapshot(LIVE_COLUMNS, PK)
+    live["archive_orders_p202401"] = live["orders"]
+    result = generate_statements(live, _snapshot(LIVE_COLUMNS, PK), {}, drop_undeclared=True)
+    assert result["undeclared"] == [] and result["statements"] == []
+
+
+def test_written_drop_table_migration_passes_policy_with_the_env_override(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "migrations").mkdir()
+    path = write_migration(["DROP TABLE `orders`;"], 42, "drop_orders", "team", "schema",
+                           migrations_dir="migrations")
+    assert "-- allowDestructive: true" in open(path).read()
+    (cs,) = auto_generate_changelog("migrations")
+    monkeypatch.setenv("ALLOW_DESTRUCTIVE", "true")
+    check_policy("DROP TABLE `orders`;", cs)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests for pairing changesets with down-scripts and planning a rollback.
+"""
+
+import pytest
+
+from src.migrate import runner
+from src.migrate.changelog import checksum, default_down_file, resolve_down_sql
+
+
+def test_up_scripts_pair_with_optional_down_scripts(tmp_path):
+    assert default_down_file("migrations/015_idx.up.sql") == "migrations/015_idx.down.sql"
+    assert default_down_file("migrations/legacy.sql") is None
+    (tmp_path / "migrations").mkdir()
+    (tmp_path / "migrations/015_idx.down.sql").write_text("DROP INDEX idx_a ON t;")
+    assert resolve_down_sql({"downFile": "migrations/015_idx.down.sql"}, tmp_path) == \
+        "DROP INDEX idx_a ON t;"
+    assert resolve_down_sql({"downFile": "migrations/016_x.down.sql"}, tmp_path) is None
+
+
+def test_rollback_plan_walks_back_and_flags_changesets_without_down(tmp_path, monkeypatch):
+    (tmp_path / "16.down.sql").write_text("ALTER TABLE t DROP COLUMN b;")
+    (tmp_path / "18.down.sql").write_text("DROP INDEX idx_a ON t;")
+    changesets = [{"id": i, "author": "team", "downFile": f"{i}.down.sql"}
+                  for i in ("15", "16", "17", "18", "19")]
+    monkeypatch.setattr(runner, "load_changelog", lambda path: changesets)
+    monkeypatch.setattr(runner, "fetch_one", lambda conn, sql, params=None: (3, "team"))
+    monkeypatch.setattr(runner, "fetch_all", lambda conn, sql, params=None: [
+        ("19", "team", "MARK_RAN", None, None),
+        ("18", "team", "EXECUTED", checksum("DROP INDEX idx_a ON t;"), None),
+        ("17", "team", "EXECUTED", None, None),
+        ("16", "team", "EXECUTED", None, None),
+    ])
+    plan = runner._plan_rollback(None, "15", "changelog.yml", tmp_path)
+    assert [s["id"] for s in plan["steps"]] == ["19", "18", "17", "16"]
+    assert plan["irreversible"] == ["17"]
+    assert plan["steps"][1]["verified"] and not plan["steps"][3]["verified"]
+
+    (tmp_path / "18.down.sql").write_text("DROP INDEX idx_b ON t;")
+    with pytest.raises(RuntimeError, match="changed since"):
+        runner._plan_rollback(None, "15", "changelog.yml", tmp_path)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for sampled DQ checks: block placement and the pass/fail/escalate rule.
+"""
+
+from src.pipeline.sampling import Estimate, block_starts, decide, wilson_interval
+
+
+def test_block_starts_are_deterministic_and_stratified():
+    starts = block_starts(1, 1_000_000, 8, "run-1:negative_amounts")
+    assert starts == block_starts(1, 1_000_000, 8, "run-1:negative_amounts")
+    assert starts != block_starts(1, 1_000_000, 8, "run-2:negative_amounts")
+    for i, start in enumerate(starts):
+        assert 1 + 125_000 * i <= start < 1 + 125_000 * (i + 1)
+    # never more blocks than keys
+    assert len(block_starts(5, 7, 64, "x")) == 3
+
+
+def test_decision_escalates_only_near_threshold():
+    def est(violations, sampled):
+        low, high = wilson_interval(violations, sampled, 0.99)
+        return Estimate(sampled, violations, violations / sampled, low, high)
+
+    assert decide(est(0, 64_000), max_rate=0.001) == "pass"
+    assert decide(est(400, 64_000), max_rate=0.001) == "fail"
+    assert decide(est(64, 64_000), max_rate=0.001) == "escalate"
+    # a clean sample cannot prove zero violations
+    assert decide(est(0, 64_000), max_rate=0.0) == "escalate"
+    assert decide(est(1, 64_000), max_rate=0.0) == "fail"
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for DQ trend thresholds over a rolling window.
+"""
+
+from src.pipeline.trends import TREND_RULES, evaluate
+
+RULES = TREND_RULES["rows_ingested"]
+
+
+def test_volume_drop_is_flagged_after_enough_history():
+    history = [1000, 1040, 980, 1010, 995]
+    drop = evaluate(history, 300, RULES, min_history=5)
+    assert [f["anomalous"] for f in drop] == [True, True]
+    assert drop[0]["score"] == -70.0
+
+    normal = evaluate(history, 1020, RULES, min_history=5)
+    assert not any(f["anomalous"] for f in normal)
+
+    # still learning: too few earlier runs to judge
+    learning = evaluate(history[:3], 300, RULES, min_history=5)
+    assert not any(f["anomalous"] for f in learning)
+    assert learning[0]["score"] is None
+
+
+def test_flat_history_falls_back_to_pct_change():
+    pct, z = evaluate([500] * 6, 200, RULES, min_history=5)
+    assert pct["anomalous"] and pct["score"] == -60.0
+    assert not z["anomalous"] and z["score"] is None
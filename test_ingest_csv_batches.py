@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming CSV reader and skip accounting.
+"""
+
+import io
+import json
+import logging
+
+from src.pipeline.ingest import ORDER_COLUMNS, SkipLog, iter_csv_batches
+
+DEFAULTS = {"currency": "USD", "status": "pending"}
+
+
+def _batches(text, batch_size=2, columns=ORDER_COLUMNS):
+    return list(iter_csv_batches(io.StringIO(text), columns, DEFAULTS, batch_size))
+
+
+def test_columns_are_mapped_by_header_not_position():
+    text = ("updated_at,amount,order_id,customer_id,order_date,currency,status\n"
+            "2026-01-01 00:00:00,9.5,o1,c1,2026-01-01,EUR,paid\n")
+    assert _batches(text) == [
+        [("o1", "c1", "2026-01-01", "9.5", "EUR", "paid", "2026-01-01 00:00:00")]]
+
+
+def test_missing_columns_take_defaults_and_short_rows_are_padded():
+    text = "order_id,customer_id,order_date,amount,updated_at\no1,c1,2026-01-01,5,t1\no2,c2\n"
+    assert _batches(text) == [[
+        ("o1", "c1", "2026-01-01", "5", "USD", "pending", "t1"),
+        ("o2", "c2", None, None, "USD", "pending", None),
+    ]]
+
+
+def test_rows_are_split_into_batches_and_blank_lines_dropped():
+    header = ",".join(ORDER_COLUMNS)
+    rows = [f"o{i},c,2026-01-01,1,USD,paid,t" for i in range(5)]
+    text = header + "\n" + "\n".join(rows[:2]) + "\n\n" + "\n".join(rows[2:]) + "\n"
+    batches = _batches(text, batch_size=2)
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [r[0] for b in batches for r in b] == [f"o{i}" for i in range(5)]
+    assert _batches("") == [] and _batches(header + "\n") == []
+
+
+def test_skip_log_counts_every_skip_but_logs_only_the_first(caplog):
+    skips = SkipLog("orders", limit=2)
+    with caplog.at_level(logging.WARNING, logger="pipeline"):
+        for i in range(4):
+            skips.skip("invalid amount", order_id=f"o{i}")
+        skips.skip("missing updated_at", order_id="o9")
+        skips.summary()
+    events = [json.loads(r.getMessage()) for r in caplog.records]
+    assert [e["order_id"] for e in events if e["event"] == "skip_row"] == ["o0", "o1", "o9"]
+    assert events[-1] == {"event": "skip_summary", "dataset": "orders", "total": 5,
+                          "skipped": {"invalid amount": 4, "missing updated_at": 1}}
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for deriving inverse scripts of reversible DDL.
+"""
+
+from src.migrate import runner
+from src.migrate.inverse import derive_inverse, touched_tables
+
+ORDERS = """CREATE TABLE `orders` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `amount` decimal(12,2) DEFAULT NULL,
+  `customer_id` bigint NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_customer` (`customer_id`),
+  CONSTRAINT `fk_orders_customer` FOREIGN KEY (`customer_id`) REFERENCES `customer` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+
+
+def test_reversible_ddl_is_undone_newest_first_from_captured_definitions():
+    script = """
+        CREATE TABLE audit (id BIGINT PRIMARY KEY);
+        ALTER TABLE orders ADD COLUMN note VARCHAR(50) NULL, MODIFY COLUMN amount DECIMAL(14,2),
+            DROP INDEX idx_customer, ALGORITHM=INPLACE;
+        CREATE UNIQUE INDEX uq_note ON orders (note);
+        RENAME TABLE audit TO audit_log;
+    """
+    assert touched_tables(script) == {"audit", "orders"}
+    assert derive_inverse(script, {"orders": ORDERS, "audit": None}).split(";\n") == [
+        "RENAME TABLE `audit_log` TO `audit`",
+        "DROP INDEX `uq_note` ON `orders`",
+        "ALTER TABLE `orders` ADD KEY `idx_customer` (`customer_id`), "
+        "MODIFY COLUMN `amount` decimal(12,2) DEFAULT NULL, DROP COLUMN `note`",
+        "DROP TABLE `audit`;",
+    ]
+    assert derive_inverse("CREATE TABLE IF NOT EXISTS orders (id INT);", {"orders": ORDERS}) is None
+
+
+def test_data_losing_or_unknown_statements_make_the_changeset_irreversible():
+    assert derive_inverse("ALTER TABLE orders ADD COLUMN a INT; "
+                          "ALTER TABLE orders DROP COLUMN amount;", {"orders": ORDERS}) is None
+    assert derive_inverse("ALTER TABLE orders ADD INDEX (amount);", {"orders": ORDERS}) is None
+    for unnamed in ("UNIQUE KEY (amount)", "UNIQUE INDEX (amount)", "FULLTEXT INDEX (amount)",
+                    "CONSTRAINT uq UNIQUE KEY (amount)"):
+        assert derive_inverse(f"ALTER TABLE orders ADD {unnamed};", {"orders": ORDERS}) is None
+    assert derive_inverse("ALTER TABLE orders ADD UNIQUE KEY uq_amount (amount);",
+                          {"orders": ORDERS}) == "ALTER TABLE `orders` DROP INDEX `uq_amount`;"
+    assert derive_inverse("ALTER TABLE orders MODIFY COLUMN gone INT;", {"orders": ORDERS}) is None
+    assert derive_inverse("UPDATE orders SET amount = 0;", {"orders": ORDERS}) is None
+    assert derive_inverse("DROP TABLE orders;", {"orders": ORDERS}) is None
+
+
+def test_rollback_plan_falls_back_to_the_stored_inverse(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner, "load_changelog", lambda path: [
+        {"id": "21", "author": "team", "downFile": "21.down.sql"}])
+    monkeypatch.setattr(runner, "fetch_one", lambda conn, sql, params=None: (3, "team"))
+    monkeypatch.setattr(runner, "fetch_all", lambda conn, sql, params=None: [
+        ("22", "team", "EXECUTED", None, None),
+        ("21", "team", "EXECUTED", None, "ALTER TABLE `t` DROP COLUMN `a`;"),
+    ])
+    plan = runner._plan_rollback(None, "20", "changelog.yml", tmp_path)
+    assert plan["irreversible"] == ["22"]
+    assert plan["steps"][1]["source"] == "inverse"
+    assert plan["steps"][1]["down_sql"] == "ALTER TABLE `t` DROP COLUMN `a`;"
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for online-DDL classification and history-based duration estimates.
+"""
+
+from src.migrate.online_ddl import classify_statement
+from src.migrate.planner import DurationModel
+from src.migrate.profiling import statement_digest
+
+
+def test_alter_takes_its_most_expensive_clause():
+    info = classify_statement("ALTER TABLE stg_orders ADD COLUMN note TEXT NULL, "
+                              "ADD INDEX idx_note_date (order_date, customer_id)")
+    assert (info["table"], info["algorithm"], info["lock"]) == ("stg_orders", "inplace", "none")
+
+    info = classify_statement("ALTER TABLE fact_order DROP PRIMARY KEY, "
+                              "ADD PRIMARY KEY (order_id, order_date) "
+                              "PARTITION BY RANGE COLUMNS (order_date) "
+                              "(PARTITION p_future VALUES LESS THAN (MAXVALUE))")
+    assert (info["algorithm"], info["lock"]) == ("copy", "shared")
+
+    assert classify_statement("ALTER TABLE t MODIFY amount DECIMAL(14,2), "
+                              "ALGORITHM=INPLACE")["algorithm"] == "inplace"
+    assert classify_statement("CREATE INDEX idx_a ON db.t (a)")["table"] == "t"
+    assert classify_statement("UPDATE t SET a = 1")["algorithm"] == "none"
+
+
+def test_estimate_scales_history_by_current_table_size():
+    add_index = "ALTER TABLE stg_orders ADD INDEX idx_amount (amount)"
+    model = DurationModel([
+        (add_index, statement_digest(add_index), 2000.0, 0, 1_000_000),
+        ("ALTER TABLE x ADD INDEX i (a)", "d2", 500.0, 0, 100_000),
+    ])
+    info = classify_statement(add_index)
+    assert model.estimate(add_index, info, 3_000_000) == (6000.0, "same_statement:per_row")
+
+    other = "ALTER TABLE fact_order ADD INDEX idx_amount (amount)"
+    ms, source = model.estimate(other, classify_statement(other), 200_000)
+    assert source == "same_operation:per_row" and ms == 700.0
+
+    instant = "ALTER TABLE fact_order ADD COLUMN note TEXT NULL"
+    assert model.estimate(instant, classify_statement(instant), 10**9) == (0.0, "metadata_only")
+    copy = "ALTER TABLE fact_order CONVERT TO CHARACTER SET utf8mb4"
+    assert model.estimate(copy, classify_statement(copy), 10**9) == (None, "no_history")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Tests for rehearsal timing scaling and schema diffs.
+"""
+
+from src.migrate.rehearsal import diff_schemas, normalise_ddl, scale_timings
+
+
+def test_timings_scale_by_production_to_sample_ratio():
+    statements = [
+        {"sql": "ALTER TABLE stg_orders ADD INDEX idx_amount (amount)", "duration_ms": 40.0},
+        {"sql": "ALTER TABLE stg_orders ADD COLUMN note TEXT NULL", "duration_ms": 3.0},
+        {"sql": "UPDATE dim_customer SET segment = 'retail'", "duration_ms": 5.0},
+        {"sql": "CREATE TABLE t_new (id INT PRIMARY KEY)", "duration_ms": 8.0},
+    ]
+    scaled = scale_timings(statements, {"stg_orders": 1000, "dim_customer": 0},
+                           {"stg_orders": {"rows": 2_000_000}, "dim_customer": {"rows": 50}})
+    assert [s["scaled_ms"] for s in scaled] == [80000.0, 3.0, None, 8.0]
+    assert scaled[0]["scale"] == 2000.0
+    assert scaled[2]["scale"] is None
+
+
+def test_schema_diff_ignores_counters_and_partition_lists():
+    base = ("CREATE TABLE `fact_order` (\n  `order_id` bigint NOT NULL\n) ENGINE=InnoDB"
+            " AUTO_INCREMENT={n} DEFAULT CHARSET=utf8mb4\n/*!50500 PARTITION BY RANGE  COLUMNS"
+            "(order_date)\n(PARTITION {p} VALUES LESS THAN (MAXVALUE) ENGINE = InnoDB) */")
+    rehearsed = {"fact_order": normalise_ddl(base.format(n=912, p="p202601")),
+                 "t_new": "CREATE TABLE `t_new` (...)"}
+    expected = {"fact_order": normalise_ddl(base.format(n=1, p="p_future"))}
+    assert diff_schemas(rehearsed, expected) == [
+        {"table": "t_new", "change": "unexpected", "diff": []}]
+
+    expected["fact_order"] = expected["fact_order"].replace("bigint", "int")
+    (drift,) = [d for d in diff_schemas(rehearsed, expected) if d["change"] == "differs"]
+    assert "+  `order_id` bigint NOT NULL" in drift["diff"]
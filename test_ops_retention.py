@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for ops table rollup windows and purge cutoffs.
+"""
+
+from datetime import date, datetime
+
+from src.ops import retention
+
+
+def _fake_db(monkeypatch, rolled_up_through=None):
+    calls = []
+
+    def fetch_one(conn, sql, params=None):
+        calls.append((sql, params))
+        if "FROM ops_retention_state" in sql:
+            return (rolled_up_through,) if rolled_up_through else None
+        if "WHERE status = 'running'" in sql:
+            return (datetime(2026, 1, 5, 10, 0),)   # a run still in flight
+        if "SELECT MIN" in sql:
+            return (datetime(2026, 1, 1, 8, 0),)
+        return (7,)
+
+    monkeypatch.setattr(retention, "fetch_one", fetch_one)
+    monkeypatch.setattr(retention, "execute",
+                        lambda conn, sql, params=None: calls.append((sql, params)))
+    return calls
+
+
+def test_rollup_stops_at_the_oldest_run_still_in_flight(monkeypatch):
+    calls = _fake_db(monkeypatch)
+    assert retention.rollup(None, "ops_pipeline_runs", date(2026, 3, 1)) == 4
+    params = [p for sql, p in calls if "INSERT INTO ops_daily_pipeline_runs" in sql]
+    assert params == [(date(2026, 1, 1), date(2026, 1, 5))]
+    assert (("ops_pipeline_runs", date(2026, 1, 4))
+            in [p for sql, p in calls if "rolled_up_through = VALUES" in sql])
+
+
+def test_dry_run_caps_the_purge_cutoff_like_a_real_run(monkeypatch):
+    calls = _fake_db(monkeypatch)
+    result = retention._maintain_table(None, "ops_pipeline_runs", {"ops_pipeline_runs": 10},
+                                       dry_run=True, today=date(2026, 3, 1))
+    assert result["cutoff"] == "2026-01-05" and result["rows_purged"] == 7
+    assert calls[-1][1] == (date(2026, 1, 5),)
+    assert "AND NOT (status = 'running')" in calls[-1][0]
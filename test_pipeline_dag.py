@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for pipeline definitions and the DAG scheduler.
+"""
+
+import contextvars
+import itertools
+import threading
+
+import pytest
+
+from src import db
+from src.pipeline import dag
+from src.pipeline.ingest import LoadStats
+from src.pipeline.watermarks import EPOCH
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "pipeline.yml"
+    path.write_text(text)
+    return str(path)
+
+
+def test_definition_is_validated_and_ordered(tmp_path):
+    nodes = dag.load_pipeline(_write(tmp_path, """
+nodes:
+  checks: {type: checks, checks: [orphan_orders], depends_on: [fact]}
+  fact: {type: sql, file: fact.sql, depends_on: [orders, customers]}
+  orders: {type: ingest, dataset: orders}
+  customers: {type: ingest, dataset: customers}
+"""))
+    assert list(nodes)[-2:] == ["fact", "checks"]
+    assert dag.ancestors(nodes, "checks") == {"fact", "orders", "customers"}
+    assert dag.descendants(nodes, "orders") == {"fact", "checks"}
+
+    with pytest.raises(RuntimeError, match="invalid with 2 error"):
+        dag.load_pipeline(_write(tmp_path, """
+nodes:
+  a: {type: shell}
+  b: {type: sql, file: b.sql, depends_on: missing}
+"""))
+    with pytest.raises(RuntimeError, match="cycle among: a, b"):
+        dag.load_pipeline(_write(tmp_path, """
+nodes:
+  a: {type: sql, file: a.sql, depends_on: b}
+  b: {type: sql, file: b.sql, depends_on: a}
+  c: {type: sql, file: c.sql}
+"""))
+
+
+class _FakeConn:
+    _ids = itertools.count(100)
+
+    def __init__(self, **settings):
+        self.connection_id = next(self._ids)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_mysql(monkeypatch):
+    for var in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+        monkeypatch.setenv(var, "x")
+    monkeypatch.setattr(db.mysql.connector, "connect", _FakeConn)
+    monkeypatch.setattr(dag, "_POLL_SECONDS", 0.01)
+
+
+def _nodes(**deps):
+    return {name: {"type": "sql", "depends_on": d, "retries": 1 if name == "flaky" else 0,
+                   "retry_delay": 0, "timeout": None}
+            for name, d in deps.items()}
+
+
+def test_failures_retry_then_skip_only_their_descendants(fake_mysql, monkeypatch):
+    calls = []
+
+    def execute_node(node, conn, run_id, ctx, upstream):
+        name = next(n for n, spec in nodes.items() if spec is node)
+        calls.append(name)
+        if name == "broken" or (name == "flaky" and calls.count("flaky") == 1):
+            raise RuntimeError(f"{name} failed")
+        return {"upstream": sorted(upstream)}
+
+    monkeypatch.setattr(dag, "execute_node", execute_node)
+    nodes = _nodes(flaky=[], after_flaky=["flaky"], broken=[], after_broken=["broken"],
+                   done_before=[])
+    succeeded = {}
+    with pytest.raises(RuntimeError, match=r"1 pipeline step\(s\) failed \(broken\); 1 skipped"):
+        dag.run_dag(nodes, "run", {}, {"done_before": {}},
+                    lambda name, result: succeeded.update({name: result}))
+    assert calls.count("flaky") == 2 and "after_broken" not in calls
+    assert "done_before" not in calls
+    assert succeeded == {"flaky": {"upstream": []}, "after_flaky": {"upstream": ["flaky"]}}
+
+
+def test_timeout_kills_connections_opened_by_worker_threads(fake_mysql, monkeypatch):
+    killed, stop = set(), threading.Event()
+
+    def execute_node(node, conn, run_id, ctx, upstream):
+        # like ingest_files: a worker thread opens its own connection
+        worker = threading.Thread(target=contextvars.copy_context().run,
+                                  args=(lambda: db.get_conn() and stop.wait(5),))
+        worker.start()
+        worker.join()
+        raise RuntimeError("connection killed")
+
+    def kill(ids):
+        killed.update(ids)
+        if len(killed) == 2:
+            stop.set()
+
+    monkeypatch.setattr(dag, "execute_node", execute_node)
+    monkeypatch.setattr(dag, "_kill_connections", kill)
+    nodes = _nodes(slow=[])
+    nodes["slow"]["timeout"] = 0.05
+    with pytest.raises(RuntimeError, match="slow: timed out after 0.05s"):
+        dag.run_dag(nodes, "run", {}, {}, lambda name, result: None)
+    assert len(killed) == 2
+
+
+def test_customers_only_run_scopes_facts_to_their_staged_orders(monkeypatch):
+    loaded = {"customers": LoadStats(1, EPOCH, ("2026-01-05", "2026-02-20")),
+              "orders": LoadStats(0, EPOCH, None)}
+    monkeypatch.setattr(dag, "ingest_dataset", lambda conn, ds, data_dir, manifest: loaded[ds])
+    monkeypatch.setattr(dag, "check_row_volume", lambda conn, run_id, ds, rows: True)
+    scopes = []
+    monkeypatch.setattr(dag, "run_sql_file",
+                        lambda conn, sql_dir, file, run_id, scope: scopes.append(scope))
+    ctx = {"data_dir": "data", "manifest": None, "sql_dir": "sql"}
+
+    upstream = {name: dag.execute_node({"type": "ingest", "dataset": ds}, None, "run", ctx, {})
+                for name, ds in (("ingest_customers", "customers"), ("ingest_orders", "orders"))}
+    assert upstream["ingest_customers"] == {"dataset": "customers", "rows": 1,
+                                            "dates": ["2026-01-05", "2026-02-20"]}
+    facts = {"type": "sql", "file": "transform/build_facts.sql", "scoped": True}
+    dag.execute_node(facts, None, "run", ctx, upstream)
+    assert scopes == [("2026-01-05", "2026-02-20")]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests for the run profiler used by the pipeline's per-stage instrumentation.
+"""
+
+from src.metrics import RunProfiler, add_counters, record_statement
+
+
+def test_stage_tree_and_statement_attribution():
+    """Statements and counters land on the innermost stage and roll up."""
+    profiler = RunProfiler("run-1")
+    record_statement("SELECT 1", 0.5)  # no active profiler: ignored
+
+    with profiler.activate():
+        with profiler.stage("ingest"):
+            with profiler.stage("ingest_orders"):
+                for _ in range(3):
+                    record_statement("INSERT INTO stg_orders\n  VALUES (%s)", 0.01, 1)
+                add_counters(rows=3, bytes_read=120)
+
+    doc = profiler.to_dict()
+    ingest = doc["steps"][0]
+    orders = ingest["steps"][0]
+    assert orders["db_round_trips"] == 3
+    assert orders["rows"] == 3 and orders["bytes_read"] == 120
+    assert orders["statements"][0]["sql"] == "INSERT INTO stg_orders VALUES (%s)"
+    assert orders["statements"][0]["calls"] == 3
+    assert ingest["db_round_trips"] == 3 and ingest["rows"] == 3
+
+    text = profiler.to_openmetrics()
+    assert 'pipeline_stage_db_round_trips{run_id="run-1",stage="ingest.ingest_orders"} 3' in text
+    assert text.endswith("# EOF\n")
+
+
+def test_failed_stage_is_marked():
+    profiler = RunProfiler("run-2")
+    try:
+        with profiler.activate(), profiler.stage("validate"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert profiler.to_dict()["steps"][0]["status"] == "failed"
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog snapshots, fingerprints and drift diffs.
+"""
+
+from src.migrate.drift import build_snapshot, diff_snapshots, fingerprint
+
+TABLES = [("fact_order", "BASE TABLE", "InnoDB", "utf8mb4_0900_ai_ci"),
+          ("ops_migration_runs", "BASE TABLE", "InnoDB", "utf8mb4_0900_ai_ci")]
+COLUMNS = [
+    ("fact_order", "order_id", 1, "bigint", "NO", None, "", None),
+    ("fact_order", "amount", 2, "decimal(12,2)", "YES", None, "", None),
+    ("ops_migration_runs", "run_id", 1, "char(36)", "NO", None, "", "utf8mb4_0900_ai_ci"),
+]
+INDEXES = [("fact_order", "PRIMARY", 0, "order_id", None, "BTREE")]
+PARTITIONS = [("fact_order", "RANGE COLUMNS", "`order_date`", None, None)]
+
+
+def test_snapshot_skips_unmanaged_tables_and_is_order_independent():
+    snapshot = build_snapshot(TABLES, COLUMNS, INDEXES, [], PARTITIONS)
+    assert list(snapshot) == ["fact_order"]
+    assert snapshot["fact_order"]["indexes"]["PRIMARY"]["columns"] == ["order_id"]
+    reordered = build_snapshot(TABLES[::-1], COLUMNS[::-1], INDEXES, [], PARTITIONS)
+    assert fingerprint(reordered) == fingerprint(snapshot)
+
+
+def test_archived_partitions_are_not_drift():
+    baseline = build_snapshot(TABLES, COLUMNS, INDEXES, [], PARTITIONS)
+    archive = "archive_fact_order_p202401"
+    live = build_snapshot(TABLES + [(archive, "BASE TABLE", "InnoDB", "utf8mb4_0900_ai_ci")],
+                          COLUMNS + [(archive, *c[1:]) for c in COLUMNS if c[0] == "fact_order"],
+                          INDEXES + [(archive, *INDEXES[0][1:])], [], PARTITIONS)
+    assert fingerprint(live) == fingerprint(baseline)
+    assert diff_snapshots(baseline, live) == []
+
+
+def test_manual_alter_shows_up_as_structured_diff():
+    baseline = build_snapshot(TABLES, COLUMNS, INDEXES, [], PARTITIONS)
+    columns = [c if c[1] != "amount" else c[:3] + ("decimal(14,2)",) + c[4:] for c in COLUMNS]
+    live = build_snapshot(TABLES, columns,
+                          INDEXES + [("fact_order", "idx_amount", 1, "amount", None, "BTREE")],
+                          [], PARTITIONS)
+    assert fingerprint(live) != fingerprint(baseline)
+    diffs = diff_snapshots(baseline, live)
+    assert [(d["kind"], d["name"], d["change"]) for d in diffs] == [
+        ("columns", "amount", "changed"), ("indexes", "idx_amount", "added")]
+    assert diffs[0]["actual"]["type"] == "decimal(14,2)"
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset paging, filtering and projection in the web API.
+"""
+
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from web import app as web
+
+FILTERS = {"status": None, "risk": None, "author": None, "date_from": None, "date_to": None}
+
+
+def _version(n, risk="low", applied_at=None):
+    return {"id": str(n), "author": "team", "filename": f"migrations/{n:03d}_x.up.sql",
+            "status": "applied" if applied_at else "pending", "applied_at": applied_at,
+            "risk_level": risk, "checksum": "c", "description": "x", "can_rollback_to": False}
+
+
+SNAPSHOT = {"versions": {"versions": [
+    _version(1, applied_at=datetime(2026, 1, 1)), _version(2, "high", datetime(2026, 2, 1)),
+    _version(3), _version(4, "high"), _version(5),
+]}}
+
+
+def _walk(page_fn, start, **filters):
+    pages, after = [], start
+    while True:
+        page, cursor = page_fn({**FILTERS, **filters}, after)
+        pages.append([v["id"] for v in page])
+        if cursor is None:
+            return pages
+        after = web._decode_cursor(cursor)
+
+
+def test_catalog_pages_follow_the_cursor_to_the_last_page():
+    def catalog(filters, after):
+        return web._page_catalog_versions(SNAPSHOT, filters, (after or {}).get("file"), 2)
+
+    assert _walk(catalog, None) == [["1", "2"], ["3", "4"], ["5"]]
+    assert _walk(catalog, None, risk="high") == [["2", "4"]]
+    assert _walk(catalog, None, risk="medium") == [[]]
+    assert _walk(catalog, None, date_from=datetime(2026, 1, 15)) == [["2"]]
+
+
+def test_invalid_cursors_and_fields_are_rejected():
+    assert web._decode_cursor(web._encode_cursor({"order": 7})) == {"order": 7}
+    for bad in ("not base64 !", base64.urlsafe_b64encode(b"[1, 2]").decode()):
+        with pytest.raises(HTTPException) as exc:
+            web._decode_cursor(bad)
+        assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        web._parse_fields("id,secret", web.VERSION_FIELDS)
+    fields = web._parse_fields("id, status", web.VERSION_FIELDS)
+    assert web._project(SNAPSHOT["versions"]["versions"][0], fields) == \
+        {"id": "1", "status": "applied"}
+
+
+class _Cursor:
+    ROWS = [{"ID": str(n), "AUTHOR": "team", "FILENAME": f"migrations/{n:03d}_x.up.sql",
+             "DATEEXECUTED": datetime(2026, 1, n), "MD5SUM": "c", "ORDEREXECUTED": n}
+            for n in range(1, 6)]
+
+    def execute(self, sql, params):
+        after, limit = params[0], params[-1]
+        self.rows = [r for r in self.ROWS if r["ORDEREXECUTED"] > after][:limit]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def cursor(self, dictionary=False):
+        return _Cursor()
+
+    def close(self):
+        pass
+
+
+def test_applied_pages_refill_around_the_risk_filter(monkeypatch):
+    monkeypatch.setattr(web, "get_conn", _Conn)
+    snapshot = {"changesets_by_id": {
+        str(n): {"id": str(n), "author": "team", "sqlFile": f"migrations/{n:03d}_x.up.sql",
+                 "risk": "high" if n % 2 == 0 else "low", "checksum": "c"}
+        for n in range(1, 6)}}
+
+    def applied(filters, after):
+        return web._page_applied_versions(snapshot, filters, int((after or {}).get("order", 0)), 1)
+
+    assert _walk(applied, None, risk="low") == [["1"], ["3"], ["5"]]
+    assert _walk(applied, None, risk="medium") == [[]]
+    assert _walk(applied, {"order": 5}) == [[]]
@@ -35,6 +35,18 @@ class WebUITester:
         })
         print()
 
+    def wait_for_job(self, job_id, timeout=300):
+        """Poll a background job until it finishes and return its result"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = self.session.get(f"{self.base_url}/api/jobs/{job_id}").json()
+            if job['status'] == 'succeeded':
+                return job['result']
+            if job['status'] == 'failed':
+                raise RuntimeError(job['error'])
+            time.sleep(1)
+        raise TimeoutError(f"Job {job_id} did not finish within {timeout}s")
+
     def test_server_health(self):
         """Test if the web server is running and responsive"""
         try:
@@ -129,15 +141,15 @@ class WebUITester:
         """Test creating a backup via API"""
         try:
             response = self.session.post(f"{self.base_url}/api/backups/create")
-            success = response.status_code == 200
+            success = response.status_code == 202
             
             if success:
-                data = response.json()
-                has_required_fields = all(field in data for field in ['success', 'filename', 'size'])
+                data = self.wait_for_job(response.json()['job_id'])
+                has_required_fields = all(field in data for field in ['filename', 'size'])
                 
                 self.log_test(
                     "API: Create Backup",
-                    has_required_fields and data.get('success'),
+                    has_required_fields,
                     f"Created backup: {data.get('filename', 'unknown')}",
                     {"size": data.get('size', 0)}
                 )
@@ -6,18 +6,29 @@ FastAPI backend for SQL upload, version management, and rollback operations
 
 import os
 import json
+import time
+import uuid
 import base64
+import hashlib
+import asyncio
 import logging
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Optional
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import requests
+from mysql.connector import errorcode
+from mysql.connector.errors import ProgrammingError
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -39,8 +50,9 @@ else:
 # Import our existing migration system
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
-from src.migrate.runner import status_cmd, update_cmd, rollback_cmd, validate_cmd
-from src.migrate.changelog import load_changelog, auto_generate_changelog, checksum
+from src.migrate.runner import update_cmd, rollback_cmd
+from src.migrate.runner import create_backup as run_backup
+from src.migrate.changelog import auto_generate_changelog, checksum
 from src.db import get_conn, execute
 
 app = FastAPI(title="Migration Management API", version="1.0.0")
@@ -80,7 +92,7 @@ class UploadRequest(BaseModel):
 
 class RollbackRequest(BaseModel):
     target_version: str
-    backup_file: str
+    backup_file: Optional[str] = None
     environment: str
     github_token: Optional[str] = None
 
@@ -88,145 +100,710 @@ class RollbackRequest(BaseModel):
 GITHUB_REPO = "deepakrajoptisol-ops/mysql-migration-cicd"
 GITHUB_API_BASE = "https://api.github.com"
 
+# Worker pools
+# ``io_pool`` runs short blocking calls (MySQL queries, GitHub API) so they
+# never block the event loop; ``job_pool`` runs long operations (backup,
+# restore, apply) as background jobs so they cannot starve the read endpoints.
+io_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("WEB_IO_WORKERS", "8")), thread_name_prefix="web-io"
+)
+job_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("WEB_JOB_WORKERS", "2")), thread_name_prefix="web-job"
+)
+
+# Background job registry (in-memory, per process)
+JOBS: Dict[str, dict] = {}
+MAX_FINISHED_JOBS = 200
+EXCLUSIVE_JOB_KINDS = {"apply", "rollback"}
+_jobs_lock = threading.Lock()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking callable on the bounded I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_pool, functools.partial(fn, *args, **kwargs))
+
+
+class EventBroker:
+    """
+    Fan out structured events to Server-Sent Events subscribers.
+
+    ``publish`` is thread-safe: the runner logs from job-pool threads, so
+    events are handed to the event loop with ``call_soon_threadsafe`` and
+    copied into one bounded queue per subscriber.  A short history is kept
+    so a reconnecting ``EventSource`` can resume from ``Last-Event-ID``.
+    """
+
+    def __init__(self, history: int = 500, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: set = set()
+        self._history: deque = deque(maxlen=history)
+        self._seq = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if last_event_id and last_event_id.isdigit():
+            for seq, event in self._history:
+                if seq > int(last_event_id):
+                    queue.put_nowait((seq, event))
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event: dict) -> None:
+        self._seq += 1
+        item = (self._seq, event)
+        self._history.append(item)
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than block everyone
+                queue.get_nowait()
+            queue.put_nowait(item)
+
+
+class _BrokerLogHandler(logging.Handler):
+    """Forward the runner's JSON log lines (``{"event": ...}``) to the broker."""
+
+    def __init__(self, target: EventBroker):
+        super().__init__(level=logging.INFO)
+        self.target = target
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            payload = json.loads(record.getMessage())
+        except (TypeError, ValueError):
+            return
+        if isinstance(payload, dict) and "event" in payload:
+            self.target.publish(payload)
+
+
+broker = EventBroker()
+CATALOG_WATCH_INTERVAL = float(os.getenv("WEB_CATALOG_WATCH_INTERVAL", "30"))
+
+_migrate_logger = logging.getLogger("migrate")
+_migrate_logger.setLevel(logging.INFO)
+_migrate_logger.addHandler(_BrokerLogHandler(broker))
+
+
+def _prune_jobs() -> None:
+    finished = [j for j in JOBS.values() if j["status"] in ("succeeded", "failed")]
+    finished.sort(key=lambda j: j["finished_at"] or "")
+    for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        JOBS.pop(job["job_id"], None)
+
+
+def submit_job(kind: str, fn, *args, **kwargs) -> dict:
+    """Queue *fn* on the job pool and return the job record.
+
+    Only one apply/rollback job may be active at a time; a second request
+    is rejected with 409 instead of queueing behind the first.
+    """
+    with _jobs_lock:
+        if kind in EXCLUSIVE_JOB_KINDS:
+            active = [
+                j for j in JOBS.values()
+                if j["kind"] in EXCLUSIVE_JOB_KINDS and j["status"] in ("queued", "running")
+            ]
+            if active:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Job {active[0]['job_id']} ({active[0]['kind']}) is already in progress",
+                )
+        _prune_jobs()
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        JOBS[job_id] = job
+
+    def _run():
+        job["status"] = "running"
+        job["started_at"] = datetime.now().isoformat()
+        broker.publish({"event": "job_running", "job": dict(job)})
+        try:
+            job["result"] = fn(*args, **kwargs)
+            job["status"] = "succeeded"
+        except Exception as e:
+            logging.error(f"Job {job_id} ({kind}) failed: {e}")
+            job["error"] = str(e)
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = datetime.now().isoformat()
+            broker.publish({"event": f"job_{job['status']}", "job": dict(job)})
+
+    broker.publish({"event": "job_queued", "job": dict(job)})
+    job_pool.submit(_run)
+    return job
+
+
+def _job_accepted(job: dict) -> JSONResponse:
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['job_id']}",
+    })
+
+
+async def _watch_catalog():
+    """Publish ``catalog_changed`` when the migration catalog's ETag moves.
+
+    One server-side check replaces a poll from every open dashboard; it is
+    skipped entirely while nobody is subscribed.
+    """
+    last_etag = None
+    while True:
+        await asyncio.sleep(CATALOG_WATCH_INTERVAL)
+        if not broker.subscriber_count:
+            continue
+        try:
+            snapshot = await run_blocking(catalog.snapshot)
+        except Exception as e:
+            logging.error(f"Catalog watch error: {e}")
+            continue
+        if last_etag is not None and snapshot['etag'] != last_etag:
+            broker.publish({"event": "catalog_changed", "etag": snapshot['etag']})
+        last_etag = snapshot['etag']
+
+
+@app.on_event("startup")
+async def _start_event_stream():
+    broker.bind(asyncio.get_running_loop())
+    app.state.catalog_watch = asyncio.create_task(_watch_catalog())
+
+
+@app.on_event("shutdown")
+def _shutdown_pools():
+    app.state.catalog_watch.cancel()
+    io_pool.shutdown(wait=False)
+    job_pool.shutdown(wait=False)
+
 @app.get("/")
 async def serve_index():
     """Serve the main web interface"""
     index_file = Path(__file__).parent / "static" / "index.html"
     return FileResponse(str(index_file))
 
-@app.get("/api/migrations/versions")
-async def get_all_versions():
-    """Get all available migration versions with their status"""
+def _fetch_applied_migrations() -> dict:
+    """Return applied changesets from DATABASECHANGELOG keyed by ID."""
+    conn = get_conn()
     try:
-        # Load changelog to get all migrations
-        changelog = auto_generate_changelog("../migrations")
-        
-        # Get applied migrations from database
-        conn = get_conn()
-        try:
-            applied_migrations = {}
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT ID, AUTHOR, FILENAME, DATEEXECUTED, MD5SUM 
-                FROM DATABASECHANGELOG 
-                ORDER BY ORDEREXECUTED
-            """)
-            for row in cursor.fetchall():
-                applied_migrations[row['ID']] = {
-                    'applied_at': row['DATEEXECUTED'],
-                    'checksum': row['MD5SUM'],
-                    'filename': row['FILENAME']
-                }
-            cursor.close()
-        finally:
-            conn.close()
-        
-        # Combine changelog and database info
-        versions = []
-        for changeset in changelog:
-            is_applied = changeset["id"] in applied_migrations
-            
+        applied_migrations = {}
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT ID, AUTHOR, FILENAME, DATEEXECUTED, MD5SUM 
+            FROM DATABASECHANGELOG 
+            ORDER BY ORDEREXECUTED
+        """)
+        for row in cursor.fetchall():
+            applied_migrations[row['ID']] = {
+                'applied_at': row['DATEEXECUTED'],
+                'checksum': row['MD5SUM'],
+                'filename': row['FILENAME']
+            }
+        cursor.close()
+        return applied_migrations
+    finally:
+        conn.close()
+
+
+def _version_entry(changeset: dict, applied: Optional[dict]) -> dict:
+    """Shape one changeset (plus its DATABASECHANGELOG row, if any) for the API."""
+    return {
+        'id': changeset["id"],
+        'author': changeset["author"],
+        'description': changeset["sqlFile"].split('/')[-1].replace('.up.sql', '').replace(f"{changeset['id']}_", ''),
+        'filename': changeset["sqlFile"],
+        'status': 'applied' if applied else 'pending',
+        'applied_at': applied.get('applied_at') if applied else None,
+        'risk_level': changeset["risk"],
+        'checksum': changeset["checksum"],
+        'can_rollback_to': bool(applied)
+    }
+
+
+class MigrationCatalog:
+    """
+    Cached view of the migrations folder joined with the applied set.
+
+    Parsed changesets and their checksums are rebuilt only when a stat() of
+    the ``*.up.sql`` files changes (name, mtime, size).  The applied set is
+    re-read from DATABASECHANGELOG at most every ``applied_ttl`` seconds, or
+    immediately after :meth:`invalidate_applied` (called when an apply or
+    rollback job finishes).  Each snapshot carries an ETag derived from both
+    halves so unchanged polls can be answered with ``304 Not Modified``.
+    """
+
+    def __init__(self, migrations_dir: str = "../migrations", applied_ttl: float = 5.0):
+        self.migrations_dir = migrations_dir
+        self.applied_ttl = applied_ttl
+        self._lock = threading.Lock()
+        self._file_sig = None
+        self._changesets: list = []
+        self._applied: Optional[dict] = None
+        self._applied_loaded = 0.0
+        self._snapshot: Optional[dict] = None
+
+    def _file_signature(self) -> tuple:
+        path = Path(self.migrations_dir)
+        if not path.exists():
+            return ()
+        entries = []
+        for entry in os.scandir(path):
+            if entry.name.endswith(".up.sql"):
+                st = entry.stat()
+                entries.append((entry.name, st.st_mtime_ns, st.st_size))
+        return tuple(sorted(entries))
+
+    def _load_changesets(self) -> list:
+        changesets = auto_generate_changelog(self.migrations_dir)
+        for changeset in changesets:
             # Calculate checksum for the SQL file
             sql_file_path = Path("..") / changeset["sqlFile"]
             if sql_file_path.exists():
                 sql_content = sql_file_path.read_text(encoding="utf-8")
-                file_checksum = checksum(sql_content)
+                changeset["checksum"] = checksum(sql_content)
             else:
-                file_checksum = "unknown"
-            
-            versions.append({
-                'id': changeset["id"],
-                'author': changeset["author"],
-                'description': changeset["sqlFile"].split('/')[-1].replace('.up.sql', '').replace(f"{changeset['id']}_", ''),
-                'filename': changeset["sqlFile"],
-                'status': 'applied' if is_applied else 'pending',
-                'applied_at': applied_migrations.get(changeset["id"], {}).get('applied_at'),
-                'risk_level': changeset["risk"],
-                'checksum': file_checksum,
-                'can_rollback_to': is_applied
-            })
-        
+                changeset["checksum"] = "unknown"
+        return changesets
+
+    def invalidate_applied(self) -> None:
+        with self._lock:
+            self._applied = None
+
+    def snapshot(self) -> dict:
+        """Return the current catalog snapshot, refreshing stale halves (blocking)."""
+        with self._lock:
+            changed = self._snapshot is None
+
+            file_sig = self._file_signature()
+            if file_sig != self._file_sig:
+                self._changesets = self._load_changesets()
+                self._file_sig = file_sig
+                changed = True
+
+            if (self._applied is None
+                    or time.monotonic() - self._applied_loaded > self.applied_ttl):
+                applied = _fetch_applied_migrations()
+                self._applied_loaded = time.monotonic()
+                if applied != self._applied:
+                    self._applied = applied
+                    changed = True
+
+            if changed:
+                self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+    def _build_snapshot(self) -> dict:
+        changesets = self._changesets
+        applied_migrations = self._applied
+
+        # Combine changelog and database info
+        versions = [
+            _version_entry(changeset, applied_migrations.get(changeset["id"]))
+            for changeset in changesets
+        ]
+        pending = [cs for cs in changesets if cs["id"] not in applied_migrations]
+
+        digest = hashlib.sha256()
+        digest.update(repr(self._file_sig).encode("utf-8"))
+        digest.update(repr(sorted(
+            (k, str(v['applied_at']), v['checksum']) for k, v in applied_migrations.items()
+        )).encode("utf-8"))
+
         return {
-            'versions': versions,
-            'total_count': len(versions),
-            'applied_count': len(applied_migrations),
-            'pending_count': len(versions) - len(applied_migrations)
+            'etag': f'"{digest.hexdigest()[:32]}"',
+            'changesets': changesets,
+            'changesets_by_id': {cs["id"]: cs for cs in changesets},
+            'applied': applied_migrations,
+            'versions': {
+                'versions': versions,
+                'total_count': len(versions),
+                'applied_count': len(applied_migrations),
+                'pending_count': len(versions) - len(applied_migrations)
+            },
+            'status': {
+                'pending_migrations': len(pending),
+                'total_migrations': len(changesets),
+                'applied_migrations': len(applied_migrations),
+                'pending_details': [
+                    {
+                        'id': cs["id"],
+                        'author': cs["author"],
+                        'filename': cs["sqlFile"],
+                        'risk': cs["risk"]
+                    } for cs in pending
+                ]
+            },
         }
-        
+
+
+catalog = MigrationCatalog(
+    "../migrations", applied_ttl=float(os.getenv("WEB_CATALOG_APPLIED_TTL", "5"))
+)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _cached_response(request: Request, etag: str, payload: dict) -> Response:
+    """Return *payload* with an ETag, or an empty 304 if the client has it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(payload), headers=headers)
+
+
+VERSION_FIELDS = {
+    'id', 'author', 'description', 'filename', 'status', 'applied_at',
+    'risk_level', 'checksum', 'can_rollback_to',
+}
+BACKUP_FIELDS = {'filename', 'size', 'created_at', 'type', 'environment', 'exists'}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def _encode_cursor(value: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value, default=str).encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    if not cursor:
+        return None
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(value, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def _parse_fields(fields: Optional[str], allowed: set) -> Optional[set]:
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return requested
+
+
+def _project(item: dict, fields: Optional[set]) -> dict:
+    if fields is None:
+        return item
+    return {k: v for k, v in item.items() if k in fields}
+
+
+def _parse_datetime(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected ISO-8601 date/time")
+
+
+def _in_range(value, date_from: Optional[datetime], date_to: Optional[datetime]) -> bool:
+    if date_from is None and date_to is None:
+        return True
+    if value is None:
+        return False
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (date_from is None or value >= date_from) and (date_to is None or value < date_to)
+
+
+def _page_catalog_versions(snapshot: dict, filters: dict, after_file: Optional[str],
+                           limit: int) -> tuple:
+    """Filter the cached catalog in file order; the cursor is the last sqlFile."""
+    page = []
+    for version in snapshot['versions']['versions']:
+        if after_file is not None and version['filename'] <= after_file:
+            continue
+        if filters['status'] and version['status'] != filters['status']:
+            continue
+        if filters['risk'] and version['risk_level'] != filters['risk']:
+            continue
+        if filters['author'] and version['author'] != filters['author']:
+            continue
+        if not _in_range(version['applied_at'], filters['date_from'], filters['date_to']):
+            continue
+        page.append(version)
+        if len(page) > limit:
+            break
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = _encode_cursor({'file': page[-1]['filename']}) if has_more else None
+    return page, next_cursor
+
+
+def _page_applied_versions(snapshot: dict, filters: dict, after_order: int,
+                           limit: int) -> tuple:
+    """
+    Keyset-paginate applied changesets straight from DATABASECHANGELOG.
+
+    Uses the ORDEREXECUTED / DATEEXECUTED indexes; only the risk filter
+    (which lives in the SQL file headers) is applied in Python, refilling
+    the page batch by batch.
+    """
+    where = ["ORDEREXECUTED > %s"]
+    params: list = []
+    if filters['author']:
+        where.append("AUTHOR = %s")
+        params.append(filters['author'])
+    if filters['date_from']:
+        where.append("DATEEXECUTED >= %s")
+        params.append(filters['date_from'])
+    if filters['date_to']:
+        where.append("DATEEXECUTED < %s")
+        params.append(filters['date_to'])
+    sql = f"""
+        SELECT ID, AUTHOR, FILENAME, DATEEXECUTED, MD5SUM, ORDEREXECUTED
+        FROM DATABASECHANGELOG
+        WHERE {' AND '.join(where)}
+        ORDER BY ORDEREXECUTED
+        LIMIT %s
+    """
+
+    changesets_by_id = snapshot['changesets_by_id']
+    page = []
+    last_order = after_order
+    exhausted = False
+    conn = get_conn()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        while len(page) <= limit and not exhausted:
+            cursor.execute(sql, (last_order, *params, limit + 1))
+            rows = cursor.fetchall()
+            exhausted = len(rows) <= limit
+            for row in rows:
+                changeset = changesets_by_id.get(row['ID']) or {
+                    'id': row['ID'], 'author': row['AUTHOR'], 'sqlFile': row['FILENAME'],
+                    'risk': 'unknown', 'checksum': 'unknown',
+                }
+                if filters['risk'] and changeset['risk'] != filters['risk']:
+                    last_order = row['ORDEREXECUTED']
+                    continue
+                if len(page) == limit:
+                    # One extra match proves there is another page
+                    page.append(None)
+                    break
+                page.append(_version_entry(changeset, {'applied_at': row['DATEEXECUTED']}))
+                last_order = row['ORDEREXECUTED']
+        cursor.close()
+    finally:
+        conn.close()
+
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = _encode_cursor({'order': last_order}) if has_more else None
+    return page, next_cursor
+
+
+def _page_backups(filters: dict, after: Optional[dict], limit: int) -> tuple:
+    """Keyset-paginate ops_backup_metadata newest first on (created_at, id)."""
+    where = ["1 = 1"]
+    params: list = []
+    if filters['environment']:
+        where.append("environment = %s")
+        params.append(filters['environment'])
+    if filters['type']:
+        where.append("backup_type = %s")
+        params.append(filters['type'])
+    if filters['date_from']:
+        where.append("created_at >= %s")
+        params.append(filters['date_from'])
+    if filters['date_to']:
+        where.append("created_at < %s")
+        params.append(filters['date_to'])
+    filter_sql = ' AND '.join(where)
+    page_where = list(where)
+    page_params = list(params)
+    if after:
+        page_where.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        page_params += [after['created_at'], after['created_at'], after['id']]
+
+    conn = get_conn()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"""
+                SELECT id, backup_file, file_size, environment, backup_type, created_at
+                FROM ops_backup_metadata
+                WHERE {' AND '.join(page_where)}
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, (*page_params, limit + 1))
+            rows = cursor.fetchall()
+            total = None
+            if after is None:
+                cursor.execute(f"SELECT COUNT(*) AS n FROM ops_backup_metadata WHERE {filter_sql}", params)
+                total = cursor.fetchone()['n']
+        except ProgrammingError as e:
+            if e.errno != errorcode.ER_NO_SUCH_TABLE:
+                raise
+            rows, total = [], 0  # no backup has been recorded yet
+        cursor.close()
+    finally:
+        conn.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    backups = [{
+        'filename': row['backup_file'],
+        'size': row['file_size'],
+        'created_at': row['created_at'],
+        'type': row['backup_type'],
+        'environment': row['environment'],
+        'exists': Path(row['backup_file']).exists(),
+    } for row in rows]
+    next_cursor = None
+    if has_more:
+        next_cursor = _encode_cursor({'created_at': rows[-1]['created_at'], 'id': rows[-1]['id']})
+    return backups, next_cursor, total
+
+
+@app.get("/api/migrations/versions")
+async def get_all_versions(
+    request: Request,
+    status: Optional[str] = Query(None, pattern="^(applied|pending)$"),
+    risk: Optional[str] = None,
+    author: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Get migration versions with their status, one page at a time.
+
+    Filters: ``status``, ``risk``, ``author`` and an applied-at range
+    ``date_from`` (inclusive) / ``date_to`` (exclusive).  ``fields`` projects
+    each entry to a comma-separated subset.  Pass ``next_cursor`` back as
+    ``cursor`` for the next page.  ``status=applied`` pages straight from
+    DATABASECHANGELOG in execution order; other queries page over the
+    cached catalog in file order.
+    """
+    projection = _parse_fields(fields, VERSION_FIELDS)
+    after = _decode_cursor(cursor)
+    filters = {
+        'status': status,
+        'risk': risk,
+        'author': author,
+        'date_from': _parse_datetime(date_from, "date_from"),
+        'date_to': _parse_datetime(date_to, "date_to"),
+    }
+    try:
+        snapshot = await run_blocking(catalog.snapshot)
+        etag = f'"{hashlib.sha256((snapshot["etag"] + str(request.url.query)).encode()).hexdigest()[:32]}"'
+        if _etag_matches(request, etag):
+            return _cached_response(request, etag, {})
+
+        if status == 'applied':
+            page, next_cursor = await run_blocking(
+                _page_applied_versions, snapshot, filters, int((after or {}).get('order', 0)), limit
+            )
+        else:
+            page, next_cursor = _page_catalog_versions(
+                snapshot, filters, (after or {}).get('file'), limit
+            )
+
+        return _cached_response(request, etag, {
+            **{k: v for k, v in snapshot['versions'].items() if k != 'versions'},
+            'versions': [_project(v, projection) for v in page],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+        })
+
     except Exception as e:
         logging.error(f"Error getting versions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/migrations/status")
-async def get_migration_status():
+async def get_migration_status(request: Request):
     """Get current migration status"""
     try:
-        # Get pending migrations
-        changelog = auto_generate_changelog("../migrations")
-        
-        conn = get_conn()
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT ID FROM DATABASECHANGELOG")
-            applied_ids = {row['ID'] for row in cursor.fetchall()}
-            cursor.close()
-        finally:
-            conn.close()
-        
-        pending = [cs for cs in changelog if cs["id"] not in applied_ids]
-        
-        return {
-            'pending_migrations': len(pending),
-            'total_migrations': len(changelog),
-            'applied_migrations': len(applied_ids),
-            'pending_details': [
-                {
-                    'id': cs["id"],
-                    'author': cs["author"],
-                    'filename': cs["sqlFile"],
-                    'risk': cs["risk"]
-                } for cs in pending
-            ]
-        }
-        
+        snapshot = await run_blocking(catalog.snapshot)
+        return _cached_response(request, snapshot['etag'], snapshot['status'])
+
     except Exception as e:
         logging.error(f"Error getting status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/backups")
-async def list_backups():
-    """List available backup files"""
+async def list_backups(
+    environment: Optional[str] = None,
+    type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """List recorded backups (ops_backup_metadata), newest first, one page at a time"""
+    projection = _parse_fields(fields, BACKUP_FIELDS)
+    after = _decode_cursor(cursor)
+    if after is not None and not {'created_at', 'id'} <= after.keys():
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    filters = {
+        'environment': environment,
+        'type': type,
+        'date_from': _parse_datetime(date_from, "date_from"),
+        'date_to': _parse_datetime(date_to, "date_to"),
+    }
     try:
-        backup_files = []
-        
-        # Look for local backup files
-        for backup_file in Path(".").glob("backup_*.sql"):
-            stat = backup_file.stat()
-            backup_files.append({
-                'filename': backup_file.name,
-                'size': stat.st_size,
-                'created_at': datetime.fromtimestamp(stat.st_mtime),
-                'type': 'local'
-            })
-        
-        # Sort by creation time, newest first
-        backup_files.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        return {'backups': backup_files}
-        
+        backups, next_cursor, total = await run_blocking(_page_backups, filters, after, limit)
+        response = {
+            'backups': [_project(b, projection) for b in backups],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+        }
+        if total is not None:
+            response['total_count'] = total
+        return response
+
     except Exception as e:
         logging.error(f"Error listing backups: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/migrations/upload")
-async def upload_migration(request: UploadRequest):
-    """Upload a new migration via GitHub API"""
-    try:
-        # Generate filename
-        filename = f"{request.migration_id}_{request.description}.up.sql"
-        
-        # Generate full SQL content with headers
-        sql_content = f"""-- =============================================================================
+def _upload_via_github(request: UploadRequest) -> dict:
+    """Create a branch, commit the migration file and open a PR (blocking)."""
+    # Generate filename
+    filename = f"{request.migration_id}_{request.description}.up.sql"
+    
+    # Generate full SQL content with headers
+    sql_content = f"""-- =============================================================================
 -- Migration {request.migration_id}: {request.description.replace('_', ' ').title()}
 -- Uploaded via web interface on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 -- =============================================================================
@@ -238,50 +815,50 @@ async def upload_migration(request: UploadRequest):
 -- contexts: dev,prod
 
 {request.sql_content}"""
-        
-        # Create branch name
-        branch_name = f"migration-{request.migration_id}-{int(datetime.now().timestamp())}"
-        
-        # Get main branch SHA
-        main_response = requests.get(
-            f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/git/refs/heads/main",
-            headers={'Authorization': f'token {request.github_token}'}
-        )
-        main_response.raise_for_status()
-        main_sha = main_response.json()['object']['sha']
-        
-        # Create new branch
-        branch_response = requests.post(
-            f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/git/refs",
-            headers={'Authorization': f'token {request.github_token}'},
-            json={
-                'ref': f'refs/heads/{branch_name}',
-                'sha': main_sha
-            }
-        )
-        branch_response.raise_for_status()
-        
-        # Upload file
-        upload_response = requests.put(
-            f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/contents/migrations/{filename}",
-            headers={'Authorization': f'token {request.github_token}'},
-            json={
-                'message': request.commit_message,
-                'content': base64.b64encode(sql_content.encode()).decode(),
-                'branch': branch_name
-            }
-        )
-        upload_response.raise_for_status()
-        
-        # Create PR
-        pr_response = requests.post(
-            f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/pulls",
-            headers={'Authorization': f'token {request.github_token}'},
-            json={
-                'title': f"Add migration {request.migration_id}: {request.description}",
-                'head': branch_name,
-                'base': 'main',
-                'body': f"""## New Migration Upload
+    
+    # Create branch name
+    branch_name = f"migration-{request.migration_id}-{int(datetime.now().timestamp())}"
+    
+    # Get main branch SHA
+    main_response = requests.get(
+        f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/git/refs/heads/main",
+        headers={'Authorization': f'token {request.github_token}'}
+    )
+    main_response.raise_for_status()
+    main_sha = main_response.json()['object']['sha']
+    
+    # Create new branch
+    branch_response = requests.post(
+        f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/git/refs",
+        headers={'Authorization': f'token {request.github_token}'},
+        json={
+            'ref': f'refs/heads/{branch_name}',
+            'sha': main_sha
+        }
+    )
+    branch_response.raise_for_status()
+    
+    # Upload file
+    upload_response = requests.put(
+        f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/contents/migrations/{filename}",
+        headers={'Authorization': f'token {request.github_token}'},
+        json={
+            'message': request.commit_message,
+            'content': base64.b64encode(sql_content.encode()).decode(),
+            'branch': branch_name
+        }
+    )
+    upload_response.raise_for_status()
+    
+    # Create PR
+    pr_response = requests.post(
+        f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/pulls",
+        headers={'Authorization': f'token {request.github_token}'},
+        json={
+            'title': f"Add migration {request.migration_id}: {request.description}",
+            'head': branch_name,
+            'base': 'main',
+            'body': f"""## New Migration Upload
 
 - **Migration ID**: {request.migration_id}
 - **Description**: {request.description}
@@ -296,18 +873,25 @@ async def upload_migration(request: UploadRequest):
 
 Uploaded via web interface. This PR will trigger CI validation and auto-deploy to dev environment upon merge.
 """
-            }
-        )
-        pr_response.raise_for_status()
-        pr_data = pr_response.json()
-        
-        return {
-            'success': True,
-            'filename': filename,
-            'branch': branch_name,
-            'pr_url': pr_data['html_url'],
-            'pr_number': pr_data['number']
         }
+    )
+    pr_response.raise_for_status()
+    pr_data = pr_response.json()
+    
+    return {
+        'success': True,
+        'filename': filename,
+        'branch': branch_name,
+        'pr_url': pr_data['html_url'],
+        'pr_number': pr_data['number']
+    }
+
+
+@app.post("/api/migrations/upload")
+async def upload_migration(request: UploadRequest):
+    """Upload a new migration via GitHub API"""
+    try:
+        return await run_blocking(_upload_via_github, request)
         
     except requests.RequestException as e:
         logging.error(f"GitHub API error: {e}")
@@ -318,107 +902,124 @@ Uploaded via web interface. This PR will trigger CI validation and auto-deploy t
 
 @app.post("/api/migrations/apply")
 async def apply_migrations():
-    """Apply pending migrations with automatic backup"""
+    """Apply pending migrations with automatic backup (background job)"""
     try:
-        # Apply migrations using existing system (auto_backup=True by default)
-        from src.migrate.changelog import auto_generate_changelog
-        
         # Check if there are pending migrations first
-        changelog = auto_generate_changelog("../migrations")
-        conn = get_conn()
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT ID FROM DATABASECHANGELOG")
-            applied_ids = {row['ID'] for row in cursor.fetchall()}
-            cursor.close()
-        finally:
-            conn.close()
+        snapshot = await run_blocking(catalog.snapshot)
         
-        pending = [cs for cs in changelog if cs["id"] not in applied_ids]
-        
-        if not pending:
+        if not snapshot['status']['pending_migrations']:
             return {
                 'success': True,
                 'message': 'No pending migrations to apply',
                 'applied_count': 0
             }
         
-        # Apply migrations with automatic backup
-        applied_count = update_cmd(auto_backup=True)
+        # Apply migrations with automatic backup (auto_backup=True by default)
+        def _apply():
+            try:
+                applied_count = update_cmd(auto_backup=True)
+            finally:
+                catalog.invalidate_applied()
+            return {
+                'message': f'Successfully applied {applied_count} migration(s)',
+                'applied_count': applied_count,
+                'backup_created': True
+            }
         
-        return {
-            'success': True,
-            'message': f'Successfully applied {applied_count} migration(s)',
-            'applied_count': applied_count,
-            'backup_created': True
-        }
+        return _job_accepted(submit_job("apply", _apply))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Apply error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/migrations/rollback")
 async def rollback_migration(request: RollbackRequest):
-    """Rollback to a specific migration version"""
-    try:
-        # Validate backup file exists
-        backup_path = Path(request.backup_file)
-        if not backup_path.exists():
-            raise HTTPException(status_code=404, detail=f"Backup file {request.backup_file} not found")
-        
+    """Rollback to a specific migration version (background job)
+
+    Down-scripts and stored inverses need no backup; ``backup_file`` is only
+    restored when a changeset after the target has neither.
+    """
+    # Validate backup file exists
+    if request.backup_file and not Path(request.backup_file).exists():
+        raise HTTPException(status_code=404, detail=f"Backup file {request.backup_file} not found")
+    
+    def _rollback():
         # Execute rollback using existing system
-        rollback_cmd(request.target_version, request.backup_file)
-        
+        try:
+            result = rollback_cmd(request.target_version, request.backup_file)
+        finally:
+            catalog.invalidate_applied()
         return {
-            'success': True,
             'message': f'Successfully rolled back to version {request.target_version}',
-            'backup_used': request.backup_file
+            'method': result['method'],
+            'removed_migrations': result['removed'],
+            'backup_used': result['backup_file']
         }
-        
-    except Exception as e:
-        logging.error(f"Rollback error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    return _job_accepted(submit_job("rollback", _rollback))
+
+def _create_backup_file() -> dict:
+    """Dump the database to a new ``backup_manual_*.sql`` file (blocking).
+
+    Goes through the runner's ``create_backup`` so the file is recorded in
+    ops_backup_metadata and reported on the event stream.
+    """
+    timestamp = datetime.now().strftime('%Y%m%dT%H%M%SZ')
+    backup_file = run_backup(
+        f"backup_manual_{timestamp}.sql",
+        environment=os.getenv("ENV_NAME", "dev"),
+        backup_type="manual",
+    )
+
+    return {
+        'filename': backup_file,
+        'size': Path(backup_file).stat().st_size,
+        'created_at': datetime.now().isoformat()
+    }
 
 @app.post("/api/backups/create")
 async def create_backup():
-    """Create a new backup"""
-    try:
-        timestamp = datetime.now().strftime('%Y%m%dT%H%M%SZ')
-        backup_file = f"backup_manual_{timestamp}.sql"
-        
-        # Create backup using mysqldump
-        import subprocess
-        env = os.environ
-        cmd = [
-            'mysqldump',
-            '-h', env.get('DB_HOST', '127.0.0.1'),
-            '-P', env.get('DB_PORT', '3307'),
-            '-u', env.get('DB_USER', 'root'),
-            f'-p{env.get("DB_PASSWORD", "testpw")}',
-            '--single-transaction', '--no-tablespaces', '--skip-triggers', '--skip-events',
-            env.get('DB_NAME', 'migration_db')
-        ]
-        
-        with open(backup_file, 'w') as f:
-            result = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE, text=True)
-        
-        if result.returncode != 0:
-            raise Exception(f"Backup failed: {result.stderr}")
-        
-        # Get file size
-        backup_path = Path(backup_file)
-        file_size = backup_path.stat().st_size
-        
-        return {
-            'success': True,
-            'filename': backup_file,
-            'size': file_size,
-            'created_at': datetime.now()
-        }
-        
-    except Exception as e:
-        logging.error(f"Backup creation error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    """Create a new backup (background job)"""
+    return _job_accepted(submit_job("backup", _create_backup_file))
+
+@app.get("/api/events")
+async def stream_events(request: Request):
+    """Server-Sent Events stream of runner, backup and job progress events"""
+    queue = broker.subscribe(request.headers.get("last-event-id"))
+
+    async def _stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    seq, event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {seq}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(_stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """List background jobs, newest first"""
+    jobs = sorted(JOBS.values(), key=lambda j: j["created_at"], reverse=True)
+    return {'jobs': jobs}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll the status of a background job"""
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
 
 if __name__ == "__main__":
     import uvicorn
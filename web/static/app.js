@@ -6,6 +6,10 @@ class MigrationManager {
         this.loadingModal = new bootstrap.Modal(document.getElementById('loadingModal'));
         this.successModal = new bootstrap.Modal(document.getElementById('successModal'));
         this.errorModal = new bootstrap.Modal(document.getElementById('errorModal'));
+        this.eventsConnected = false;
+        this.jobWaiters = {};
+        this.refreshTimer = null;
+        this.versionsCursor = null;
         
         this.init();
     }
@@ -19,8 +23,66 @@ class MigrationManager {
         // Set up form handlers
         this.setupFormHandlers();
         
-        // Auto-refresh every 30 seconds
-        setInterval(() => this.loadDashboardData(), 30000);
+        // Live updates are pushed by the server; polling is only a fallback
+        if (window.EventSource) {
+            this.connectEvents();
+        } else {
+            setInterval(() => this.loadDashboardData(), 30000);
+        }
+    }
+
+    connectEvents() {
+        const source = new EventSource(this.apiBase + '/api/events');
+        source.onopen = () => { this.eventsConnected = true; };
+        source.onerror = () => { this.eventsConnected = false; };  // EventSource reconnects itself
+        source.onmessage = (message) => {
+            try {
+                this.handleServerEvent(JSON.parse(message.data));
+            } catch (error) {
+                console.error('Bad server event:', error);
+            }
+        };
+        this.eventSource = source;
+    }
+
+    handleServerEvent(event) {
+        const progress = this.describeEvent(event);
+        if (progress) {
+            document.getElementById('loadingMessage').textContent = progress;
+        }
+
+        if (event.event === 'job_succeeded' || event.event === 'job_failed') {
+            const waiter = this.jobWaiters[event.job.job_id];
+            if (waiter) waiter(event.job);
+            this.scheduleRefresh();
+        } else if (event.event === 'catalog_changed') {
+            this.scheduleRefresh();
+        }
+    }
+
+    describeEvent(event) {
+        switch (event.event) {
+            case 'creating_backup': return `Creating backup ${event.backup_file}...`;
+            case 'backup_created': return `Backup created: ${event.backup_file}`;
+            case 'applying_changeset': return `Applying changeset ${event.id} (${event.risk} risk)...`;
+            case 'changeset_applied': return `Changeset ${event.id} applied`;
+            case 'changeset_marked_ran': return `Changeset ${event.id} marked as ran`;
+            case 'update_complete': return `Applied ${event.applied} changeset(s)`;
+            case 'rollback_start': return `Rolling back to version ${event.target}...`;
+            case 'backup_restored': return `Backup ${event.backup_file} restored, cleaning changelog...`;
+            case 'rollback_complete': return `Rolled back to version ${event.target}`;
+            default: return null;
+        }
+    }
+
+    scheduleRefresh() {
+        // Coalesce bursts of events into a single reload
+        clearTimeout(this.refreshTimer);
+        this.refreshTimer = setTimeout(() => {
+            this.loadDashboardData();
+            this.loadVersions();
+            this.loadBackups();
+        }, 500);
     }
 
     setupFormHandlers() {
@@ -71,6 +133,29 @@ class MigrationManager {
         }
     }
 
+    async waitForJob(accepted, intervalMs = 2000) {
+        // Long operations run as background jobs; wait for their final event
+        if (!accepted.job_id) return accepted;
+        if (this.eventsConnected) {
+            const job = await new Promise(resolve => {
+                this.jobWaiters[accepted.job_id] = resolve;
+                // The job may have finished before the waiter was registered
+                this.apiCall(`/api/jobs/${accepted.job_id}`).then(current => {
+                    if (current.status === 'succeeded' || current.status === 'failed') resolve(current);
+                }).catch(() => {});
+            });
+            delete this.jobWaiters[accepted.job_id];
+            if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+            return job.result;
+        }
+        while (true) {
+            const job = await this.apiCall(`/api/jobs/${accepted.job_id}`);
+            if (job.status === 'succeeded') return job.result;
+            if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
     showLoading(message = 'Processing...') {
         document.getElementById('loadingMessage').textContent = message;
         this.loadingModal.show();
@@ -92,17 +177,18 @@ class MigrationManager {
 
     async loadDashboardData() {
         try {
+            // Only the totals are needed here, so ask for a one-row projection
             const [versionsData, statusData, backupsData] = await Promise.all([
-                this.apiCall('/api/migrations/versions'),
+                this.apiCall('/api/migrations/versions?limit=1&fields=id'),
                 this.apiCall('/api/migrations/status'),
-                this.apiCall('/api/backups')
+                this.apiCall('/api/backups?limit=1&fields=filename')
             ]);
 
             // Update dashboard cards
             document.getElementById('appliedCount').textContent = versionsData.applied_count;
             document.getElementById('pendingCount').textContent = versionsData.pending_count;
             document.getElementById('totalCount').textContent = versionsData.total_count;
-            document.getElementById('backupCount').textContent = backupsData.backups.length;
+            document.getElementById('backupCount').textContent = backupsData.total_count ?? backupsData.backups.length;
 
             // Enable/disable apply button
             const applyBtn = document.getElementById('applyBtn');
@@ -131,17 +217,44 @@ class MigrationManager {
 
     async loadVersions() {
         try {
-            const data = await this.apiCall('/api/migrations/versions');
+            const [data, applied] = await Promise.all([
+                this.apiCall('/api/migrations/versions?limit=50'),
+                this.apiCall('/api/migrations/versions?status=applied&limit=500&fields=id,description,author,can_rollback_to')
+            ]);
             this.renderVersionsTimeline(data.versions);
-            this.populateRollbackVersions(data.versions);
+            this.setVersionsCursor(data.next_cursor);
+            this.populateRollbackVersions(applied.versions);
         } catch (error) {
             console.error('Failed to load versions:', error);
             this.showError('Failed to load migration versions: ' + error.message);
         }
     }
 
-    renderVersionsTimeline(versions) {
+    async loadMoreVersions() {
+        if (!this.versionsCursor) return;
+        try {
+            const data = await this.apiCall(
+                `/api/migrations/versions?limit=50&cursor=${encodeURIComponent(this.versionsCursor)}`
+            );
+            this.renderVersionsTimeline(data.versions, true);
+            this.setVersionsCursor(data.next_cursor);
+        } catch (error) {
+            console.error('Failed to load more versions:', error);
+            this.showError('Failed to load migration versions: ' + error.message);
+        }
+    }
+
+    setVersionsCursor(cursor) {
+        this.versionsCursor = cursor;
+        document.getElementById('loadMoreVersionsBtn').classList.toggle('d-none', !cursor);
+    }
+
+    renderVersionsTimeline(versions, append = false) {
         const timeline = document.getElementById('versionsTimeline');
+        if (append) {
+            versions.forEach(version => timeline.appendChild(this.renderVersionItem(version)));
+            return;
+        }
         timeline.innerHTML = '';
 
         if (versions.length === 0) {
@@ -149,55 +262,57 @@ class MigrationManager {
             return;
         }
 
-        versions.forEach(version => {
-            const item = document.createElement('div');
-            item.className = `timeline-item ${version.status}`;
-            
-            const statusIcon = version.status === 'applied' ? 'fa-check-circle text-success' :
-                             version.status === 'pending' ? 'fa-clock text-warning' :
-                             'fa-times-circle text-danger';
+        versions.forEach(version => timeline.appendChild(this.renderVersionItem(version)));
+    }
 
-            const riskBadge = `<span class="badge risk-badge ${version.risk_level}">${version.risk_level.toUpperCase()}</span>`;
-            
-            const appliedDate = version.applied_at ? 
-                new Date(version.applied_at).toLocaleString() : 'Not applied';
-
-            const rollbackBtn = version.can_rollback_to ? 
-                `<button class="btn btn-outline-danger btn-sm" onclick="migrationManager.prepareRollback('${version.id}')">
-                    <i class="fas fa-undo"></i> Rollback to here
-                </button>` : '';
-
-            item.innerHTML = `
-                <div class="card migration-card ${version.status}">
-                    <div class="card-body">
-                        <div class="d-flex justify-content-between align-items-start">
-                            <div>
-                                <h6 class="card-title">
-                                    <i class="fas ${statusIcon}"></i>
-                                    Migration ${version.id}: ${version.description}
-                                </h6>
-                                <p class="card-text text-muted mb-2">
-                                    <small>
-                                        <i class="fas fa-user"></i> ${version.author} | 
-                                        <i class="fas fa-file"></i> ${version.filename} |
-                                        <i class="fas fa-calendar"></i> ${appliedDate}
-                                    </small>
-                                </p>
-                                <div class="d-flex align-items-center gap-2">
-                                    ${riskBadge}
-                                    <span class="badge bg-secondary">${version.status}</span>
-                                </div>
-                            </div>
-                            <div>
-                                ${rollbackBtn}
+    renderVersionItem(version) {
+        const item = document.createElement('div');
+        item.className = `timeline-item ${version.status}`;
+        
+        const statusIcon = version.status === 'applied' ? 'fa-check-circle text-success' :
+                         version.status === 'pending' ? 'fa-clock text-warning' :
+                         'fa-times-circle text-danger';
+
+        const riskBadge = `<span class="badge risk-badge ${version.risk_level}">${version.risk_level.toUpperCase()}</span>`;
+        
+        const appliedDate = version.applied_at ? 
+            new Date(version.applied_at).toLocaleString() : 'Not applied';
+
+        const rollbackBtn = version.can_rollback_to ? 
+            `<button class="btn btn-outline-danger btn-sm" onclick="migrationManager.prepareRollback('${version.id}')">
+                <i class="fas fa-undo"></i> Rollback to here
+            </button>` : '';
+
+        item.innerHTML = `
+            <div class="card migration-card ${version.status}">
+                <div class="card-body">
+                    <div class="d-flex justify-content-between align-items-start">
+                        <div>
+                            <h6 class="card-title">
+                                <i class="fas ${statusIcon}"></i>
+                                Migration ${version.id}: ${version.description}
+                            </h6>
+                            <p class="card-text text-muted mb-2">
+                                <small>
+                                    <i class="fas fa-user"></i> ${version.author} | 
+                                    <i class="fas fa-file"></i> ${version.filename} |
+                                    <i class="fas fa-calendar"></i> ${appliedDate}
+                                </small>
+                            </p>
+                            <div class="d-flex align-items-center gap-2">
+                                ${riskBadge}
+                                <span class="badge bg-secondary">${version.status}</span>
                             </div>
                         </div>
+                        <div>
+                            ${rollbackBtn}
+                        </div>
                     </div>
                 </div>
-            `;
-            
-            timeline.appendChild(item);
-        });
+            </div>
+        `;
+        
+        return item;
     }
 
     populateRollbackVersions(versions) {
@@ -254,7 +369,7 @@ class MigrationManager {
 
     populateBackupSelect(backups) {
         const select = document.getElementById('backupFile');
-        select.innerHTML = '<option value="">Select backup file...</option>';
+        select.innerHTML = '<option value="">No backup (down-scripts / inverses only)</option>';
         
         backups.forEach(backup => {
             const option = document.createElement('option');
@@ -332,9 +447,10 @@ class MigrationManager {
         try {
             this.showLoading('Creating backup and applying migrations...');
             
-            const result = await this.apiCall('/api/migrations/apply', {
+            const accepted = await this.apiCall('/api/migrations/apply', {
                 method: 'POST'
             });
+            const result = await this.waitForJob(accepted);
 
             this.hideLoading();
             
@@ -387,13 +503,13 @@ class MigrationManager {
     async executeRollback() {
         const formData = {
             target_version: document.getElementById('targetVersion').value,
-            backup_file: document.getElementById('backupFile').value,
+            backup_file: document.getElementById('backupFile').value || null,
             environment: document.getElementById('environment').value
         };
 
         // Validate form
-        if (!formData.target_version || !formData.backup_file) {
-            this.showError('Please select both target version and backup file.');
+        if (!formData.target_version) {
+            this.showError('Please select a target version.');
             return;
         }
 
@@ -407,8 +523,12 @@ class MigrationManager {
         if (formData.environment === 'prod') {
             const prodConfirm = confirm(
                 'WARNING: You are about to rollback the PRODUCTION database. ' +
-                'This will restore the database from a backup and any data written after ' +
-                'the backup timestamp will be PERMANENTLY LOST. Are you absolutely sure?'
+                (formData.backup_file
+                    ? 'If any changeset has no down-script or inverse, the database will be ' +
+                      'restored from the backup and any data written after the backup ' +
+                      'timestamp will be PERMANENTLY LOST. '
+                    : 'Down-scripts and inverses will undo every changeset after the target. ') +
+                'Are you absolutely sure?'
             );
             if (!prodConfirm) return;
         }
@@ -416,17 +536,19 @@ class MigrationManager {
         try {
             this.showLoading(`Rolling back to version ${formData.target_version}...`);
             
-            const result = await this.apiCall('/api/migrations/rollback', {
+            const accepted = await this.apiCall('/api/migrations/rollback', {
                 method: 'POST',
                 body: JSON.stringify(formData)
             });
+            const result = await this.waitForJob(accepted);
 
             this.hideLoading();
             
             this.showSuccess(`
                 <h6>Rollback completed successfully!</h6>
                 <p>${result.message}</p>
-                <p><strong>Backup used:</strong> ${result.backup_used}</p>
+                <p><strong>Method:</strong> ${result.method}</p>
+                <p><strong>Backup used:</strong> ${result.backup_used || 'none'}</p>
                 <p><strong>Environment:</strong> ${formData.environment}</p>
             `);
 
@@ -447,9 +569,10 @@ class MigrationManager {
         try {
             this.showLoading('Creating database backup...');
             
-            const result = await this.apiCall('/api/backups/create', {
+            const accepted = await this.apiCall('/api/backups/create', {
                 method: 'POST'
             });
+            const result = await this.waitForJob(accepted);
 
             this.hideLoading();
             
@@ -487,6 +610,10 @@ function refreshVersions() {
     migrationManager.refreshVersions();
 }
 
+function loadMoreVersions() {
+    migrationManager.loadMoreVersions();
+}
+
 function applyPendingMigrations() {
     migrationManager.applyPendingMigrations();
 }